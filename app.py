@@ -1,10 +1,13 @@
 import streamlit as st
 import pandas as pd
 from src.rag_pipeline import RAGPipeline
-from src.text2sql_pipeline import Text2SQLPipeline
-from src.etl import process_bronze_to_silver, process_silver_to_gold
+from src.text2sql_pipeline import Text2SQLPipeline, DEFAULT_DB_PATH
+from src.etl import process_bronze_to_silver, process_silver_to_gold, latest_layer_path, load_layer
 from src.visualization import visualize_query_results
+from src.tracing import trace, span
 import os
+import tempfile
+import uuid
 
 # Page Config
 st.set_page_config(
@@ -18,22 +21,23 @@ st.set_page_config(
 def get_rag_pipeline():
     rag = RAGPipeline()
     # Ensure data is loaded (in a real app, this might be separate)
-    if os.path.exists('data/gold/claims_master.csv'):
-        rag.ingest('data/gold/claims_master.csv')
+    gold_path = latest_layer_path()
+    if gold_path:
+        rag.ingest(gold_path)
     return rag
 
 @st.cache_resource
 def get_text2sql_pipeline():
-    t2s = Text2SQLPipeline()
-    if os.path.exists('data/gold/claims_master.csv'):
-        t2s.load_data('data/gold/claims_master.csv')
+    t2s = Text2SQLPipeline(db_path=DEFAULT_DB_PATH)
+    gold_path = latest_layer_path()
+    if gold_path:
+        t2s.load_data(gold_path)
     return t2s
 
 # Function to reload pipelines after data update
 def reload_pipelines():
+    # Pipelines are rebuilt lazily, the next time a query needs them
     st.cache_resource.clear()
-    st.session_state.rag = get_rag_pipeline()
-    st.session_state.t2s = get_text2sql_pipeline()
     st.success("Pipelines reloaded with new data!")
 
 # Check for API Key
@@ -50,13 +54,6 @@ if not api_key:
     st.info("To set in Streamlit Secrets: Go to App Settings -> Secrets and add `GROQ_API_KEY = 'your_key'`")
     st.stop()
 
-try:
-    rag = get_rag_pipeline()
-    t2s = get_text2sql_pipeline()
-except Exception as e:
-    st.error(f"Error initializing pipelines: {e}")
-    st.stop()
-
 # UI Layout
 st.title("✨ Vanish: Talk to your Data")
 st.markdown("Ask questions about insurance claims using **Natural Language**.")
@@ -71,20 +68,30 @@ with st.sidebar:
     
     if data_source == "Upload Your Own Data":
         uploaded_files = st.file_uploader("Upload CSV Files", type=['csv'], accept_multiple_files=True)
+        storage_format = st.radio(
+            "Storage Format",
+            ["CSV", "Parquet"],
+            help="Parquet stores typed columns partitioned by source and service month, which loads much faster."
+        )
+        # Off by default: uploads replace the existing data, as they always have
+        incremental = st.checkbox(
+            "Merge into existing data (only new or changed files)",
+            value=False,
+            help="Skips files already processed with identical contents and merges the rest into the existing data, keyed on claim_id. "
+                 "Leave unchecked to replace the existing data with these uploads."
+        )
         if uploaded_files:
             if st.button("Process Data"):
                 with st.spinner("Processing uploaded files..."):
                     # Prepare files for ETL
-                    files_to_process = []
-                    for uploaded_file in uploaded_files:
-                        # Read into DataFrame
-                        df = pd.read_csv(uploaded_file)
-                        files_to_process.append((uploaded_file.name, df))
+                    # Raw bytes are parsed in the ETL worker processes, one file per core
+                    files_to_process = [(uploaded_file.name, uploaded_file.getvalue()) for uploaded_file in uploaded_files]
                     
                     # Run ETL
                     try:
-                        df_silver = process_bronze_to_silver(files_to_process)
-                        process_silver_to_gold(df_silver)
+                        output_format = storage_format.lower()
+                        df_silver = process_bronze_to_silver(files_to_process, output_format=output_format, incremental=incremental)
+                        process_silver_to_gold(df_silver, output_format=output_format, incremental=incremental)
                         st.success("Data processed successfully!")
                         reload_pipelines()
                     except Exception as e:
@@ -100,24 +107,80 @@ with st.sidebar:
     
     st.markdown("---")
     st.markdown("### Data Info")
-    if os.path.exists('data/gold/claims_master.csv'):
-        df = pd.read_csv('data/gold/claims_master.csv')
+    gold_path = latest_layer_path()
+    if gold_path:
+        df = load_layer(gold_path, columns=['claim_id'])
         st.info(f"Loaded {len(df)} claims.")
     else:
         st.warning("Data not found.")
+    
+    # Filled at the end of the run, once the current request has been traced
+    timing_placeholder = st.empty()
+
+# Only the pipeline for the selected query method is initialized, so a Text2SQL
+# session never waits for the embedding model (and torch) to load: its SQL cache
+# matches questions exactly unless SQL_CACHE_THRESHOLD turns on paraphrase matching
+try:
+    if query_method == "Text2SQL (Structured Query)":
+        t2s = get_text2sql_pipeline()
+    else:
+        rag = get_rag_pipeline()
+        query_cache = rag.cache_stats()['query_results']
+        st.sidebar.caption(f"RAG query cache: {query_cache['hits']} hits / {query_cache['misses']} misses")
+except Exception as e:
+    st.error(f"Error initializing pipelines: {e}")
+    st.stop()
 
 # Chat Interface
 if "messages" not in st.session_state:
     st.session_state.messages = []
+# Identifies this browser session to the shared query pool, so a new question cancels
+# a query still running for the previous one
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+
+def render_query_result(result, key, expanded=False):
+    """
+    Shows one page of a Text2SQL result. Only the first page is kept in the session;
+    other pages and the full export are fetched from DuckDB on demand.
+    """
+    page = 0
+    if result.n_pages > 1:
+        page = st.number_input(f"Page (of {result.n_pages})", min_value=1, max_value=result.n_pages, key=f"page_{key}") - 1
+    page_df = result.preview if page == 0 else get_text2sql_pipeline().fetch_page(result, page, session_id=st.session_state.session_id)
+    st.dataframe(page_df)
+    
+    if result.n_pages > 1:
+        start = page * result.page_size
+        st.caption(f"Showing rows {start + 1}-{start + len(page_df)} of {result.row_count}.")
+        if st.button("Prepare full CSV export", key=f"export_{key}"):
+            with st.spinner("Exporting..."):
+                path = get_text2sql_pipeline().export_csv(result, os.path.join(tempfile.gettempdir(), f"vanish_{st.session_state.session_id}_{key}.csv"))
+            with open(path, "rb") as f:
+                st.download_button("Download CSV", f, file_name="query_result.csv", mime="text/csv", key=f"download_{key}")
+    else:
+        st.download_button("Download CSV", page_df.to_csv(index=False), file_name="query_result.csv", mime="text/csv", key=f"download_{key}")
+    
+    with st.expander("Visualize Results", expanded=expanded):
+        with span("visualize", rows=len(page_df)):
+            visualize_query_results(page_df)
+
+def render_timing(root):
+    """
+    Per-stage timing of the last request, from its trace.
+    """
+    with timing_placeholder.container():
+        st.markdown("---")
+        st.markdown("### ⏱️ Last Request")
+        st.caption(f"{root.elapsed_ms:.0f} ms total")
+        st.dataframe(pd.DataFrame(root.breakdown()), hide_index=True)
 
 # Display Chat History
-for message in st.session_state.messages:
+for i, message in enumerate(st.session_state.messages):
     with st.chat_message(message["role"]):
         st.markdown(message["content"])
-        if "dataframe" in message and message["dataframe"] is not None:
-            st.dataframe(message["dataframe"])
-            with st.expander("Visualize Results"):
-                visualize_query_results(message["dataframe"])
+        if message.get("result") is not None:
+            render_query_result(message["result"], key=i)
         if "sql" in message:
             st.code(message["sql"], language="sql")
 
@@ -129,61 +192,69 @@ if prompt := st.chat_input("Ask a question (e.g., 'Show me denied claims for dia
         st.markdown(prompt)
 
     # Generate Response
-    with st.chat_message("assistant"):
-        with st.spinner("Thinking..."):
-            try:
-                if query_method == "Text2SQL (Structured Query)":
-                    # Text2SQL Flow
-                    sql_query = t2s.generate_sql(prompt)
-                    st.markdown(f"**Generated SQL:**")
-                    st.code(sql_query, language="sql")
-                    
-                    results_df = t2s.execute_sql(sql_query)
-                    
-                    if 'error' in results_df.columns:
-                        st.error(f"SQL Execution Error: {results_df['error'].iloc[0]}")
-                        response_text = "Failed to execute query."
-                        df_to_save = None
-                    elif not results_df.empty:
-                        st.dataframe(results_df)
-                        
-                        # Visualization
-                        with st.expander("Visualize Results", expanded=True):
-                            visualize_query_results(results_df)
-                            
-                        response_text = f"Found {len(results_df)} records."
-                        df_to_save = results_df
-                    else:
-                        response_text = "No results found."
-                        df_to_save = None
-                        
-                    st.markdown(response_text)
-                    
-                    # Save to history
-                    st.session_state.messages.append({
-                        "role": "assistant",
-                        "content": response_text,
-                        "sql": sql_query,
-                        "dataframe": df_to_save
-                    })
-                    
+    # LLM output is streamed into the page as it arrives instead of after the full completion
+    # Every stage of the turn is timed under one trace (see src/tracing.py)
+    with st.chat_message("assistant"), trace("chat_turn", method=query_method.split()[0]) as turn:
+        try:
+            if query_method == "Text2SQL (Structured Query)":
+                # Text2SQL Flow
+                st.markdown(f"**Generated SQL:**")
+                sql_placeholder = st.empty()
+                raw_sql = ""
+                with span("generate_sql"):
+                    for token in t2s.stream_sql(prompt):
+                        raw_sql += token
+                        sql_placeholder.code(raw_sql, language="sql")
+                sql_query = t2s.extract_sql(raw_sql)
+                sql_placeholder.code(sql_query, language="sql")
+                
+                with st.spinner("Running query..."):
+                    result = t2s.run_query(sql_query, session_id=st.session_state.session_id)
+                
+                # History keeps the result handle (SQL, row count, first page), never the full rows
+                result_to_save = None
+                if result.error:
+                    st.error(f"SQL Execution Error: {result.error}")
+                    response_text = "Failed to execute query."
+                elif result.row_count:
+                    response_text = f"Found {result.row_count} records."
+                    result_to_save = result
                 else:
-                    # RAG Flow
-                    retrieval_results = rag.query(prompt)
-                    answer = rag.generate_answer(prompt, retrieval_results)
-                    
-                    st.markdown(answer)
+                    response_text = "No results found."
                     
-                    with st.expander("View Source Documents"):
-                        for doc in retrieval_results['documents'][0]:
-                            st.markdown(f"- {doc}")
-                            
-                    # Save to history
-                    st.session_state.messages.append({
-                        "role": "assistant",
-                        "content": answer
-                    })
-                    
-            except Exception as e:
-                st.error(f"An error occurred: {e}")
+                st.markdown(response_text)
+                if result_to_save is not None:
+                    render_query_result(result_to_save, key=len(st.session_state.messages), expanded=True)
+                
+                # Save to history
+                st.session_state.messages.append({
+                    "role": "assistant",
+                    "content": response_text,
+                    "sql": sql_query,
+                    "result": result_to_save
+                })
+                
+            else:
+                # RAG Flow
+                with st.spinner("Searching claims..."):
+                    retrieval_results, answer_tokens = rag.stream_answer(prompt)
+                answer = st.write_stream(answer_tokens)
+                
+                with st.expander("View Source Documents"):
+                    for doc in retrieval_results['documents'][0]:
+                        st.markdown(f"- {doc}")
+                        
+                # Save to history
+                st.session_state.messages.append({
+                    "role": "assistant",
+                    "content": answer
+                })
+                
+        except Exception as e:
+            turn.set(error=str(e))
+            st.error(f"An error occurred: {e}")
+    st.session_state.last_trace = turn
+
+if st.session_state.get("last_trace") is not None:
+    render_timing(st.session_state.last_trace)
 
@@ -0,0 +1,150 @@
+"""
+Recall / latency / memory trade-off of the RAG vector index backends.
+
+Generates clustered synthetic embeddings (real sentence embeddings cluster by topic),
+computes the exact top-k with the numpy brute-force index, then measures build time,
+query latency and recall@k for Chroma's HNSW index at several M / ef_search settings,
+for FAISS IVF-PQ at several nprobe values, and for the int8 and binary quantized
+indexes with and without the full-precision re-rank.
+
+Memory is the resident bytes per vector each backend needs to answer queries. The
+quantized backends re-rank from an on-disk vectors file (the disk column) and, in the
+pipeline, keep documents in a Chroma collection with 1-dimension placeholder embeddings,
+whose vector segment is measured here and included in their memory.
+
+Usage:
+    python -m benchmarks.bench_ann_index --vectors 1000000 --queries 200 --k 10
+"""
+import argparse
+import os
+import tempfile
+import time
+import uuid
+
+import numpy as np
+
+from src.rag_pipeline import PLACEHOLDER_EMBEDDING, PLACEHOLDER_HNSW
+from src.vector_index import BruteForceIndex, IVFPQIndex, QUANTIZED_INDEXES, exact_rerank, hnsw_configuration
+
+HNSW_SETTINGS = [(16, 50), (16, 100), (32, 200)]
+NPROBE_SETTINGS = [8, 32, 128]
+QUANTIZED_SETTINGS = [('int8', 1), ('int8', 4), ('binary', 1), ('binary', 4), ('binary', 10)]
+
+
+def make_vectors(n, dim, n_clusters=256, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(n_clusters, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, n_clusters, size=n)] + 0.35 * rng.normal(size=(n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def measure(search, queries, truth, k):
+    latencies, hits = [], 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        found = search(query)
+        latencies.append(time.perf_counter() - start)
+        hits += len(set(found[:k]) & expected)
+    latencies = np.array(latencies) * 1000
+    return latencies.mean(), np.percentile(latencies, 95), hits / (k * len(queries))
+
+
+def segment_bytes(directory):
+    """
+    Size of the HNSW vector segment files (vectors and graph links) under directory.
+    """
+    total = 0
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if name in ('data_level0.bin', 'link_lists.bin', 'length.bin'):
+                total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+def run(n_vectors, n_queries, dim, k):
+    print(f"Generating {n_vectors:,} vectors of dimension {dim}...")
+    vectors = make_vectors(n_vectors + n_queries, dim)
+    vectors, queries = vectors[:n_vectors], vectors[n_vectors:]
+    ids = [str(i) for i in range(n_vectors)]
+    rows = []
+
+    start = time.perf_counter()
+    exact = BruteForceIndex()
+    exact.add(ids, vectors)
+    exact.search(queries[0], k)
+    build = time.perf_counter() - start
+    truth = [set(exact.search(query, k)[0]) for query in queries]
+    rows.append(("numpy (exact)", build, *measure(lambda q: exact.search(q, k)[0], queries, truth, k), dim * 4, 0))
+
+    import chromadb
+
+    with tempfile.TemporaryDirectory() as directory:
+        client = chromadb.PersistentClient(path=directory)
+        for M, ef_search in HNSW_SETTINGS:
+            collection = client.create_collection(
+                name=f"bench_{uuid.uuid4().hex[:8]}", configuration=hnsw_configuration(M=M, ef_search=ef_search))
+            start = time.perf_counter()
+            for i in range(0, n_vectors, 5000):
+                collection.add(ids=ids[i:i + 5000], embeddings=vectors[i:i + 5000])
+            build = time.perf_counter() - start
+            search = lambda q: collection.query(query_embeddings=[q], n_results=k, include=[])['ids'][0]
+            # HNSW stores the float vectors plus about 2 * M neighbor links of 4 bytes each
+            rows.append((f"chroma HNSW M={M} ef={ef_search}", build, *measure(search, queries, truth, k), dim * 4 + 2 * M * 4, 0))
+
+    # The documents-only collection the quantized backends keep next to their index
+    with tempfile.TemporaryDirectory() as directory:
+        client = chromadb.PersistentClient(path=directory)
+        placeholder = client.create_collection(name="bench_docs", configuration=hnsw_configuration(**PLACEHOLDER_HNSW))
+        for i in range(0, n_vectors, 5000):
+            placeholder.add(ids=ids[i:i + 5000], embeddings=[PLACEHOLDER_EMBEDDING] * len(ids[i:i + 5000]))
+        placeholder.count()
+        placeholder_bytes = segment_bytes(directory) / n_vectors
+    print(f"Placeholder Chroma vector segment: {placeholder_bytes:.0f} bytes/vector")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for backend, rerank_factor in QUANTIZED_SETTINGS:
+            index = QUANTIZED_INDEXES[backend](rerank_factor=rerank_factor, vectors_path=os.path.join(directory, f"{backend}_{rerank_factor}"))
+            start = time.perf_counter()
+            for i in range(0, n_vectors, 5000):
+                index.add(ids[i:i + 5000], vectors[i:i + 5000])
+            index.search(queries[0], k)
+            build = time.perf_counter() - start
+
+            def search(query, index=index):
+                candidates = index.search(query, k)[0]
+                if index.rerank_factor == 1:
+                    return candidates
+                return exact_rerank(query, candidates, index.full_vectors(candidates), k)[0]
+            label = f"{backend} rerank x{rerank_factor}" if rerank_factor > 1 else f"{backend} (no rerank)"
+            rows.append((label, build, *measure(search, queries, truth, k),
+                         index.bytes_per_vector + placeholder_bytes, index.disk_bytes_per_vector))
+
+    try:
+        for nprobe in NPROBE_SETTINGS:
+            nlist = min(1024, n_vectors // IVFPQIndex.MIN_POINTS_PER_LIST)
+            index = IVFPQIndex(nlist=nlist, nbits=8 if n_vectors >= 10_000 else 4, nprobe=nprobe, train_size=min(200_000, n_vectors))
+            start = time.perf_counter()
+            for i in range(0, n_vectors, 5000):
+                index.add(ids[i:i + 5000], vectors[i:i + 5000])
+            build = time.perf_counter() - start
+            if index.trained_nlist != nlist:
+                raise RuntimeError(f"IVF-PQ trained with nlist={index.trained_nlist}, configured {nlist}")
+            rows.append((f"faiss IVF-PQ nprobe={nprobe}", build, *measure(lambda q: index.search(q, k)[0], queries, truth, k), index.m + 8, 0))
+    except ImportError as e:
+        print(f"Skipping IVF-PQ: {e}")
+
+    print(f"{n_vectors:,} vectors | {n_queries} queries | recall@{k}")
+    print(f"{'backend':<28} | {'build':>8} | {'mean ms':>8} | {'p95 ms':>8} | {'recall':>6} | {'memory B/vec':>12} | disk B/vec (re-rank)")
+    for label, build, mean, p95, recall, memory, disk in rows:
+        print(f"{label:<28} | {build:7.1f}s | {mean:8.2f} | {p95:8.2f} | {recall:6.3f} | {memory:12,.0f} | {disk:,}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--vectors', type=int, default=200_000)
+    parser.add_argument('--queries', type=int, default=100)
+    parser.add_argument('--dim', type=int, default=384, help="all-MiniLM-L6-v2 embeddings have 384 dimensions")
+    parser.add_argument('--k', type=int, default=10)
+    args = parser.parse_args()
+
+    run(args.vectors, args.queries, args.dim, args.k)
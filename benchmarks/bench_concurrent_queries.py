@@ -0,0 +1,76 @@
+"""
+Load test for concurrent Text2SQL query execution.
+
+Loads a synthetic Gold table, then has 1 to N simulated sessions run a mix of analytic
+queries at the same time through Text2SQLPipeline.execute_sql. The "shared" row uses a
+pool of one cursor, which is how a single shared connection behaves.
+
+Usage:
+    python -m benchmarks.bench_concurrent_queries --rows 2000000 --max-sessions 8 --queries 20
+"""
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import make_silver
+from src.text2sql_pipeline import Text2SQLPipeline
+
+QUERIES = [
+    "SELECT diagnosis, COUNT(*) AS total_claims, SUM(claim_amount) AS total_amount FROM claims GROUP BY diagnosis ORDER BY total_amount DESC",
+    "SELECT specialty, AVG(claim_amount) AS avg_amount FROM claims WHERE claim_status ILIKE 'Denied' GROUP BY specialty",
+    "SELECT strftime(service_date, '%Y-%m') AS month, COUNT(*) AS total_claims FROM claims GROUP BY month ORDER BY month",
+    "SELECT patient_id, COUNT(*) AS claims FROM claims GROUP BY patient_id ORDER BY claims DESC LIMIT 10",
+    "SELECT COUNT(DISTINCT patient_name) AS patients FROM claims WHERE claim_amount > 1000",
+]
+
+
+def run_sessions(t2s, n_sessions, queries_per_session):
+    def session(i):
+        for j in range(queries_per_session):
+            result = t2s.execute_sql(QUERIES[(i + j) % len(QUERIES)], session_id=f"session-{i}")
+            assert 'error' not in result.columns, result['error'].iloc[0]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=n_sessions) as executor:
+        list(executor.map(session, range(n_sessions)))
+    return time.perf_counter() - start
+
+
+def run(n_rows, max_sessions, queries_per_session):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "claims_master.csv")
+        print(f"Writing {n_rows:,} claims...")
+        make_silver(n_rows).to_csv(path, index=False)
+
+        # Rollups would answer most aggregates without touching the table
+        shared = Text2SQLPipeline(pool_size=1, rollups=False)
+        pooled = Text2SQLPipeline(pool_size=max_sessions, rollups=False)
+        with contextlib.redirect_stdout(io.StringIO()):
+            shared.load_data(path)
+            pooled.load_data(path)
+
+            rows = []
+            sessions = 1
+            while sessions <= max_sessions:
+                for label, t2s in (("shared", shared), ("pooled", pooled)):
+                    elapsed = run_sessions(t2s, sessions, queries_per_session)
+                    rows.append((label, sessions, elapsed, sessions * queries_per_session / elapsed))
+                sessions *= 2
+
+    print(f"{os.cpu_count()} CPUs | {queries_per_session} queries per session")
+    for label, sessions, elapsed, qps in rows:
+        print(f"{label:>7} | {sessions:>3} sessions | {elapsed:7.2f}s | {qps:7.1f} queries/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    parser.add_argument('--max-sessions', type=int, default=8)
+    parser.add_argument('--queries', type=int, default=20, help="Queries per session")
+    args = parser.parse_args()
+
+    run(args.rows, args.max_sessions, args.queries)
@@ -0,0 +1,229 @@
+"""
+End-to-end benchmark of the ETL, Text2SQL and RAG paths at several dataset sizes.
+
+For every size, synthetic bronze files are generated in a temporary directory and
+each stage is timed with the pytest-benchmark style harness in benchmarks/harness.py:
+
+    etl   process_bronze_to_silver, process_silver_to_gold
+    sql   Text2SQLPipeline.load_data, execute_sql for every query in CANNED_SQL
+    rag   RAGPipeline.ingest (cold: no embedding cache), query for every CANNED_QUESTIONS entry
+    llm   generate_sql and generate_answer against the local stub LLM server
+
+LLM calls always go to benchmarks/stub_llm_server.py, so no API key is needed and
+network latency doesn't drown out the pipeline's own time. Results are written as
+JSON (default .benchmarks/<timestamp>_<commit>.json); pass --compare with an earlier
+file to see the change per benchmark, and --max-regression to fail on slowdowns.
+
+Usage:
+    python -m benchmarks.bench_end_to_end --sizes 1000 10000 100000 --rounds 3
+    python -m benchmarks.bench_end_to_end --stages etl sql --compare .benchmarks/baseline.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+
+from benchmarks.harness import BenchmarkSession, compare_runs
+from benchmarks.stub_llm_server import start_in_background
+
+STAGES = ['etl', 'sql', 'rag', 'llm']
+
+CANNED_SQL = {
+    'count_by_status': "SELECT claim_status, COUNT(*) AS total_claims FROM claims GROUP BY claim_status",
+    'amount_by_diagnosis': "SELECT diagnosis, COUNT(*) AS total_claims, SUM(claim_amount) AS total_amount FROM claims GROUP BY diagnosis ORDER BY total_amount DESC",
+    'denied_avg_by_specialty': "SELECT specialty, AVG(claim_amount) AS avg_amount FROM claims WHERE claim_status ILIKE 'Denied' GROUP BY specialty",
+    'claims_per_month': "SELECT strftime(service_date, '%Y-%m') AS month, COUNT(*) AS total_claims FROM claims GROUP BY month ORDER BY month",
+    'top_patients': "SELECT patient_id, COUNT(*) AS claims FROM claims GROUP BY patient_id ORDER BY claims DESC LIMIT 10",
+    'distinct_patients_over_1000': "SELECT COUNT(DISTINCT patient_name) AS patients FROM claims WHERE claim_amount > 1000",
+    'denied_diabetes_rows': "SELECT * FROM claims WHERE diagnosis ILIKE '%diabetes%' AND claim_status ILIKE 'Denied' LIMIT 100",
+}
+
+CANNED_QUESTIONS = {
+    'denial_reasons_diabetes': "Why were claims for diabetes denied?",
+    'denied_cardiology_over_1000': "Denied cardiology claims over $1000 in 2024",
+    'patient_lookup': "Claims for Jennifer Martinez",
+}
+
+# Metadata fields the filter planner must (and must only) constrain for each question;
+# checked before the RAG stage, since a wrong filter changes what is retrieved
+FILTER_CHECKS = {
+    "Denied cardiology claims over $1000 in 2024": {'claim_status', 'claim_amount', 'service_day'},
+    "denied claims over 2000 dollars": {'claim_status', 'claim_amount'},
+    "claims with an amount above 1999": {'claim_amount'},
+}
+
+
+def quiet(func):
+    """
+    func with the pipelines' progress output suppressed, so only results are printed.
+    """
+    def call(*args, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return func(*args, **kwargs)
+    return call
+
+
+def bench_etl(session, rows, workers, timed):
+    from src.etl import process_bronze_to_silver, process_silver_to_gold
+
+    if not timed:
+        return quiet(process_silver_to_gold)(quiet(process_bronze_to_silver)(max_workers=workers))
+    df_silver = session.benchmark('etl', 'bronze_to_silver', rows=rows)(quiet(process_bronze_to_silver), max_workers=workers)
+    to_gold = session.benchmark('etl', 'silver_to_gold', rows=rows)
+    df_gold = to_gold(quiet(process_silver_to_gold), df_silver)
+    to_gold.extra_info['gold_memory_mb'] = round(df_gold.memory_usage(deep=True).sum() / 1e6, 1)
+    return df_gold
+
+
+def bench_sql(session, rows, gold_path, stages):
+    from src.text2sql_pipeline import Text2SQLPipeline
+
+    # Exact-match SQL cache, so no embedding model is loaded whatever SQL_CACHE_THRESHOLD says
+    def fresh_pipeline():
+        return (Text2SQLPipeline(sql_cache_threshold=None), gold_path), {}
+    load_data = quiet(lambda t2s, path: (t2s.load_data(path), t2s)[1])
+    if 'sql' in stages:
+        load = session.benchmark('text2sql', 'load_data', rows=rows)
+        t2s = load.pedantic(load_data, setup=fresh_pipeline, rounds=session.rounds)
+        load.extra_info['rollups'] = sorted(t2s.rollups)
+    else:
+        t2s = load_data(*fresh_pipeline()[0])
+
+    if 'sql' in stages:
+        for name, sql in CANNED_SQL.items():
+            bench = session.benchmark('text2sql', 'execute_sql', rows=rows, query=name)
+            bench.extra_info['rewritten_to_rollup'] = t2s.rewrite_sql(sql) is not None
+            result = bench(quiet(t2s.execute_sql), sql)
+            if 'error' in result.columns:
+                raise RuntimeError(f"Canned query {name} failed: {result['error'].iloc[0]}")
+            bench.extra_info['result_rows'] = len(result)
+
+    if 'llm' in stages:
+        question = "How many claims were denied per specialty?"
+        session.benchmark('llm', 'generate_sql', rows=rows).pedantic(
+            quiet(t2s.generate_sql), args=(question,), setup=t2s.sql_cache.clear, rounds=session.rounds)
+
+
+def check_filters():
+    from src.hybrid_search import plan_filters
+
+    for question, expected in FILTER_CHECKS.items():
+        where = plan_filters(question, {}) or {}
+        fields = {field for condition in where.get('$and', [where]) for field in condition}
+        if fields != expected:
+            raise RuntimeError(f"Filters for {question!r} are on {sorted(fields)}, expected {sorted(expected)}")
+
+
+def bench_rag(session, rows, gold_path, stages, directory):
+    from src.embeddings import EmbeddingEngine
+    from src.rag_pipeline import RAGPipeline
+
+    check_filters()
+
+    # One model for every round, loaded before timing; no cache, so every ingest embeds cold
+    engine = EmbeddingEngine(cache_dir='')
+    engine.encode(["warm up"], use_cache=False)
+
+    def fresh_pipeline():
+        persist_directory = tempfile.mkdtemp(prefix='chroma_', dir=directory)
+        return (RAGPipeline(persist_directory=persist_directory, embedder=engine), gold_path), {}
+    ingest_data = quiet(lambda rag, path: (rag.ingest(path), rag)[1])
+    if 'rag' in stages:
+        ingest = session.benchmark('rag', 'ingest', rows=rows)
+        rag = ingest.pedantic(ingest_data, setup=fresh_pipeline, rounds=session.rounds)
+        ingest.extra_info['docs_per_sec'] = round(engine.documents_per_second, 1)
+    else:
+        rag = ingest_data(*fresh_pipeline()[0])
+
+    def clear_caches():
+        rag.query_results.clear()
+        rag.query_embeddings.clear()
+
+    results = {}
+    if 'rag' in stages:
+        for name, question in CANNED_QUESTIONS.items():
+            results[name] = session.benchmark('rag', 'query', rows=rows, question=name).pedantic(
+                quiet(rag.query), args=(question,), setup=clear_caches, rounds=session.rounds)
+
+    if 'llm' in stages:
+        name, question = next(iter(CANNED_QUESTIONS.items()))
+        context = results.get(name) or quiet(rag.query)(question)
+        session.benchmark('llm', 'generate_answer', rows=rows).pedantic(
+            quiet(rag.generate_answer), args=(question, context), rounds=session.rounds)
+
+
+def run_size(session, rows, stages, workers):
+    from generate_insurance_data import PAYERS, write_payer_data
+    from src.etl import GOLD_PATH
+
+    # The ETL reads data/bronze and writes data/silver and data/gold under the working directory
+    for i, payer in enumerate(PAYERS):
+        per_payer = rows // len(PAYERS) + (i < rows % len(PAYERS))
+        quiet(write_payer_data)(payer, per_payer, 'data/bronze', max_workers=workers)
+
+    bench_etl(session, rows, workers, timed='etl' in stages)
+    if {'sql', 'llm'} & set(stages):
+        bench_sql(session, rows, GOLD_PATH, stages)
+    if {'rag', 'llm'} & set(stages):
+        bench_rag(session, rows, GOLD_PATH, stages, os.getcwd())
+
+
+def default_output_path(session):
+    commit = (session.to_dict()['commit_info']['id'] or 'nocommit')[:8]
+    return os.path.join('.benchmarks', f"{session.started:%Y%m%dT%H%M%S}_{commit}.json")
+
+
+def run(sizes, stages, rounds, workers, output, compare, max_regression):
+    server, base_url = start_in_background()
+    os.environ['GROQ_BASE_URL'] = base_url
+    os.environ['GROQ_API_KEY'] = 'stub'
+    # Importing the SDK and creating the shared client is a one-off cost, not part of any call
+    from src.llm import get_client
+    get_client()
+
+    session = BenchmarkSession(rounds=rounds)
+    output = os.path.abspath(output or default_output_path(session))
+    cwd = os.getcwd()
+    try:
+        for rows in sizes:
+            print(f"\n📦 {rows:,} claims")
+            with tempfile.TemporaryDirectory() as directory:
+                os.chdir(directory)
+                try:
+                    run_size(session, rows, stages, workers)
+                finally:
+                    os.chdir(cwd)
+    finally:
+        server.shutdown()
+
+    print()
+    session.print_table()
+    print(f"\n💾 Results saved to {session.save(output)}")
+
+    if compare:
+        with open(compare) as f:
+            baseline = json.load(f)
+        rows = compare_runs(baseline, session.to_dict(), threshold=max_regression or 0.10)
+        print(f"\nCompared with {compare} ({baseline['commit_info'].get('id', '')[:8]}):")
+        for fullname, old, new, change, regressed in rows:
+            print(f"{fullname:<64} | {old * 1000:10.2f} -> {new * 1000:10.2f} ms | {change:+7.1%}{'  ⚠️' if regressed else ''}")
+        if max_regression is not None and any(regressed for *_, regressed in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000], help="Total claims per run, split across payers")
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES)
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--workers', type=int, default=None, help="Processes for data generation and the ETL")
+    parser.add_argument('--output', default=None, help="JSON results path (default: .benchmarks/<timestamp>_<commit>.json)")
+    parser.add_argument('--compare', default=None, help="Earlier results JSON to compare against")
+    parser.add_argument('--max-regression', type=float, default=None,
+                        help="Exit with status 1 if any mean is this fraction slower than --compare (e.g. 0.1)")
+    args = parser.parse_args()
+
+    run(args.sizes, args.stages, args.rounds, args.workers, args.output, args.compare, args.max_regression)
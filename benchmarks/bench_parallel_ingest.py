@@ -0,0 +1,56 @@
+"""
+Scaling benchmark for multi-file ingestion in process_bronze_to_silver.
+
+Writes a batch of synthetic payer CSV files to a temporary directory, then times
+Bronze -> Silver for 1 to N worker processes.
+
+Usage:
+    python -m benchmarks.bench_parallel_ingest --files 24 --rows 200000 --max-workers 8
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.common import make_silver
+from src.etl import process_bronze_to_silver
+
+
+def write_batch(directory, n_files, n_rows):
+    paths = []
+    for i in range(n_files):
+        path = os.path.join(directory, f"payer_{i:03d}.csv")
+        make_silver(n_rows, seed=i).drop(columns=['source']).to_csv(path, index=False)
+        paths.append(path)
+    return paths
+
+
+def run(n_files, n_rows, max_workers):
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"Writing {n_files} files x {n_rows:,} rows...")
+        paths = write_batch(directory, n_files, n_rows)
+        upload_files = [(os.path.basename(path), path) for path in paths]
+
+        # The ETL writes to data/silver relative to the working directory
+        os.chdir(directory)
+        try:
+            baseline = None
+            for workers in range(1, max_workers + 1):
+                start = time.perf_counter()
+                process_bronze_to_silver(upload_files, max_workers=workers)
+                elapsed = time.perf_counter() - start
+                baseline = baseline or elapsed
+                print(f"{workers:>3} workers | {elapsed:8.2f}s | speedup {baseline / elapsed:5.2f}x")
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=24)
+    parser.add_argument('--rows', type=int, default=200_000, help="Rows per file")
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    run(args.files, args.rows, args.max_workers)
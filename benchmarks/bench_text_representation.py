@@ -0,0 +1,68 @@
+"""
+Benchmark for the Gold layer text builder.
+
+Checks that build_text_representation matches the original row-wise f-string
+builder, then times both at the requested sizes.
+
+Usage:
+    python -m benchmarks.bench_text_representation --rows 1000000 10000000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.common import make_silver
+from src.etl import build_text_representation
+
+
+def create_text(row):
+    # Original row-wise builder, kept as the parity reference
+    text = f"Claim {row['claim_id']}: Patient {row['patient_name']} (ID: {row['patient_id']}) received {row['procedure']} for {row['diagnosis']} on {row['service_date']}. "
+    text += f"Amount: ${row['claim_amount']}. Status: {row['claim_status']}."
+    if row['claim_status'] == 'Denied':
+        text += f" Denial Reason: {row['denial_reason']}."
+    text += f" Specialty: {row['specialty']}."
+    return text
+
+
+def check_parity(n_rows=20000):
+    df = make_silver(n_rows)
+    # Exercise missing values the way custom uploads produce them
+    df.loc[df.index[::7], 'patient_name'] = None
+    df.loc[df.index[::11], 'claim_amount'] = np.nan
+    expected = df.apply(create_text, axis=1)
+    actual = build_text_representation(df)
+    mismatches = int((expected != actual).sum())
+    if mismatches:
+        raise AssertionError(f"{mismatches} of {n_rows} rows differ from the row-wise builder")
+    print(f"✅ Parity check passed on {n_rows} rows")
+
+
+def run(sizes, include_rowwise=True):
+    for n_rows in sizes:
+        df = make_silver(n_rows)
+
+        start = time.perf_counter()
+        build_text_representation(df)
+        vectorized = time.perf_counter() - start
+        line = f"{n_rows:>12,} rows | vectorized {vectorized:8.2f}s"
+
+        if include_rowwise:
+            start = time.perf_counter()
+            df.apply(create_text, axis=1)
+            rowwise = time.perf_counter() - start
+            line += f" | row-wise {rowwise:8.2f}s | speedup {rowwise / vectorized:5.1f}x"
+
+        print(line)
+        del df
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000_000, 10_000_000])
+    parser.add_argument('--skip-rowwise', action='store_true', help="Only time the vectorized builder")
+    args = parser.parse_args()
+
+    check_parity()
+    run(args.rows, include_rowwise=not args.skip_rowwise)
@@ -0,0 +1,31 @@
+"""
+Shared helpers for the benchmark scripts.
+"""
+import numpy as np
+import pandas as pd
+
+from generate_insurance_data import DIAGNOSES, PROCEDURES, SPECIALTIES, DENIAL_REASONS, FIRST_NAMES, LAST_NAMES
+
+
+def make_silver(n_rows, seed=42):
+    rng = np.random.default_rng(seed)
+    status = rng.choice(['Approved', 'Denied'], size=n_rows, p=[0.7, 0.3])
+    denial = np.where(status == 'Denied', rng.choice(DENIAL_REASONS, size=n_rows), '')
+    names = np.char.add(np.char.add(rng.choice(FIRST_NAMES, size=n_rows), ' '), rng.choice(LAST_NAMES, size=n_rows))
+    dates = np.datetime64('2024-01-01') + rng.integers(0, 366, size=n_rows)
+    df = pd.DataFrame({
+        'claim_id': np.char.add('BC', np.arange(10001, 10001 + n_rows).astype(str)),
+        'patient_id': np.char.add('P', rng.integers(1000, 9999, size=n_rows).astype(str)),
+        'patient_name': names,
+        'diagnosis': rng.choice(DIAGNOSES, size=n_rows),
+        'procedure': rng.choice(list(PROCEDURES.keys()), size=n_rows),
+        'claim_amount': rng.integers(50, 3000, size=n_rows),
+        'claim_status': status,
+        'denial_reason': denial,
+        'service_date': dates.astype(str),
+        'specialty': rng.choice(SPECIALTIES, size=n_rows),
+        'source': 'Company_1',
+    }, dtype=object)
+    # Silver frames hold object strings plus an integer amount
+    df['claim_amount'] = df['claim_amount'].astype('int64')
+    return df
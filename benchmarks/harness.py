@@ -0,0 +1,203 @@
+"""
+Minimal pytest-benchmark style timing harness for the benchmark scripts.
+
+A BenchmarkSession hands out `benchmark` objects that are called like the
+pytest-benchmark fixture:
+
+    result = benchmark(func, *args)                        # rounds x func(*args)
+    result = benchmark.pedantic(func, setup=setup, rounds=3)  # fresh state per round
+
+Results are saved in the same JSON layout as `pytest --benchmark-json`
+(machine_info, commit_info, benchmarks[].stats), so runs on the same machine can be
+compared across commits with compare_runs or with pytest-benchmark's own tooling.
+"""
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from importlib import metadata
+
+# Third-party packages whose versions are recorded with every run
+TRACKED_PACKAGES = ['numpy', 'pandas', 'pyarrow', 'duckdb', 'chromadb', 'sentence-transformers', 'faiss-cpu']
+
+# Commit info comes from the repository, whatever directory the benchmark runs in
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def machine_info() -> dict:
+    versions = {}
+    for package in TRACKED_PACKAGES:
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    return {
+        'node': platform.node(),
+        'processor': platform.processor() or platform.machine(),
+        'machine': platform.machine(),
+        'system': platform.system(),
+        'release': platform.release(),
+        'python_version': platform.python_version(),
+        'cpu_count': os.cpu_count(),
+        'packages': versions,
+    }
+
+
+def commit_info() -> dict:
+    def git(*args):
+        try:
+            return subprocess.run(['git', *args], cwd=REPO_ROOT, capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+    return {
+        'id': git('rev-parse', 'HEAD'),
+        'branch': git('rev-parse', '--abbrev-ref', 'HEAD'),
+        'dirty': bool(git('status', '--porcelain', '--untracked-files=no')),
+        'time': git('log', '-1', '--format=%cI'),
+    }
+
+
+def summarize(timings: list, iterations: int = 1) -> dict:
+    """
+    pytest-benchmark's stats for a list of per-round times (seconds per iteration).
+    """
+    ordered = sorted(timings)
+    mean = statistics.fmean(ordered)
+    q1, _, q3 = statistics.quantiles(ordered, n=4, method='inclusive') if len(ordered) > 1 else (ordered[0],) * 3
+    return {
+        'min': ordered[0],
+        'max': ordered[-1],
+        'mean': mean,
+        'stddev': statistics.stdev(ordered) if len(ordered) > 1 else 0.0,
+        'median': statistics.median(ordered),
+        'q1': q1,
+        'q3': q3,
+        'rounds': len(ordered),
+        'iterations': iterations,
+        'total': sum(ordered) * iterations,
+        'ops': 1 / mean if mean else 0.0,
+        'data': timings,
+    }
+
+
+class Benchmark:
+    """
+    Times one named measurement. Call it once, like the pytest-benchmark fixture.
+    """
+    def __init__(self, session, group: str, name: str, params: dict):
+        self.session = session
+        self.group = group
+        self.name = name
+        self.params = params
+        self.extra_info = {}
+
+    @property
+    def fullname(self) -> str:
+        params = ','.join(f"{key}={value}" for key, value in self.params.items())
+        return f"{self.group}::{self.name}[{params}]" if params else f"{self.group}::{self.name}"
+
+    def __call__(self, func, *args, **kwargs):
+        return self.pedantic(func, args=args, kwargs=kwargs, rounds=self.session.rounds, warmup_rounds=self.session.warmup_rounds)
+
+    def pedantic(self, func, args=(), kwargs=None, setup=None, teardown=None, rounds: int = 1,
+                 iterations: int = 1, warmup_rounds: int = 0):
+        """
+        Runs func rounds times (after warmup_rounds untimed ones) and records the timings.
+
+        Args:
+            setup: Called before every round, untimed. If it returns (args, kwargs),
+                   those are passed to func instead.
+            teardown: Called after every round with func's result, untimed.
+            iterations: Calls per round; the recorded time is per call.
+
+        Returns:
+            func's result from the last round.
+        """
+        timings = []
+        result = None
+        for round_index in range(warmup_rounds + rounds):
+            call_args, call_kwargs = args, kwargs or {}
+            if setup is not None:
+                prepared = setup()
+                if prepared is not None:
+                    call_args, call_kwargs = prepared
+            start = time.perf_counter()
+            for _ in range(iterations):
+                result = func(*call_args, **call_kwargs)
+            elapsed = (time.perf_counter() - start) / iterations
+            if teardown is not None:
+                teardown(result)
+            if round_index >= warmup_rounds:
+                timings.append(elapsed)
+
+        self.session.record(self, summarize(timings, iterations))
+        return result
+
+
+class BenchmarkSession:
+    """
+    Collects the results of every benchmark in one run.
+    """
+    def __init__(self, rounds: int = 3, warmup_rounds: int = 0):
+        self.rounds = rounds
+        self.warmup_rounds = warmup_rounds
+        self.benchmarks = []
+        self.started = datetime.datetime.now(datetime.timezone.utc)
+
+    def benchmark(self, group: str, name: str, **params) -> Benchmark:
+        return Benchmark(self, group, name, params)
+
+    def record(self, benchmark: Benchmark, stats: dict):
+        self.benchmarks.append({
+            'group': benchmark.group,
+            'name': benchmark.name,
+            'fullname': benchmark.fullname,
+            'params': benchmark.params,
+            'param': ','.join(map(str, benchmark.params.values())) or None,
+            'extra_info': benchmark.extra_info,
+            'stats': stats,
+        })
+        print(f"⏱️ {benchmark.fullname}: mean {stats['mean'] * 1000:.2f} ms over {stats['rounds']} rounds")
+
+    def to_dict(self) -> dict:
+        return {
+            'machine_info': machine_info(),
+            'commit_info': commit_info(),
+            'benchmarks': self.benchmarks,
+            'datetime': self.started.isoformat(),
+            'version': 'benchmarks.harness/1',
+        }
+
+    def save(self, path: str) -> str:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        return path
+
+    def print_table(self):
+        print(f"{'benchmark':<64} | {'min ms':>10} | {'mean ms':>10} | {'stddev':>8} | rounds")
+        for bench in self.benchmarks:
+            stats = bench['stats']
+            print(f"{bench['fullname']:<64} | {stats['min'] * 1000:10.2f} | {stats['mean'] * 1000:10.2f} | "
+                  f"{stats['stddev'] * 1000:8.2f} | {stats['rounds']}")
+
+
+def compare_runs(baseline: dict, current: dict, threshold: float = 0.10) -> list:
+    """
+    Mean time of every benchmark present in both runs, and whether it regressed by
+    more than threshold (a fraction, 0.10 = 10% slower).
+
+    Returns:
+        [(fullname, baseline mean, current mean, relative change, regressed)]
+    """
+    before = {bench['fullname']: bench['stats']['mean'] for bench in baseline['benchmarks']}
+    rows = []
+    for bench in current['benchmarks']:
+        if bench['fullname'] in before:
+            old, new = before[bench['fullname']], bench['stats']['mean']
+            change = (new - old) / old if old else 0.0
+            rows.append((bench['fullname'], old, new, change, change > threshold))
+    return rows
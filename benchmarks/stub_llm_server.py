@@ -0,0 +1,104 @@
+"""
+Local stand-in for the Groq chat completions API, for tests and benchmarks.
+
+Serves canned answers on any path ending in /chat/completions, in both the regular
+and the streaming (server-sent events) format. Point the pipelines at it with:
+
+    python -m benchmarks.stub_llm_server --port 8765
+    GROQ_BASE_URL=http://127.0.0.1:8765 GROQ_API_KEY=stub streamlit run app.py
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STUB_SQL = "SELECT claim_status, COUNT(*) AS total_claims FROM claims GROUP BY claim_status"
+STUB_ANSWER = "Based on the retrieved claims, most denials cite missing prior authorization or missing documentation."
+
+
+def canned_reply(messages):
+    system = next((m['content'] for m in messages if m.get('role') == 'system'), '')
+    return STUB_SQL if 'SQL' in system else STUB_ANSWER
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # Seconds before the first token and between tokens, set by make_server
+    first_token_delay = 0.0
+    token_delay = 0.0
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self.send_error(404)
+            return
+
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+        reply = canned_reply(body.get('messages', []))
+        model = body.get('model', 'stub')
+        base = {'id': 'stub', 'created': int(time.time()), 'model': model}
+        time.sleep(self.first_token_delay)
+
+        if not body.get('stream'):
+            payload = json.dumps({
+                **base,
+                'object': 'chat.completion',
+                'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': reply}, 'finish_reason': 'stop'}],
+                'usage': {'prompt_tokens': 0, 'completion_tokens': len(reply.split()), 'total_tokens': len(reply.split())},
+            }).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.end_headers()
+        tokens = [word + ' ' for word in reply.split(' ')]
+        tokens[-1] = tokens[-1].rstrip()
+        for i, token in enumerate(tokens):
+            if i:
+                time.sleep(self.token_delay)
+            self._send_event({**base, 'object': 'chat.completion.chunk',
+                              'choices': [{'index': 0, 'delta': {'content': token}, 'finish_reason': None}]})
+        self._send_event({**base, 'object': 'chat.completion.chunk',
+                          'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}]})
+        self.wfile.write(b'data: [DONE]\n\n')
+        self.wfile.flush()
+
+    def _send_event(self, data):
+        self.wfile.write(f"data: {json.dumps(data)}\n\n".encode())
+        self.wfile.flush()
+
+
+def make_server(port=0, first_token_delay=0.0, token_delay=0.0):
+    handler = type('ConfiguredStubHandler', (StubHandler,), {
+        'first_token_delay': first_token_delay,
+        'token_delay': token_delay,
+    })
+    return ThreadingHTTPServer(('127.0.0.1', port), handler)
+
+
+def start_in_background(port=0, **delays):
+    """
+    Starts the stub on a daemon thread. Returns (server, base_url) for GROQ_BASE_URL.
+    """
+    server = make_server(port, **delays)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--first-token-delay', type=float, default=0.0)
+    parser.add_argument('--token-delay', type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = make_server(args.port, args.first_token_delay, args.token_delay)
+    print(f"Stub LLM listening on http://127.0.0.1:{args.port}")
+    server.serve_forever()
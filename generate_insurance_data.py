@@ -1,11 +1,15 @@
+import argparse
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-import random
 
-# Set random seed for reproducibility
-np.random.seed(42)
-random.seed(42)
+# Records are generated and written this many at a time, so memory stays flat at any size
+# (a few hundred MB per worker process)
+CHUNK_SIZE = 250_000
+OUTPUT_FORMATS = ['csv', 'parquet']
 
 # Realistic data pools based on actual insurance standards
 DIAGNOSES = [
@@ -99,204 +103,297 @@ LAST_NAMES = [
     'Martin', 'Lee', 'Perez', 'Thompson', 'White', 'Harris'
 ]
 
-def generate_date(start_date, end_date):
-    """Generate random date between start and end"""
-    delta = end_date - start_date
-    random_days = random.randint(0, delta.days)
-    return start_date + timedelta(days=random_days)
 
-def generate_insurance_1_data(n_records=2500):
+# Claim amount range (inclusive) by procedure type; the first type named in a procedure wins
+AMOUNT_RANGES = {
+    'Office Visit': (100, 300),
+    'Lab': (50, 250),
+    'X-Ray': (200, 500),
+    'CT Scan': (800, 1500),
+    'MRI': (1200, 2500),
+    'EKG': (150, 300),
+    'Echocardiogram': (500, 1000),
+    'Physical Therapy': (100, 200),
+    'Emergency Room': (1000, 3000),
+    'Colonoscopy': (1500, 3000),
+    'Ultrasound': (300, 600),
+    'Prescription': (50, 500)
+}
+DEFAULT_AMOUNT_RANGE = (100, 500)
+
+PROCEDURE_NAMES = np.array(list(PROCEDURES.keys()), dtype=object)
+PROCEDURE_CODES = np.array(list(PROCEDURES.values()), dtype=object)
+PROCEDURE_AMOUNT_RANGES = np.array([
+    next((bounds for key, bounds in AMOUNT_RANGES.items() if key.lower() in name.lower()), DEFAULT_AMOUNT_RANGE)
+    for name in PROCEDURE_NAMES
+])
+
+# Lookup tables indexed by the drawn integers, so columns share a few string objects
+# instead of creating one per row
+DIAGNOSIS_NAMES = np.array(DIAGNOSES, dtype=object)
+DIAGNOSIS_ICD10_CODES = np.array([ICD10_CODES[diagnosis] for diagnosis in DIAGNOSES], dtype=object)
+
+# Every first/last name pair in each payer's format, indexed by first * len(LAST_NAMES) + last
+FULL_NAMES = np.array([f"{first} {last}" for first in FIRST_NAMES for last in LAST_NAMES], dtype=object)
+LAST_FIRST_NAMES = np.array([f"{last}, {first}" for first in FIRST_NAMES for last in LAST_NAMES], dtype=object)
+
+# Status values indexed by the approved flag
+CLAIM_STATUSES_1 = np.array(['Denied', 'Approved'], dtype=object)
+CLAIM_STATUSES_2 = np.array(['REJECTED', 'PAID'], dtype=object)
+
+# Every service date falls in 2024
+SERVICE_DAYS = pd.date_range('2024-01-01', '2024-12-31')
+
+def _choose(rng, values, n):
+    return np.asarray(values, dtype=object)[rng.integers(0, len(values), size=n)]
+
+def _prefixed(prefix, numbers, width=0):
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    # Arrow's string kernels are several times faster than np.char or a Python loop
+    digits = pc.cast(pa.array(numbers), pa.string())
+    if width:
+        digits = pc.utf8_lpad(digits, width, '0')
+    return pc.binary_join_element_wise(prefix, digits, '').to_numpy(zero_copy_only=False)
+
+def _common_fields(rng, n):
+    """
+    Draws the fields both payers share, one column at a time. Names and diagnoses are
+    returned as indexes into the lookup tables above.
+    """
+    diagnosis = rng.integers(0, len(DIAGNOSES), size=n)
+    procedure = rng.integers(0, len(PROCEDURE_NAMES), size=n)
+    low, high = PROCEDURE_AMOUNT_RANGES[procedure].T
+    # 70% approved, 30% denied
+    approved = rng.random(n) < 0.70
+    return {
+        'name': rng.integers(0, len(FIRST_NAMES), size=n) * len(LAST_NAMES) + rng.integers(0, len(LAST_NAMES), size=n),
+        'diagnosis': diagnosis,
+        'procedure_name': PROCEDURE_NAMES[procedure],
+        'procedure_code': PROCEDURE_CODES[procedure],
+        'amount': rng.integers(low, high + 1),
+        'approved': approved,
+        'denial_reason': _choose(rng, DENIAL_REASONS, n),
+        'service_day': rng.integers(0, len(SERVICE_DAYS), size=n),
+        'specialty': _choose(rng, SPECIALTIES, n),
+    }
+
+def generate_insurance_1_data(n_records=2500, seed=42, start=0):
     """
     Generate data for Insurance Company 1 (e.g., BlueCross BlueShield)
     Schema: More detailed, includes ICD codes
+
+    Args:
+        seed: Seed (or sequence of seeds) for the NumPy generator.
+        start: Number of records generated before this batch, so claim ids continue.
     """
-    data = []
-    
-    start_date = datetime(2024, 1, 1)
-    end_date = datetime(2024, 12, 31)
-    
-    for i in range(n_records):
-        claim_id = f"BC{str(i+10001).zfill(6)}"
-        patient_id = f"P{str(random.randint(1000, 9999))}"
-        patient_name = f"{random.choice(FIRST_NAMES)} {random.choice(LAST_NAMES)}"
-        
-        diagnosis = random.choice(DIAGNOSES)
-        icd_code = ICD10_CODES[diagnosis]
-        
-        procedure_name = random.choice(list(PROCEDURES.keys()))
-        procedure_code = PROCEDURES[procedure_name]
-        
-        # Claim amounts vary by procedure type
-        base_amount = {
-            'Office Visit': random.randint(100, 300),
-            'Lab': random.randint(50, 250),
-            'X-Ray': random.randint(200, 500),
-            'CT Scan': random.randint(800, 1500),
-            'MRI': random.randint(1200, 2500),
-            'EKG': random.randint(150, 300),
-            'Echocardiogram': random.randint(500, 1000),
-            'Physical Therapy': random.randint(100, 200),
-            'Emergency Room': random.randint(1000, 3000),
-            'Colonoscopy': random.randint(1500, 3000),
-            'Ultrasound': random.randint(300, 600),
-            'Prescription': random.randint(50, 500)
-        }
-        
-        # Determine amount based on procedure
-        for key in base_amount:
-            if key.lower() in procedure_name.lower():
-                claim_amount = base_amount[key]
-                break
-        else:
-            claim_amount = random.randint(100, 500)
-        
-        # 70% approved, 30% denied
-        claim_status = random.choices(['Approved', 'Denied'], weights=[0.70, 0.30])[0]
-        denial_reason = random.choice(DENIAL_REASONS) if claim_status == 'Denied' else ''
-        
-        service_date = generate_date(start_date, end_date)
-        provider_specialty = random.choice(SPECIALTIES)
-        
+    rng = np.random.default_rng(seed)
+    fields = _common_fields(rng, n_records)
+    service_dates = np.asarray(SERVICE_DAYS.strftime('%Y-%m-%d'), dtype=object)
+
+    return pd.DataFrame({
+        'claim_id': _prefixed('BC', np.arange(start + 10001, start + 10001 + n_records), width=6),
+        'patient_id': _prefixed('P', rng.integers(1000, 10000, size=n_records)),
         # Insurance 1 specific fields
-        member_number = f"MEM{random.randint(100000, 999999)}"
-        
-        data.append({
-            'claim_id': claim_id,
-            'patient_id': patient_id,
-            'member_number': member_number,
-            'patient_name': patient_name,
-            'diagnosis': diagnosis,
-            'icd_code': icd_code,
-            'procedure_name': procedure_name,
-            'procedure_code': procedure_code,
-            'claim_amount': claim_amount,
-            'claim_status': claim_status,
-            'denial_reason': denial_reason,
-            'service_date': service_date.strftime('%Y-%m-%d'),
-            'provider_specialty': provider_specialty
-        })
-    
-    return pd.DataFrame(data)
-
-def generate_insurance_2_data(n_records=2500):
+        'member_number': _prefixed('MEM', rng.integers(100000, 1000000, size=n_records)),
+        'patient_name': FULL_NAMES[fields['name']],
+        'diagnosis': DIAGNOSIS_NAMES[fields['diagnosis']],
+        'icd_code': DIAGNOSIS_ICD10_CODES[fields['diagnosis']],
+        'procedure_name': fields['procedure_name'],
+        'procedure_code': fields['procedure_code'],
+        'claim_amount': fields['amount'],
+        'claim_status': CLAIM_STATUSES_1[fields['approved'].astype(np.intp)],
+        'denial_reason': np.where(fields['approved'], '', fields['denial_reason']),
+        'service_date': service_dates[fields['service_day']],
+        'provider_specialty': fields['specialty']
+    })
+
+def generate_insurance_2_data(n_records=2500, seed=43, start=0):
     """
     Generate data for Insurance Company 2 (e.g., Aetna)
     Schema: Different column names, no ICD codes, different date format
+
+    Args:
+        seed: Seed (or sequence of seeds) for the NumPy generator.
+        start: Number of records generated before this batch, so claim ids continue.
     """
-    data = []
-    
-    start_date = datetime(2024, 1, 1)
-    end_date = datetime(2024, 12, 31)
-    
-    for i in range(n_records):
+    rng = np.random.default_rng(seed)
+    fields = _common_fields(rng, n_records)
+    service_dates = np.asarray(SERVICE_DAYS.strftime('%m/%d/%Y'), dtype=object)
+
+    return pd.DataFrame({
         # Different claim ID format
-        claim_number = f"AET-{str(i+20001)}"
-        
+        'claim_number': _prefixed('AET-', np.arange(start + 20001, start + 20001 + n_records)),
         # Different patient ID format
-        subscriber_id = f"SUB{random.randint(10000, 99999)}"
-        
+        'subscriber_id': _prefixed('SUB', rng.integers(10000, 100000, size=n_records)),
         # Different name format (Last, First)
-        first = random.choice(FIRST_NAMES)
-        last = random.choice(LAST_NAMES)
-        patient_full_name = f"{last}, {first}"
-        
-        diagnosis = random.choice(DIAGNOSES)
-        
-        procedure_name = random.choice(list(PROCEDURES.keys()))
-        cpt_code = PROCEDURES[procedure_name]  # Different column name
-        
-        # Similar amount logic
-        base_amount = {
-            'Office Visit': random.randint(100, 300),
-            'Lab': random.randint(50, 250),
-            'X-Ray': random.randint(200, 500),
-            'CT Scan': random.randint(800, 1500),
-            'MRI': random.randint(1200, 2500),
-            'EKG': random.randint(150, 300),
-            'Echocardiogram': random.randint(500, 1000),
-            'Physical Therapy': random.randint(100, 200),
-            'Emergency Room': random.randint(1000, 3000),
-            'Colonoscopy': random.randint(1500, 3000),
-            'Ultrasound': random.randint(300, 600),
-            'Prescription': random.randint(50, 500)
-        }
-        
-        for key in base_amount:
-            if key.lower() in procedure_name.lower():
-                billed_amount = base_amount[key]  # Different column name
-                break
-        else:
-            billed_amount = random.randint(100, 500)
-        
+        'patient_full_name': LAST_FIRST_NAMES[fields['name']],
+        'diagnosis_description': DIAGNOSIS_NAMES[fields['diagnosis']],  # Different column name
+        'cpt_code': fields['procedure_code'],  # Different column name
+        'procedure_description': fields['procedure_name'],
+        'billed_amount': fields['amount'],  # Different column name
         # Different status values
-        status = random.choices(['PAID', 'REJECTED'], weights=[0.70, 0.30])[0]
-        rejection_code = random.choice(DENIAL_REASONS) if status == 'REJECTED' else None
-        
-        date_of_service = generate_date(start_date, end_date)
-        specialty = random.choice(SPECIALTIES)
-        
-        data.append({
-            'claim_number': claim_number,
-            'subscriber_id': subscriber_id,
-            'patient_full_name': patient_full_name,
-            'diagnosis_description': diagnosis,  # Different column name
-            'cpt_code': cpt_code,  # Different column name
-            'procedure_description': procedure_name,
-            'billed_amount': billed_amount,  # Different column name
-            'status': status,  # Different values
-            'rejection_code': rejection_code,  # Different column name
-            'date_of_service': date_of_service.strftime('%m/%d/%Y'),  # Different format
-            'specialty': specialty
-        })
-    
-    return pd.DataFrame(data)
+        'status': CLAIM_STATUSES_2[fields['approved'].astype(np.intp)],
+        'rejection_code': np.where(fields['approved'], None, fields['denial_reason']),  # Different column name
+        'date_of_service': service_dates[fields['service_day']],  # Different format
+        'specialty': fields['specialty']
+    })
+
+# Payer -> (generator, output file name without extension, status column)
+PAYERS = {
+    'insurance_1': (generate_insurance_1_data, 'insurance_company_1_claims', 'claim_status'),
+    'insurance_2': (generate_insurance_2_data, 'insurance_company_2_claims', 'status'),
+}
+
+def _arrow_schema(df):
+    import pyarrow as pa
+    # Explicit, so a chunk whose optional column is all null still matches the others
+    return pa.schema([(col, pa.int64() if df[col].dtype.kind == 'i' else pa.string()) for col in df.columns])
+
+def _csv_bytes(table, include_header):
+    """
+    The table as CSV, byte for byte what DataFrame.to_csv(index=False) writes: values
+    are quoted only when they contain a comma, quote or line break, and nulls are empty.
+    pyarrow's own writer can't do this, its 'needed' style quotes every string value.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    def quote(values):
+        needs_quotes = pc.match_substring_regex(values, '[,"\\r\\n]')
+        quoted = pc.binary_join_element_wise('"', pc.replace_substring(values, '"', '""'), '"', '')
+        return pc.if_else(needs_quotes, quoted, values)
+
+    fields = []
+    for column in table.columns:
+        values = pc.cast(column, pa.string())
+        if pa.types.is_string(column.type):
+            values = quote(values)
+        fields.append(pc.fill_null(values, ''))
+    lines = pc.binary_join_element_wise(*fields, ',')
+    body = pc.binary_join(pa.ListArray.from_arrays([0, len(lines)], lines.combine_chunks()), '\n')[0].as_py()
+    header = ','.join(quote(pa.array(table.column_names)).to_pylist()) + '\n' if include_header else ''
+    return (header + body + '\n').encode() if len(lines) else header.encode()
+
+def _generate_chunk(payer, chunk_index, start, n_records, seed, output_format):
+    """
+    Generates one chunk and serializes it for the writer. Module-level so it can run
+    in a worker process; the seed depends only on the chunk, so the output is the same
+    for any number of workers.
+
+    Returns:
+        (CSV bytes or Arrow table, {status: count}, first rows for the preview)
+    """
+    import pyarrow as pa
+
+    generate, _, status_column = PAYERS[payer]
+    df = generate(n_records, seed=[seed, list(PAYERS).index(payer), chunk_index], start=start)
+    counts = df[status_column].value_counts().to_dict()
+    table = pa.Table.from_pandas(df, schema=_arrow_schema(df), preserve_index=False)
+    if output_format == 'parquet':
+        return table, counts, df.head(2)
+    return _csv_bytes(table, include_header=chunk_index == 0), counts, df.head(2)
+
+def _ordered_chunks(tasks, workers):
+    """
+    Yields _generate_chunk results in task order. At most two chunks per worker are
+    in flight, so a slow disk doesn't let finished chunks pile up in memory.
+    """
+    if workers <= 1:
+        for task in tasks:
+            yield _generate_chunk(*task)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for task in tasks:
+            pending.append(executor.submit(_generate_chunk, *task))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def write_payer_data(payer, n_records, output_dir='.', output_format='csv', chunk_size=CHUNK_SIZE, max_workers=None, seed=42):
+    """
+    Generates n_records claims for a payer and streams them to one CSV or Parquet file.
+
+    Args:
+        payer: A key of PAYERS.
+        output_format: 'csv' or 'parquet'.
+        chunk_size: Records per chunk. Together with seed, fixes the generated data.
+        max_workers: Processes generating chunks. Defaults to one per CPU core.
+
+    Returns:
+        (path written, {status: count}, first rows for the preview)
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unsupported output format '{output_format}'. Choose from {OUTPUT_FORMATS}.")
+    _, file_stem, _ = PAYERS[payer]
+    path = os.path.join(output_dir, f"{file_stem}.{output_format}")
+    os.makedirs(output_dir, exist_ok=True)
+
+    tasks = [(payer, i, start, min(chunk_size, n_records - start), seed, output_format)
+             for i, start in enumerate(range(0, n_records, chunk_size))]
+    workers = min(max_workers or os.cpu_count() or 1, len(tasks))
+    totals, preview, writer = {}, None, None
+    try:
+        for i, (payload, counts, head) in enumerate(_ordered_chunks(tasks, workers)):
+            if output_format == 'parquet':
+                import pyarrow.parquet as pq
+                writer = writer or pq.ParquetWriter(path, payload.schema)
+                writer.write_table(payload)
+            else:
+                writer = writer or open(path, 'wb')
+                writer.write(payload)
+            for status, count in counts.items():
+                totals[status] = totals.get(status, 0) + count
+            preview = head if preview is None else preview
+            if len(tasks) > 1:
+                print(f"  ... {i + 1}/{len(tasks)} chunks written")
+    finally:
+        if writer is not None:
+            writer.close()
+    return path, totals, preview
 
 def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic claims for both insurance companies.")
+    parser.add_argument('--rows', type=int, default=2500, help="Records per insurance company")
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='csv')
+    parser.add_argument('--output-dir', default='.')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--workers', type=int, default=None, help="Processes generating chunks (default: one per CPU core)")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
     print("🏥 Generating Insurance Claims Data...")
     print("=" * 50)
-    
-    # Generate data for both insurance companies
-    print("\n📊 Generating Insurance Company 1 (BlueCross-style) data...")
-    df_insurance1 = generate_insurance_1_data(2500)
-    
-    print("📊 Generating Insurance Company 2 (Aetna-style) data...")
-    df_insurance2 = generate_insurance_2_data(2500)
-    
-    # Save to CSV
-    insurance1_file = 'insurance_company_1_claims.csv'
-    insurance2_file = 'insurance_company_2_claims.csv'
-    
-    df_insurance1.to_csv(insurance1_file, index=False)
-    df_insurance2.to_csv(insurance2_file, index=False)
-    
+
+    results = {}
+    for payer, label in [('insurance_1', 'Insurance Company 1 (BlueCross-style)'), ('insurance_2', 'Insurance Company 2 (Aetna-style)')]:
+        print(f"\n📊 Generating {label} data...")
+        results[payer] = write_payer_data(payer, args.rows, args.output_dir, args.format, args.chunk_size, args.workers, args.seed)
+
     print("\n✅ Data generation complete!")
     print("=" * 50)
     print(f"\n📁 Files created:")
-    print(f"   • {insurance1_file} ({len(df_insurance1)} records)")
-    print(f"   • {insurance2_file} ({len(df_insurance2)} records)")
-    
+    for path, totals, _ in results.values():
+        print(f"   • {path} ({sum(totals.values())} records)")
+
     print("\n📋 Schema Differences:")
-    print("\nInsurance 1 columns:")
-    print(f"   {list(df_insurance1.columns)}")
-    print("\nInsurance 2 columns:")
-    print(f"   {list(df_insurance2.columns)}")
-    
+    for payer, name in [('insurance_1', 'Insurance 1'), ('insurance_2', 'Insurance 2')]:
+        print(f"\n{name} columns:")
+        print(f"   {list(results[payer][2].columns)}")
+
     print("\n📊 Sample Data Preview:")
-    print("\n--- Insurance Company 1 (First 2 rows) ---")
-    print(df_insurance1.head(2).to_string())
-    
-    print("\n--- Insurance Company 2 (First 2 rows) ---")
-    print(df_insurance2.head(2).to_string())
-    
+    for payer, name in [('insurance_1', 'Insurance Company 1'), ('insurance_2', 'Insurance Company 2')]:
+        print(f"\n--- {name} (First 2 rows) ---")
+        print(results[payer][2].to_string())
+
     print("\n📈 Statistics:")
-    print(f"\nInsurance 1:")
-    print(f"   Approved: {len(df_insurance1[df_insurance1['claim_status']=='Approved'])}")
-    print(f"   Denied: {len(df_insurance1[df_insurance1['claim_status']=='Denied'])}")
-    
-    print(f"\nInsurance 2:")
-    print(f"   PAID: {len(df_insurance2[df_insurance2['status']=='PAID'])}")
-    print(f"   REJECTED: {len(df_insurance2[df_insurance2['status']=='REJECTED'])}")
+    for payer, name, statuses in [('insurance_1', 'Insurance 1', ['Approved', 'Denied']), ('insurance_2', 'Insurance 2', ['PAID', 'REJECTED'])]:
+        print(f"\n{name}:")
+        for status in statuses:
+            print(f"   {status}: {results[payer][1].get(status, 0)}")
 
 if __name__ == "__main__":
     main()
-
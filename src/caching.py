@@ -0,0 +1,167 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+class LRUCache:
+    """
+    Thread-safe in-process LRU cache with a per-entry time to live.
+    Pipelines are shared by every Streamlit session, so access is guarded by a lock.
+    """
+    def __init__(self, maxsize: int = 1024, ttl: float = 600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (self.ttl and time.monotonic() - entry[0] > self.ttl):
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries)}
+
+def normalize_query(text: str) -> str:
+    """
+    Cache key for a user question: case- and whitespace-insensitive.
+    """
+    return ' '.join(text.lower().split())
+
+def _literals(text: str) -> frozenset:
+    # Numbers, dates and quoted values change the meaning of a question even when
+    # the wording is nearly identical ("denied claims in 2023" vs "in 2024")
+    return frozenset(re.findall(r"\d[\d\-/.:]*|'[^']*'|\"[^\"]*\"", text.lower()))
+
+class SemanticCache:
+    """
+    Question -> answer cache that also matches paraphrases.
+    
+    An exact match on the normalized question is tried first. Otherwise the question
+    is embedded and compared by cosine similarity against every cached question; the
+    best match counts as a hit if it clears the threshold and mentions the same
+    numbers, dates and quoted values. Least recently used entries are evicted first.
+    If the embedding model can't be imported, the cache falls back to exact matches.
+    """
+    def __init__(self, embed, threshold: float = 0.9, maxsize: int = 1000):
+        """
+        Args:
+            embed: Function mapping a list of texts to an embedding matrix.
+            threshold: Minimum cosine similarity for a semantic hit; None disables
+                       semantic matching and keeps only the exact-match path.
+        """
+        self.embed = embed
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self.clear()
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    def clear(self):
+        with self._lock:
+            self._keys = []
+            self._values = []
+            self._literals = []
+            self._last_used = []
+            self._vectors = np.empty((0, 0), dtype=np.float32)
+            self._index = {}
+            self._tick = 0
+
+    def _embed(self, text: str) -> np.ndarray:
+        try:
+            vector = np.asarray(self.embed([text]), dtype=np.float32)[0]
+        except ImportError as e:
+            print(f"⚠️ Semantic cache disabled, keeping exact matches only: {e}")
+            self.threshold = None
+            return None
+        return vector / (np.linalg.norm(vector) or 1.0)
+
+    def get(self, question: str, default=None):
+        key = normalize_query(question)
+        with self._lock:
+            i = self._index.get(key)
+            if i is not None:
+                self.exact_hits += 1
+                return self._touch(i)
+            if self.threshold is None or not self._keys:
+                self.misses += 1
+                return default
+
+        vector = self._embed(key)
+        with self._lock:
+            if vector is not None and len(self._vectors):
+                literals = _literals(key)
+                scores = self._vectors @ vector
+                scores[[other != literals for other in self._literals]] = -np.inf
+                i = int(np.argmax(scores))
+                if scores[i] >= self.threshold:
+                    self.semantic_hits += 1
+                    return self._touch(i)
+            self.misses += 1
+            return default
+
+    def _touch(self, i):
+        self._tick += 1
+        self._last_used[i] = self._tick
+        return self._values[i]
+
+    def set(self, question: str, value):
+        key = normalize_query(question)
+        vector = self._embed(key) if self.threshold is not None else None
+        with self._lock:
+            if key in self._index:
+                i = self._index[key]
+                self._values[i] = value
+                self._touch(i)
+                return
+            if len(self._keys) >= self.maxsize:
+                self._evict(int(np.argmin(self._last_used)))
+
+            self._index[key] = len(self._keys)
+            self._keys.append(key)
+            self._values.append(value)
+            self._literals.append(_literals(key))
+            self._last_used.append(0)
+            self._touch(len(self._keys) - 1)
+            if vector is not None:
+                self._vectors = np.vstack([self._vectors.reshape(-1, len(vector)), vector])
+
+    def _evict(self, i):
+        for items in (self._keys, self._values, self._literals, self._last_used):
+            del items[i]
+        if len(self._vectors):
+            self._vectors = np.delete(self._vectors, i, axis=0)
+        self._index = {key: j for j, key in enumerate(self._keys)}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def stats(self) -> dict:
+        return {'exact_hits': self.exact_hits, 'semantic_hits': self.semantic_hits, 'misses': self.misses, 'size': len(self._keys)}
@@ -0,0 +1,156 @@
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+from src.tracing import current_span
+
+class QueryCancelled(Exception):
+    """
+    Raised when a query is interrupted by its timeout or by cancel().
+    """
+
+class CursorPool:
+    """
+    Pool of DuckDB cursors over one database, so concurrent sessions run their queries
+    in parallel instead of queueing on a single shared connection.
+
+    Each cursor is an independent connection to the same database and is used by one
+    session at a time. Queries are interrupted when they exceed the timeout, or when
+    their session starts another query or calls cancel() (the earlier result would
+    never be shown).
+    """
+    def __init__(self, con, size: int = 4, timeout: float = 30, checkout_timeout: float = 30):
+        """
+        Args:
+            con: DuckDB connection the cursors are created from.
+            size: Maximum number of queries running at once.
+            timeout: Seconds before a running query is interrupted; None disables.
+            checkout_timeout: Seconds to wait for a free cursor before giving up.
+        """
+        self.con = con
+        self.size = size
+        self.timeout = timeout
+        self.checkout_timeout = checkout_timeout
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        # session id -> cursor it is currently running a query on
+        self._active = {}
+        # id(cursor) -> why it was interrupted
+        self._cancelled = {}
+        # id(cursor) -> token of the query running on it, so a timer that fires late
+        # can't interrupt the cursor's next query
+        self._running = {}
+        self.queries = 0
+        self.timed_out = 0
+        self.cancelled = 0
+
+    def _acquire(self):
+        with self._lock:
+            if self._idle.empty() and self._created < self.size:
+                self._created += 1
+                return self.con.cursor()
+        try:
+            return self._idle.get(timeout=self.checkout_timeout)
+        except queue.Empty:
+            raise TimeoutError(f"All {self.size} database connections are busy, try again shortly.")
+
+    @contextmanager
+    def checkout(self, session_id=None):
+        """
+        Yields a cursor for the duration of one request. A session that already has a
+        query running gets it cancelled first.
+        """
+        if session_id is not None:
+            self.cancel(session_id, reason="superseded by a newer query")
+        start = time.perf_counter()
+        cursor = self._acquire()
+        # Time spent queueing for a cursor, on the span of the query that waited
+        span = current_span()
+        if span is not None:
+            span.set(pool_wait_ms=round((time.perf_counter() - start) * 1000, 2))
+        with self._lock:
+            if session_id is not None:
+                self._active[session_id] = cursor
+        try:
+            yield cursor
+        finally:
+            with self._lock:
+                if session_id is not None and self._active.get(session_id) is cursor:
+                    del self._active[session_id]
+                self._cancelled.pop(id(cursor), None)
+            self._idle.put(cursor)
+
+    def cancel(self, session_id, reason: str = "cancelled") -> bool:
+        """
+        Interrupts the query the session is running, if any.
+        """
+        with self._lock:
+            cursor = self._active.get(session_id)
+            if cursor is None:
+                return False
+            self._cancelled[id(cursor)] = reason
+            self.cancelled += 1
+            # Under the lock, so the cursor can't be returned to the pool in between
+            cursor.interrupt()
+        return True
+
+    def fetchdf(self, cursor, sql_query: str, timeout: float = None) -> pd.DataFrame:
+        """
+        Runs sql_query on a checked out cursor, interrupting it after timeout seconds.
+
+        Raises:
+            QueryCancelled: if the query timed out or was cancelled.
+        """
+        return self.run(cursor, sql_query, lambda executed: executed.fetchdf(), timeout)
+
+    def run(self, cursor, sql_query: str, fetch, timeout: float = None):
+        """
+        Like fetchdf, but returns fetch(cursor) after executing, so callers choose how
+        much of the result to read and in what form.
+        """
+        import duckdb
+
+        timeout = self.timeout if timeout is None else timeout
+        token = object()
+        with self._lock:
+            self.queries += 1
+            self._running[id(cursor)] = token
+        timer = None
+        if timeout:
+            timer = threading.Timer(timeout, self._expire, args=(cursor, timeout, token))
+            timer.daemon = True
+            timer.start()
+        try:
+            return fetch(cursor.execute(sql_query))
+        except duckdb.InterruptException:
+            with self._lock:
+                reason = self._cancelled.pop(id(cursor), "interrupted")
+            raise QueryCancelled(f"Query {reason}.")
+        finally:
+            if timer is not None:
+                timer.cancel()
+            # A timer already past cancel() sees the token gone and leaves the cursor alone
+            with self._lock:
+                self._running.pop(id(cursor), None)
+
+    def _expire(self, cursor, timeout, token):
+        with self._lock:
+            if self._running.get(id(cursor)) is not token:
+                return
+            self._cancelled.setdefault(id(cursor), f"timed out after {timeout:g}s")
+            self.timed_out += 1
+            cursor.interrupt()
+
+    def stats(self) -> dict:
+        return {
+            'size': self.size,
+            'open': self._created,
+            'in_use': self._created - self._idle.qsize(),
+            'queries': self.queries,
+            'timed_out': self.timed_out,
+            'cancelled': self.cancelled,
+        }
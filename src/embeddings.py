@@ -0,0 +1,219 @@
+import json
+import os
+import re
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_MODEL = 'all-MiniLM-L6-v2'
+DEFAULT_CACHE_DIR = 'embedding_cache'
+
+def hash_texts(texts) -> np.ndarray:
+    """
+    Stable 64-bit hash of each text (same key on every run and machine).
+    """
+    return pd.util.hash_pandas_object(pd.Series(texts, dtype=object), index=False).to_numpy()
+
+class EmbeddingCache:
+    """
+    Disk-backed cache of embeddings for one model, keyed by text hash.
+    
+    Two append-only files per model directory: keys.u64 (one uint64 text hash per row)
+    and vectors.f32 (a float32 matrix, memory-mapped on read), plus meta.json with the
+    dimension, so reading the cache never needs the model. Vectors are appended before
+    keys, so a crash mid-write can leave extra vectors but never a key without one; the
+    extra bytes are cut off on load, before anything else is appended.
+    """
+    def __init__(self, directory: str, model_name: str, dim: int = None):
+        """
+        Args:
+            dim: Embedding dimension. Read from meta.json when omitted; a new cache
+                 learns it from the first embeddings added.
+        """
+        self.directory = os.path.join(directory, re.sub(r'[^A-Za-z0-9_.-]+', '_', model_name))
+        os.makedirs(self.directory, exist_ok=True)
+        self.keys_path = os.path.join(self.directory, 'keys.u64')
+        self.vectors_path = os.path.join(self.directory, 'vectors.f32')
+        self.meta_path = os.path.join(self.directory, 'meta.json')
+        self.dim = self._read_dim()
+        if self.dim is None and dim is not None:
+            self._write_dim(dim)
+        self._load()
+
+    def _read_dim(self):
+        try:
+            with open(self.meta_path) as f:
+                return int(json.load(f)['dim'])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _write_dim(self, dim: int):
+        tmp_path = f"{self.meta_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'dim': int(dim)}, f)
+        os.replace(tmp_path, self.meta_path)
+        self.dim = int(dim)
+
+    def _load(self):
+        keys = np.fromfile(self.keys_path, dtype=np.uint64) if os.path.exists(self.keys_path) else np.empty(0, dtype=np.uint64)
+        rows = os.path.getsize(self.vectors_path) // (4 * self.dim) if self.dim and os.path.exists(self.vectors_path) else 0
+        self.keys = keys[:rows]
+        # Drop orphan vectors (and any partial key) left by an interrupted add, so the
+        # next append lands on the row its key will point to
+        for path, size in [(self.keys_path, len(self.keys) * 8), (self.vectors_path, len(self.keys) * 4 * (self.dim or 0))]:
+            if os.path.exists(path) and os.path.getsize(path) > size:
+                os.truncate(path, size)
+        # Sorted view of the keys for vectorized lookups with searchsorted
+        self._order = np.argsort(self.keys, kind='stable')
+        self._sorted_keys = self.keys[self._order]
+        self._vectors = None
+
+    def __len__(self):
+        return len(self.keys)
+
+    @property
+    def vectors(self) -> np.ndarray:
+        if self._vectors is None and len(self.keys):
+            self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode='r', shape=(len(self.keys), self.dim))
+        return self._vectors
+
+    def lookup(self, hashes: np.ndarray):
+        """
+        Returns (hit mask, cache rows for the hits).
+        """
+        if not len(self.keys):
+            return np.zeros(len(hashes), dtype=bool), np.empty(0, dtype=np.int64)
+        pos = np.searchsorted(self._sorted_keys, hashes).clip(max=len(self._sorted_keys) - 1)
+        hit = self._sorted_keys[pos] == hashes
+        return hit, self._order[pos[hit]]
+
+    def add(self, hashes: np.ndarray, embeddings: np.ndarray):
+        hashes, first = np.unique(hashes, return_index=True)
+        embeddings = np.ascontiguousarray(embeddings[first], dtype=np.float32)
+        if self.dim is None:
+            self._write_dim(embeddings.shape[1])
+        with open(self.vectors_path, 'ab') as f:
+            embeddings.tofile(f)
+        with open(self.keys_path, 'ab') as f:
+            hashes.astype(np.uint64).tofile(f)
+
+        # Insert into the sorted view in place of a full re-sort on every batch
+        rows = np.arange(len(self.keys), len(self.keys) + len(hashes))
+        pos = np.searchsorted(self._sorted_keys, hashes)
+        self._sorted_keys = np.insert(self._sorted_keys, pos, hashes)
+        self._order = np.insert(self._order, pos, rows)
+        self.keys = np.concatenate([self.keys, hashes])
+        self._vectors = None
+
+class EmbeddingEngine:
+    """
+    Wraps a SentenceTransformer with an explicit batch size, optional multi-process
+    encoding across CPU cores and a persistent EmbeddingCache. Defaults can be set per
+    deployment through the EMBEDDING_BATCH_SIZE, EMBEDDING_WORKERS and
+    EMBEDDING_CACHE_DIR environment variables (an empty cache dir disables the cache).
+    """
+    def __init__(self, model_name: str = DEFAULT_MODEL, batch_size: int = None, num_workers: int = None, cache_dir: str = None):
+        self.model_name = model_name
+        self.batch_size = batch_size or int(os.getenv("EMBEDDING_BATCH_SIZE", 256))
+        self.num_workers = num_workers or int(os.getenv("EMBEDDING_WORKERS", 1))
+        self._model = None
+        self._pool = None
+
+        if cache_dir is None:
+            cache_dir = os.getenv("EMBEDDING_CACHE_DIR", DEFAULT_CACHE_DIR)
+        self.cache_dir = cache_dir
+        self._cache = None
+
+        # Running totals, so callers can report throughput
+        self.documents_encoded = 0
+        self.seconds_encoding = 0.0
+        self.cache_hits = 0
+
+    @property
+    def model(self):
+        """
+        The SentenceTransformer, loaded on first use; importing it pulls in torch.
+        """
+        if self._model is None:
+            from sentence_transformers import SentenceTransformer
+            self._model = SentenceTransformer(self.model_name)
+        return self._model
+
+    @property
+    def cache(self):
+        if self._cache is None and self.cache_dir:
+            cache = EmbeddingCache(self.cache_dir, self.model_name)
+            if cache.dim is None and os.path.exists(cache.keys_path):
+                # Written before the dimension was stored next to the cache
+                cache = EmbeddingCache(self.cache_dir, self.model_name, self.model.get_sentence_embedding_dimension())
+            self._cache = cache
+        return self._cache
+
+    @contextmanager
+    def workers(self):
+        """
+        Keeps a pool of encoder processes alive for the duration of the block.
+        Starting the pool is expensive, so open it once per ingest, not per batch.
+        """
+        if self.num_workers <= 1 or self._pool is not None:
+            yield self
+            return
+
+        print(f"⚙️ Starting {self.num_workers} embedding worker processes...")
+        self._pool = self.model.start_multi_process_pool(target_devices=['cpu'] * self.num_workers)
+        try:
+            yield self
+        finally:
+            self.model.stop_multi_process_pool(self._pool)
+            self._pool = None
+
+    def encode(self, texts: List[str], use_cache: bool = True) -> np.ndarray:
+        """
+        Returns float32 embeddings, shape (len(texts), dim). Texts already in the cache
+        are read from it; only the misses go through the model, and are then cached.
+        """
+        if self.cache is None or not use_cache:
+            return self._encode(texts)
+
+        hashes = hash_texts(texts)
+        hit, rows = self.cache.lookup(hashes)
+        self.cache_hits += int(hit.sum())
+        if hit.all() and len(texts):
+            return np.asarray(self.cache.vectors[rows])
+
+        misses = np.flatnonzero(~hit)
+        encoded = self._encode([texts[i] for i in misses])
+        if not hit.any():
+            self.cache.add(hashes, encoded)
+            return encoded
+        embeddings = np.empty((len(texts), encoded.shape[1]), dtype=np.float32)
+        embeddings[hit] = self.cache.vectors[rows]
+        embeddings[misses] = encoded
+        self.cache.add(hashes[misses], encoded)
+        return embeddings
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        start = time.perf_counter()
+        if self._pool is not None:
+            embeddings = self.model.encode_multi_process(texts, self._pool, batch_size=self.batch_size)
+        else:
+            embeddings = self.model.encode(texts, batch_size=self.batch_size)
+
+        self.seconds_encoding += time.perf_counter() - start
+        self.documents_encoded += len(texts)
+        return np.asarray(embeddings, dtype=np.float32)
+
+    @property
+    def documents_per_second(self) -> float:
+        return self.documents_encoded / self.seconds_encoding if self.seconds_encoding else 0.0
+
+@lru_cache(maxsize=None)
+def get_default_engine() -> EmbeddingEngine:
+    """
+    Process-wide engine, so both pipelines share one copy of the model in memory.
+    """
+    return EmbeddingEngine()
@@ -1,6 +1,16 @@
 import pandas as pd
+import numpy as np
 import os
+import shutil
+import io
+import hashlib
+import json
+import re
+from contextlib import ExitStack
 from datetime import datetime
+from urllib.parse import quote
+from concurrent.futures import ProcessPoolExecutor
+from difflib import SequenceMatcher
 
 def normalize_company_1(df):
     # Columns: claim_id, patient_id, member_number, patient_name, diagnosis, icd_code, procedure_name, procedure_code, claim_amount, claim_status, denial_reason, service_date, provider_specialty
@@ -37,121 +47,827 @@ def normalize_company_2(df):
     df_silver['source'] = 'Company_2'
     return df_silver
 
+# Custom uploads: column roles are inferred from the headers (and, for headers that
+# match nothing, from the values), then dates, amounts and statuses are converted to
+# the Silver formats. Headers are compared as lowercase letters and digits only.
+COLUMN_SYNONYMS = {
+    'claim_id': ['claimid', 'claimnumber', 'claimno', 'claimref', 'id'],
+    'patient_id': ['patientid', 'memberid', 'subscriberid', 'membernumber', 'memberno'],
+    'patient_name': ['patientname', 'patientfullname', 'membername', 'fullname', 'name'],
+    'diagnosis': ['diagnosis', 'diagnosisdescription', 'diagnosisname', 'dxdescription', 'dx', 'condition'],
+    'icd_code': ['icdcode', 'icd10code', 'icd10', 'diagnosiscode', 'dxcode'],
+    'procedure': ['procedure', 'procedurename', 'proceduredescription', 'treatment'],
+    'procedure_code': ['procedurecode', 'cptcode', 'cpt', 'hcpcscode'],
+    'claim_amount': ['claimamount', 'amount', 'billedamount', 'chargeamount', 'totalcharge', 'cost'],
+    'claim_status': ['claimstatus', 'status', 'adjudicationstatus', 'decision'],
+    'denial_reason': ['denialreason', 'reason', 'rejectioncode', 'rejectionreason', 'denialcode'],
+    'service_date': ['servicedate', 'dateofservice', 'date', 'dos'],
+    'specialty': ['specialty', 'speciality', 'providerspecialty', 'department'],
+}
+# Minimum similarity (difflib ratio) between a header and a synonym
+HEADER_MATCH_THRESHOLD = 0.8
+
+# Status spellings seen from payers, mapped to the Silver vocabulary
+STATUS_VOCABULARY = {
+    'approved': 'Approved', 'paid': 'Approved', 'accepted': 'Approved', 'allowed': 'Approved',
+    'denied': 'Denied', 'rejected': 'Denied', 'declined': 'Denied',
+    'pending': 'Pending', 'in review': 'Pending', 'submitted': 'Pending', 'on hold': 'Pending',
+}
+# Silver status for any value not in STATUS_VOCABULARY, so claim_status only ever
+# holds Approved, Denied, Pending or Other
+OTHER_STATUS = 'Other'
+# Tried in order, so ambiguous dates like 03/04/2024 are read month first
+DATE_FORMATS = ['%Y-%m-%d', '%m/%d/%Y', '%d/%m/%Y', '%Y/%m/%d', '%m-%d-%Y', '%d-%m-%Y', '%Y%m%d', '%d %b %Y', '%b %d, %Y']
+
+# Rows profiled per upload, and the share of them a column's values must match to be
+# recognized as dates or statuses
+PROFILE_SAMPLE_ROWS = 1000
+PROFILE_MATCH_RATE = 0.9
+
+# Inferred mappings by header signature, so later uploads from the same payer skip profiling
+SCHEMA_CACHE_PATH = 'data/schema_mappings.json'
+_schema_cache = {}
+
+def header_key(header):
+    return re.sub(r'[^a-z0-9]', '', str(header).lower())
+
+def schema_signature(columns):
+    """
+    Identifies an upload layout by its headers, in order.
+    """
+    return hashlib.sha256('\x1f'.join(header_key(col) for col in columns).encode()).hexdigest()[:16]
+
+def match_headers(columns):
+    """
+    Assigns Silver column roles to headers by fuzzy match against COLUMN_SYNONYMS,
+    best matches first, so every role and every header is used at most once.
+    
+    Returns:
+        {header key: role} for the headers that matched.
+    """
+    scores = []
+    for key in map(header_key, columns):
+        for role, synonyms in COLUMN_SYNONYMS.items():
+            score = max(SequenceMatcher(None, key, synonym).ratio() for synonym in [header_key(role), *synonyms])
+            if score >= HEADER_MATCH_THRESHOLD:
+                scores.append((score, key, role))
+    
+    mapping = {}
+    for score, key, role in sorted(scores, key=lambda match: -match[0]):
+        if key not in mapping and role not in mapping.values():
+            mapping[key] = role
+    return mapping
+
+def _non_empty_text(values):
+    text = values.dropna().astype(str).str.strip()
+    return text[text != '']
+
+def date_parse_rate(values, date_format):
+    """
+    Share of the non-empty values that parse with date_format (1.0 if there are none).
+    """
+    text = _non_empty_text(values)
+    return pd.to_datetime(text, format=date_format, errors='coerce').notna().mean() if len(text) else 1.0
+
+def infer_date_format(values):
+    """
+    The DATE_FORMATS entry that parses the most values, or None if none reaches
+    PROFILE_MATCH_RATE.
+    """
+    text = _non_empty_text(values)
+    if text.empty:
+        return None
+    rates = [(date_parse_rate(text, fmt), fmt) for fmt in DATE_FORMATS]
+    rate, fmt = max(rates, key=lambda rate_fmt: rate_fmt[0])
+    return fmt if rate >= PROFILE_MATCH_RATE else None
+
+def status_coverage(values):
+    text = _non_empty_text(values)
+    return text.str.lower().isin(STATUS_VOCABULARY).mean() if len(text) else 0.0
+
+def infer_schema(df):
+    """
+    Profiles a sample of an upload: header matches first, then dates and statuses
+    recognized from the values of columns whose headers matched nothing.
+    
+    Returns:
+        {'columns': {header key: role}, 'date_format': str or None}
+    """
+    sample = df.sample(PROFILE_SAMPLE_ROWS, random_state=0) if len(df) > PROFILE_SAMPLE_ROWS else df
+    mapping = match_headers(df.columns)
+    
+    for col in [col for col in df.columns if header_key(col) not in mapping]:
+        values = sample[col]
+        # Numeric columns (member numbers...) can look like %Y%m%d dates
+        if 'service_date' not in mapping.values() and not pd.api.types.is_numeric_dtype(values) and infer_date_format(values):
+            mapping[header_key(col)] = 'service_date'
+        elif 'claim_status' not in mapping.values() and status_coverage(values) >= PROFILE_MATCH_RATE:
+            mapping[header_key(col)] = 'claim_status'
+    
+    date_column = next((col for col in df.columns if mapping.get(header_key(col)) == 'service_date'), None)
+    date_format = None
+    if date_column is not None and not pd.api.types.is_datetime64_any_dtype(df[date_column]):
+        date_format = infer_date_format(sample[date_column])
+    return {'columns': mapping, 'date_format': date_format}
+
+def schema_fits(df, schema):
+    """
+    Whether a cached schema still reads df's dates: a payer can change its date format
+    without changing its headers.
+    """
+    if not schema['date_format']:
+        return True
+    date_column = next((col for col in df.columns if schema['columns'].get(header_key(col)) == 'service_date'), None)
+    if date_column is None:
+        return True
+    sample = df[date_column].head(PROFILE_SAMPLE_ROWS)
+    return date_parse_rate(sample, schema['date_format']) >= PROFILE_MATCH_RATE
+
+def cached_schema(df):
+    """
+    The inferred schema for df's header signature, from memory, SCHEMA_CACHE_PATH, or
+    by profiling df (and then saved for the next upload with the same headers). A cached
+    schema whose date format no longer parses df's dates is profiled again.
+    """
+    signature = schema_signature(df.columns)
+    if signature not in _schema_cache:
+        _schema_cache.update(load_schema_cache())
+    if signature in _schema_cache and not schema_fits(df, _schema_cache[signature]):
+        print(f"🧭 Dates no longer match {_schema_cache[signature]['date_format']}, profiling the upload again.")
+        del _schema_cache[signature]
+    if signature not in _schema_cache:
+        schema = infer_schema(df)
+        print(f"🧭 Inferred columns: {', '.join(f'{key} -> {role}' for key, role in schema['columns'].items())}"
+              f" (dates: {schema['date_format'] or 'mixed'})")
+        _schema_cache[signature] = schema
+        save_schema_cache({**load_schema_cache(), signature: schema})
+    return _schema_cache[signature]
+
+def load_schema_cache(path=SCHEMA_CACHE_PATH):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_schema_cache(cache, path=SCHEMA_CACHE_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Uploads are normalized in several processes at once, so each writes its own temp file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def convert_distinct(values, convert):
+    """
+    Applies convert (Series -> Series) to the distinct values only and broadcasts the
+    results back, so a column with many repeats is parsed once per value, not per row.
+    """
+    codes, uniques = pd.factorize(values)
+    converted = convert(pd.Series(uniques)).reset_index(drop=True)
+    # Missing values have code -1, which reindexes to NaN
+    return pd.Series(converted.reindex(codes).to_numpy(), index=values.index)
+
+def parse_dates(values, date_format=None):
+    """
+    Dates as YYYY-MM-DD strings; unparseable values become NaN.
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.dt.strftime('%Y-%m-%d')
+    return convert_distinct(values, lambda text: pd.to_datetime(
+        text.astype(str), format=date_format or 'mixed', errors='coerce').dt.strftime('%Y-%m-%d'))
+
+def parse_amounts(values):
+    """
+    Amounts as floats, accepting currency symbols, thousands separators and
+    accounting-style negatives like (12.50).
+    """
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype('float64')
+    def parse(text):
+        text = text.astype(str).str.strip()
+        negative = text.str.startswith('-') | (text.str.startswith('(') & text.str.endswith(')'))
+        amounts = pd.to_numeric(text.str.replace(r'[^0-9.]', '', regex=True), errors='coerce')
+        return amounts.where(~negative, -amounts)
+    return convert_distinct(values, parse).astype('float64')
+
+def canonical_statuses(values):
+    """
+    Statuses mapped to STATUS_VOCABULARY; unknown statuses become OTHER_STATUS and
+    missing ones stay missing.
+    """
+    return convert_distinct(values, lambda text: text.astype(str).str.strip().str.lower().map(STATUS_VOCABULARY).fillna(OTHER_STATUS))
+
 def normalize_generic(df, source_name='Custom_Upload'):
     """
-    Attempts to normalize a generic CSV. 
-    Assumes columns might already be named correctly or close to it.
-    """
-    # Map common variations to standard names
-    column_map = {
-        'ClaimID': 'claim_id', 'Claim_ID': 'claim_id', 'ID': 'claim_id',
-        'PatientID': 'patient_id', 'Patient_ID': 'patient_id',
-        'PatientName': 'patient_name', 'Patient_Name': 'patient_name', 'Name': 'patient_name',
-        'Diagnosis': 'diagnosis', 'DiagnosisCode': 'icd_code',
-        'Procedure': 'procedure', 'ProcedureCode': 'procedure_code',
-        'Amount': 'claim_amount', 'ClaimAmount': 'claim_amount', 'Cost': 'claim_amount',
-        'Status': 'claim_status', 'ClaimStatus': 'claim_status',
-        'Reason': 'denial_reason', 'DenialReason': 'denial_reason',
-        'Date': 'service_date', 'ServiceDate': 'service_date', 'DateOfService': 'service_date',
-        'Specialty': 'specialty', 'ProviderSpecialty': 'specialty'
-    }
+    Normalizes an upload in any layout: columns are renamed to their inferred Silver
+    roles (see cached_schema) and dates and amounts converted to the Silver formats.
+    Statuses are made canonical for every source in conform_to_silver.
+    """
+    schema = cached_schema(df)
+    roles = schema['columns']
+    df_silver = df.rename(columns={col: roles[header_key(col)] for col in df.columns if header_key(col) in roles})
+    
+    if 'service_date' in df_silver.columns:
+        df_silver['service_date'] = parse_dates(df_silver['service_date'], schema['date_format'])
+    if 'claim_amount' in df_silver.columns:
+        df_silver['claim_amount'] = parse_amounts(df_silver['claim_amount'])
     
-    df_silver = df.rename(columns=column_map)
     df_silver['source'] = source_name
     return df_silver
 
-def process_bronze_to_silver(upload_files=None):
+SILVER_PATH = 'data/silver/claims_normalized.csv'
+GOLD_PATH = 'data/gold/claims_master.csv'
+
+# Parquet layers are directories of files partitioned by source and service month
+SILVER_PARQUET_PATH = 'data/silver/claims_normalized'
+GOLD_PARQUET_PATH = 'data/gold/claims_master'
+PARTITION_COLUMNS = ['source', 'service_month']
+CATEGORICAL_COLUMNS = ['diagnosis', 'procedure', 'claim_status', 'denial_reason', 'specialty']
+# Low-cardinality text held as pandas categoricals in memory. source is stored as a
+# Parquet partition instead of a dictionary column, so it's only listed here.
+CATEGORY_COLUMNS = [*CATEGORICAL_COLUMNS, 'source']
+OUTPUT_FORMATS = ['csv', 'parquet']
+
+# Default bronze inputs and the normalizer for each payer's schema
+BRONZE_FILES = [
+    ('data/bronze/insurance_company_1_claims.csv', normalize_company_1),
+    ('data/bronze/insurance_company_2_claims.csv', normalize_company_2),
+]
+
+# claim_amount is stored as DECIMAL(AMOUNT_PRECISION, AMOUNT_SCALE) in Parquet and DuckDB,
+# so amounts of MAX_AMOUNT or more can't be represented
+AMOUNT_PRECISION, AMOUNT_SCALE = 18, 2
+MAX_AMOUNT = 10 ** (AMOUNT_PRECISION - AMOUNT_SCALE)
+
+COMMON_COLUMNS = ['claim_id', 'patient_id', 'patient_name', 'diagnosis', 'procedure', 'claim_amount', 'claim_status', 'denial_reason', 'service_date', 'specialty', 'source']
+
+def conform_to_silver(df):
+    """
+    Selects the common Silver columns from a normalized frame, adding any that are missing,
+    and maps statuses to the canonical vocabulary, so they can be compared with plain
+    equality downstream.
+    """
+    for col in COMMON_COLUMNS:
+        if col not in df.columns:
+            df[col] = None
+    df_silver = df[COMMON_COLUMNS]
+    
+    # Fill NA denial reasons with empty string
+    return as_categorical(df_silver.assign(
+        denial_reason=df_silver['denial_reason'].fillna(''),
+        claim_status=canonical_statuses(df_silver['claim_status']),
+        claim_amount=storable_amounts(df_silver['claim_amount']),
+    ))
+
+def storable_amounts(values):
+    """
+    Amounts with those too large for the stored decimal type (usually mis-parsed IDs or
+    concatenated fields) emptied, so one bad row can't fail a Parquet write or DuckDB load.
+    """
+    too_large = pd.to_numeric(values, errors='coerce').abs() >= MAX_AMOUNT
+    if not too_large.any():
+        return values
+    print(f"⚠️ {too_large.sum()} claim amounts of {MAX_AMOUNT:,} or more can't be stored, leaving them empty.")
+    return values.where(~too_large)
+
+def as_categorical(df):
+    """
+    Converts the CATEGORY_COLUMNS present in df to categoricals: one small array of
+    distinct strings plus an integer code per row, instead of a Python string per row.
+    """
+    return df.assign(**{
+        col: _text_category(df[col]) for col in CATEGORY_COLUMNS
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype)
+    })
+
+def _text_category(values):
+    values = values.astype('category')
+    # Numeric codes become text too, so layers from different uploads can be combined
+    if values.cat.categories.dtype != object:
+        values = values.cat.rename_categories(values.cat.categories.astype(str))
+    return values
+
+def concat_layers(frames):
+    """
+    pd.concat for Silver/Gold frames that keeps categorical columns categorical. Plain
+    concat falls back to object strings unless every frame has the same categories, so
+    each one is recoded to the union of them first.
+    """
+    frames = [as_categorical(df) for df in frames]
+    for col in CATEGORY_COLUMNS:
+        if frames and all(col in df.columns for df in frames):
+            categories = pd.api.types.union_categoricals([df[col] for df in frames]).categories
+            frames = [df.assign(**{col: df[col].cat.set_categories(categories)}) for df in frames]
+    return pd.concat(frames, ignore_index=True)
+
+def to_arrow_table(df):
+    """
+    Converts a Silver/Gold frame to a typed Arrow table for the Parquet layers:
+    service_date as DATE, claim_amount as DECIMAL(18, 2), low-cardinality text as
+    dictionary-encoded columns, plus the service_month partition column.
     """
+    import pyarrow as pa
+    
+    service_date = pd.to_datetime(df['service_date'], errors='coerce')
+    df_typed = df.assign(
+        service_date=service_date,
+        claim_amount=pd.to_numeric(df['claim_amount'], errors='coerce').astype('float64'),
+        # Null partition values can't be read back as dictionaries, so bucket them explicitly
+        service_month=service_date.dt.strftime('%Y-%m').fillna('unknown'),
+        source=df['source'].astype(object).fillna('unknown').astype(str),
+    )
+    
+    table = pa.Table.from_pandas(df_typed, preserve_index=False)
+    types = {
+        'service_date': pa.date32(),
+        'claim_amount': pa.decimal128(AMOUNT_PRECISION, AMOUNT_SCALE),
+        **{col: pa.dictionary(pa.int32(), pa.string()) for col in CATEGORICAL_COLUMNS},
+    }
+    schema = pa.schema([
+        pa.field(field.name, types.get(field.name, pa.string() if field.type == pa.null() else field.type))
+        for field in table.schema
+    ])
+    return table.cast(schema)
+
+def save_layer(df, csv_path, parquet_path, output_format='csv', chunk_index=None):
+    """
+    Writes a Silver/Gold frame as a CSV file or as a partitioned Parquet dataset.
+    
     Args:
-        upload_files: List of tuples (filename, DataFrame) or None. 
-                      If None, loads default files from disk.
+        output_format: 'csv' or 'parquet'.
+        chunk_index: None writes the whole layer. 0, 1, ... append successive chunks,
+                     with chunk 0 replacing any previous output.
+    
+    Returns:
+        The path that was written.
     """
-    print("🔄 Processing Bronze to Silver...")
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unsupported output format '{output_format}'. Choose from {OUTPUT_FORMATS}.")
+    
+    if output_format == 'parquet':
+        import pyarrow.parquet as pq
+        
+        if not chunk_index and os.path.isdir(parquet_path):
+            shutil.rmtree(parquet_path)
+        pq.write_to_dataset(
+            to_arrow_table(df),
+            root_path=parquet_path,
+            partition_cols=PARTITION_COLUMNS,
+            basename_template=f"part-{chunk_index or 0}-{{i}}.parquet"
+        )
+        return parquet_path
+    
+    os.makedirs(os.path.dirname(csv_path), exist_ok=True)
+    first = not chunk_index
+    df.to_csv(csv_path, mode='w' if first else 'a', header=first, index=False)
+    return csv_path
+
+class PartitionedParquetWriter:
+    """
+    Writes a partitioned Parquet dataset chunk by chunk, keeping one open file per
+    partition, so a streamed layer has one file per partition rather than one per chunk
+    and partition. Directories follow the hive layout pq.write_to_dataset uses.
+    """
+    def __init__(self, root_path, partition_cols=PARTITION_COLUMNS):
+        self.root_path = root_path
+        self.partition_cols = partition_cols
+        self._writers = {}
+        if os.path.isdir(root_path):
+            shutil.rmtree(root_path)
+
+    def write(self, df):
+        import pyarrow.parquet as pq
+        
+        table = to_arrow_table(df)
+        keys = table.select(self.partition_cols).to_pandas()
+        for values, rows in keys.groupby(self.partition_cols, sort=False).indices.items():
+            part = table.take(rows).drop_columns(self.partition_cols)
+            writer = self._writers.get(values)
+            if writer is None:
+                directory = os.path.join(self.root_path, *(f"{col}={quote(str(value), safe='')}" for col, value in zip(self.partition_cols, values)))
+                os.makedirs(directory, exist_ok=True)
+                writer = self._writers[values] = pq.ParquetWriter(os.path.join(directory, 'part-0.parquet'), part.schema)
+            # Columns that were all empty in the first chunk were typed as strings
+            writer.write_table(part.cast(writer.schema))
+
+    def close(self):
+        for writer in self._writers.values():
+            writer.close()
+        self._writers = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def latest_layer_path(csv_path=GOLD_PATH, parquet_path=GOLD_PARQUET_PATH):
+    """
+    Returns whichever of the CSV file or Parquet dataset was written most recently, or None.
+    """
+    candidates = [path for path in (csv_path, parquet_path) if os.path.exists(path)]
+    if not candidates:
+        return None
+    return max(candidates, key=os.path.getmtime)
+
+def arrow_to_pandas(table) -> pd.DataFrame:
+    """
+    Arrow table as a DataFrame with DECIMAL columns as float64 and DATE columns as
+    datetime64, the same dtypes DuckDB's fetchdf returns, instead of Decimal and
+    datetime.date objects.
+    """
+    import pyarrow as pa
     
-    processed_dfs = []
+    for i, field in enumerate(table.schema):
+        if pa.types.is_decimal(field.type):
+            table = table.set_column(i, field.name, table.column(i).cast(pa.float64()))
+    return table.to_pandas(date_as_object=False)
+
+def load_layer(path, columns=None):
+    """
+    Reads a Silver/Gold layer from a CSV file or a partitioned Parquet dataset, with the
+    same dtypes from both: claim_amount as float64, service_date as datetime64 and
+    low-cardinality text columns as categoricals.
+    """
+    if os.path.isdir(path):
+        import pyarrow.parquet as pq
+        
+        df = arrow_to_pandas(pq.read_table(path, columns=columns))
+        if 'service_date' in df.columns:
+            df['service_date'] = df['service_date'].astype('datetime64[ns]')
+        if columns is None:
+            # service_month only exists as a partition directory, and partition columns
+            # are read last; put source back in its place
+            df = df.drop(columns='service_month', errors='ignore')
+            df = df[[col for col in COMMON_COLUMNS if col in df.columns] + [col for col in df.columns if col not in COMMON_COLUMNS]]
+        return as_categorical(df)
+    header = pd.read_csv(path, nrows=0).columns
+    wanted = [col for col in header if columns is None or col in columns]
+    dtypes = {col: 'category' for col in CATEGORY_COLUMNS if col in wanted}
+    if 'claim_amount' in wanted:
+        dtypes['claim_amount'] = 'float64'
+    dates = ['service_date'] if 'service_date' in wanted else None
+    return pd.read_csv(path, usecols=columns, dtype=dtypes, parse_dates=dates, date_format='%Y-%m-%d')
+
+MANIFEST_PATH = 'data/manifest.json'
+
+def load_manifest(path=MANIFEST_PATH):
+    """
+    Returns the ETL manifest: {input name: {hash, rows, sources, silver, gold, processed_at}}.
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def save_manifest(manifest, path=MANIFEST_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write to a temp file first so a crash never leaves a half-written manifest
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def file_hash(path, block_size=1 << 20):
+    """
+    SHA-256 of a file's contents, read in blocks so large bronze files aren't loaded whole.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def frame_hash(df):
+    """
+    SHA-256 of a DataFrame's column names and values, for uploads that never touch disk.
+    """
+    digest = hashlib.sha256(','.join(map(str, df.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+def merge_into_layer(df_delta, csv_path, parquet_path, output_format='csv'):
+    """
+    Upserts new or changed rows into an existing Silver/Gold layer, keyed on claim_id.
+    A changed claim takes the place of the row it replaces and new claims are appended,
+    so rows the delta doesn't touch keep their order. Every existing row from a source
+    present in the delta that the delta no longer has is removed, so claims removed from
+    a re-delivered file disappear from the layer.
     
+    Returns:
+        The path that was written.
+    """
+    existing_path = parquet_path if output_format == 'parquet' else csv_path
+    if not os.path.exists(existing_path):
+        return save_layer(df_delta, csv_path, parquet_path, output_format)
+    
+    if output_format == 'parquet':
+        df_existing = load_layer(existing_path)
+        # Same YYYY-MM-DD text as the normalized delta
+        df_existing['service_date'] = df_existing['service_date'].dt.strftime('%Y-%m-%d')
+    else:
+        # Read as text, so untouched rows are written back exactly as they were (491 stays 491)
+        df_existing = pd.read_csv(existing_path, dtype=str, keep_default_na=False, na_values=[''])
+    if 'claim_status' in df_existing.columns:
+        # Layers written before statuses were canonical are brought in line on the next merge
+        df_existing['claim_status'] = canonical_statuses(df_existing['claim_status'])
+    
+    existing_ids = df_existing['claim_id'].astype(str).to_numpy()
+    delta_ids = df_delta['claim_id'].astype(str)
+    replaced = pd.Series(existing_ids).isin(delta_ids).to_numpy()
+    removed = df_existing['source'].astype(str).isin(df_delta['source'].astype(str).unique()).to_numpy()
+    
+    # Delta rows go where the first row with their claim_id was, new claims after every existing row
+    first_position = pd.Series(np.arange(len(existing_ids)), index=existing_ids)
+    first_position = first_position[~first_position.index.duplicated()]
+    delta_position = delta_ids.map(first_position).to_numpy(dtype='float64')
+    new = np.isnan(delta_position)
+    delta_position[new] = len(existing_ids) + np.arange(new.sum())
+    
+    kept = ~(replaced | removed)
+    df_merged = concat_layers([df_existing[kept], df_delta])
+    order = np.argsort(np.concatenate([np.flatnonzero(kept), delta_position]), kind='stable')
+    
+    # Partition columns are derived again on write
+    return save_layer(df_merged.iloc[order][list(df_delta.columns)], csv_path, parquet_path, output_format)
+
+def _read_bronze(data):
+    # Uploads arrive as DataFrames, raw bytes or file paths (CSV, or Parquet from generate_insurance_data.py)
+    if isinstance(data, pd.DataFrame):
+        return data
+    if isinstance(data, bytes):
+        return pd.read_csv(io.BytesIO(data))
+    if str(data).endswith('.parquet'):
+        return pd.read_parquet(data)
+    return pd.read_csv(data)
+
+def _content_hash(data):
+    if isinstance(data, pd.DataFrame):
+        return frame_hash(data)
+    if isinstance(data, bytes):
+        return hashlib.sha256(data).hexdigest()
+    return file_hash(data)
+
+def _parse_and_normalize(data, normalize, source_name=None):
+    """
+    Parses one bronze input and normalizes it to the Silver columns.
+    Module-level so it can run in a worker process.
+    """
+    df = _read_bronze(data)
+    df_norm = normalize(df) if source_name is None else normalize(df, source_name=source_name)
+    return conform_to_silver(df_norm)
+
+def _bronze_inputs(upload_files=None):
+    """
+    Yields (name, content hash, task) for every bronze input, where task is the
+    picklable (data, normalizer, source_name) arguments for _parse_and_normalize.
+    """
     if upload_files:
-        # Process uploaded files
-        for filename, df in upload_files:
-            print(f"Processing uploaded file: {filename}")
+        for filename, data in upload_files:
             # Simple heuristic to decide normalization or just generic
             # In a real app, user might map columns. Here we try generic.
-            df_norm = normalize_generic(df, source_name=filename)
-            processed_dfs.append(df_norm)
+            yield filename, _content_hash(data), (data, normalize_generic, filename)
     else:
         # Load Default Bronze Data
-        try:
-            df1 = pd.read_csv('data/bronze/insurance_company_1_claims.csv')
-            processed_dfs.append(normalize_company_1(df1))
-        except FileNotFoundError:
-            print("Warning: Default Company 1 data not found.")
-
-        try:
-            df2 = pd.read_csv('data/bronze/insurance_company_2_claims.csv')
-            processed_dfs.append(normalize_company_2(df2))
-        except FileNotFoundError:
-            print("Warning: Default Company 2 data not found.")
+        for path, normalize in BRONZE_FILES:
+            if not os.path.exists(path):
+                print(f"Warning: Default bronze file {path} not found.")
+                continue
+            yield path, file_hash(path), (path, normalize, None)
+
+def _run_tasks(tasks, max_workers=None):
+    """
+    Runs _parse_and_normalize over tasks, on a process pool when there is more than one
+    task and worker. Results come back in task order, so the merged output is deterministic.
+    """
+    workers = min(max_workers or os.cpu_count() or 1, len(tasks))
+    if workers <= 1:
+        return [_parse_and_normalize(*task) for task in tasks]
+    
+    print(f"⚙️ Normalizing {len(tasks)} files on {workers} worker processes...")
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_parse_and_normalize, *zip(*tasks)))
+
+def process_bronze_to_silver(upload_files=None, output_format='csv', incremental=False, max_workers=None):
+    """
+    Args:
+        upload_files: List of tuples (filename, data) or None, where data is a DataFrame,
+                      raw CSV bytes or a file path. If None, loads default files from disk.
+        output_format: 'csv' or 'parquet'.
+        incremental: If True, skip inputs whose content hash matches the manifest and
+                     merge the rest into the existing Silver layer. The returned frame
+                     then holds only the new or changed rows.
+        max_workers: Number of processes used to parse and normalize files.
+                     Defaults to one per CPU core; 1 runs everything in this process.
+    """
+    print("🔄 Processing Bronze to Silver...")
+    
+    silver_path = SILVER_PARQUET_PATH if output_format == 'parquet' else SILVER_PATH
+    manifest = load_manifest() if incremental else {}
+    pending = []
+    
+    for name, content_hash, task in _bronze_inputs(upload_files):
+        entry = manifest.get(name)
+        if entry and entry['hash'] == content_hash and entry.get('silver') == silver_path and os.path.exists(silver_path):
+            print(f"⏭️ Skipping unchanged file: {name}")
+            continue
+        
+        print(f"Processing file: {name}")
+        pending.append((name, content_hash, task))
+    
+    processed_dfs = _run_tasks([task for _, _, task in pending], max_workers=max_workers)
+    for (name, content_hash, _), df_norm in zip(pending, processed_dfs):
+        manifest[name] = {
+            'hash': content_hash,
+            'rows': len(df_norm),
+            'sources': sorted(df_norm['source'].astype(str).unique().tolist()),
+            'silver': silver_path,
+            'processed_at': datetime.now().isoformat(timespec='seconds'),
+        }
     
     if not processed_dfs:
-        print("❌ No data to process.")
+        if incremental and manifest:
+            print("✅ No new or changed bronze files. Silver layer is up to date.")
+        else:
+            print("❌ No data to process.")
         return pd.DataFrame()
 
     # Combine
-    common_columns = ['claim_id', 'patient_id', 'patient_name', 'diagnosis', 'procedure', 'claim_amount', 'claim_status', 'denial_reason', 'service_date', 'specialty', 'source']
-    
-    final_dfs = []
-    for df in processed_dfs:
-        # Ensure all columns exist
-        for col in common_columns:
-            if col not in df.columns:
-                df[col] = None
-        final_dfs.append(df[common_columns])
-            
-    df_silver = pd.concat(final_dfs, ignore_index=True)
-    
-    # Fill NA denial reasons with empty string
-    df_silver['denial_reason'] = df_silver['denial_reason'].fillna('')
+    df_silver = concat_layers(processed_dfs)
     
     # Save Silver
-    os.makedirs('data/silver', exist_ok=True)
-    output_path = 'data/silver/claims_normalized.csv'
-    df_silver.to_csv(output_path, index=False)
-    print(f"✅ Silver data saved to {output_path} ({len(df_silver)} records)")
+    if incremental:
+        output_path = merge_into_layer(df_silver, SILVER_PATH, SILVER_PARQUET_PATH, output_format)
+        print(f"✅ Merged {len(df_silver)} new or changed records into {output_path}")
+    else:
+        output_path = save_layer(df_silver, SILVER_PATH, SILVER_PARQUET_PATH, output_format)
+        print(f"✅ Silver data saved to {output_path} ({len(df_silver)} records)")
+    save_manifest(manifest)
     return df_silver
 
-def process_silver_to_gold(df_silver):
+TEXT_COLUMNS = ['claim_id', 'patient_name', 'patient_id', 'procedure', 'diagnosis', 'service_date', 'claim_amount', 'claim_status']
+TEXT_TEMPLATE = "Claim {}: Patient {} (ID: {}) received {} for {} on {}. Amount: ${}. Status: {}."
+
+def build_text_representation(df):
+    """
+    Builds the RAG text for every claim, column-wise.
+    "Claim [ID]: Patient [Name] (ID: [ID]) received [Procedure] for [Diagnosis] on [Date]. Amount: $[Amount]. Status: [Status]. [Denial Reason: [Reason].] Specialty: [Specialty]."
+    The template is broadcast over whole columns as a NumPy ufunc, so values are
+    formatted exactly like the old per-row f-string but without a Python call per row.
+    """
+    denied = (df['claim_status'] == 'Denied').to_numpy(dtype=bool)
+    columns = [df[col].to_numpy(dtype=object) for col in TEXT_COLUMNS]
+    specialty = df['specialty'].to_numpy(dtype=object)
+    
+    text = np.empty(len(df), dtype=object)
+    for mask, template, extra in [
+        (~denied, TEXT_TEMPLATE + " Specialty: {}.", [specialty]),
+        (denied, TEXT_TEMPLATE + " Denial Reason: {}. Specialty: {}.", [df['denial_reason'].to_numpy(dtype=object), specialty]),
+    ]:
+        if mask.any():
+            fields = [col[mask] for col in columns + extra]
+            text[mask] = np.frompyfunc(template.format, len(fields), 1)(*fields)
+    
+    return pd.Series(text, index=df.index, dtype=object)
+
+def process_silver_to_gold(df_silver, output_format='csv', incremental=False):
+    """
+    Args:
+        df_silver: Silver frame, or only the new/changed Silver rows when incremental.
+        output_format: 'csv' or 'parquet'.
+        incremental: If True, merge the rows into the existing Gold layer instead of replacing it.
+    """
     print("\n🔄 Processing Silver to Gold...")
     
     if df_silver.empty:
-        print("❌ Silver dataframe is empty. Skipping Gold processing.")
+        if incremental:
+            print("✅ No new Silver records. Gold layer is up to date.")
+        else:
+            print("❌ Silver dataframe is empty. Skipping Gold processing.")
         return pd.DataFrame()
 
-    df_gold = df_silver.copy()
+    # Shallow copy: adding the text column must not touch the caller's frame,
+    # but there is no need to duplicate every Silver column in memory
+    df_gold = df_silver.copy(deep=False)
     
     # Create Text Representation for RAG
-    # "Claim [ID]: Patient [Name] (ID: [ID]) - [Procedure] for [Diagnosis]. Status: [Status]. Reason: [Reason]. Date: [Date]."
-    
-    def create_text(row):
-        text = f"Claim {row['claim_id']}: Patient {row['patient_name']} (ID: {row['patient_id']}) received {row['procedure']} for {row['diagnosis']} on {row['service_date']}. "
-        text += f"Amount: ${row['claim_amount']}. Status: {row['claim_status']}."
-        if row['claim_status'] == 'Denied':
-            text += f" Denial Reason: {row['denial_reason']}."
-        text += f" Specialty: {row['specialty']}."
-        return text
-
-    df_gold['text_representation'] = df_gold.apply(create_text, axis=1)
+    df_gold['text_representation'] = build_text_representation(df_gold)
     
     # Save Gold
-    os.makedirs('data/gold', exist_ok=True)
-    output_path = 'data/gold/claims_master.csv'
-    df_gold.to_csv(output_path, index=False)
-    print(f"✅ Gold data saved to {output_path}")
+    if incremental:
+        output_path = merge_into_layer(df_gold, GOLD_PATH, GOLD_PARQUET_PATH, output_format)
+        print(f"✅ Merged {len(df_gold)} new or changed records into {output_path}")
+    else:
+        output_path = save_layer(df_gold, GOLD_PATH, GOLD_PARQUET_PATH, output_format)
+        print(f"✅ Gold data saved to {output_path}")
+    
+    # Record where each bronze input's rows ended up
+    manifest = load_manifest()
+    sources = set(df_gold['source'].astype(str).unique())
+    for entry in manifest.values():
+        if sources.intersection(entry.get('sources', [])):
+            entry['gold'] = output_path
+    save_manifest(manifest)
     
     # Also save a sample for quick inspection
     print("\nSample Gold Data (Text Representation):")
     print(df_gold['text_representation'].head(2).values)
     return df_gold
 
+def iter_bronze_chunks(bronze_files=None, chunksize=100_000):
+    """
+    Reads bronze files (CSV, or Parquet from generate_insurance_data.py) in fixed-size
+    chunks and yields normalized Silver chunks.
+    
+    Args:
+        bronze_files: List of tuples (path, normalizer) or None for the default payer files.
+                      A normalizer of None falls back to normalize_generic.
+        chunksize: Number of bronze rows read per chunk.
+    """
+    for path, normalize in bronze_files or BRONZE_FILES:
+        if not os.path.exists(path):
+            print(f"Warning: Bronze file {path} not found.")
+            continue
+        
+        print(f"Streaming bronze file: {path}")
+        if str(path).endswith('.parquet'):
+            import pyarrow.parquet as pq
+            
+            chunks = (batch.to_pandas() for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize))
+        else:
+            chunks = pd.read_csv(path, chunksize=chunksize)
+        for chunk in chunks:
+            if normalize is None:
+                chunk = normalize_generic(chunk, source_name=os.path.basename(path))
+            else:
+                chunk = normalize(chunk)
+            yield conform_to_silver(chunk)
+
+def stream_bronze_to_gold(bronze_files=None, chunksize=100_000, output_format='csv'):
+    """
+    Streaming Bronze -> Silver -> Gold for inputs larger than memory.
+    Each normalized chunk is appended to the Silver and Gold outputs as soon as it
+    is ready, so peak memory is bounded by the chunk size, not the dataset size.
+    
+    Args:
+        bronze_files: List of tuples (path, normalizer) or None for the default payer files.
+        chunksize: Number of bronze rows read per chunk.
+        output_format: 'csv' or 'parquet'.
+    
+    Returns:
+        Number of records written.
+    """
+    print(f"🔄 Streaming Bronze to Gold in chunks of {chunksize} rows...")
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unsupported output format '{output_format}'. Choose from {OUTPUT_FORMATS}.")
+    
+    total = 0
+    silver_path, gold_path = (SILVER_PARQUET_PATH, GOLD_PARQUET_PATH) if output_format == 'parquet' else (SILVER_PATH, GOLD_PATH)
+    with ExitStack() as stack:
+        if output_format == 'parquet':
+            # Parquet partitions stay open across chunks; CSV chunks are appended with save_layer
+            silver_writer = stack.enter_context(PartitionedParquetWriter(SILVER_PARQUET_PATH))
+            gold_writer = stack.enter_context(PartitionedParquetWriter(GOLD_PARQUET_PATH))
+        
+        for chunk_index, chunk in enumerate(iter_bronze_chunks(bronze_files, chunksize=chunksize)):
+            if output_format == 'parquet':
+                silver_writer.write(chunk)
+            else:
+                # First chunk replaces the previous output, later ones append
+                save_layer(chunk, SILVER_PATH, SILVER_PARQUET_PATH, output_format, chunk_index=chunk_index)
+            
+            chunk['text_representation'] = build_text_representation(chunk)
+            if output_format == 'parquet':
+                gold_writer.write(chunk)
+            else:
+                save_layer(chunk, GOLD_PATH, GOLD_PARQUET_PATH, output_format, chunk_index=chunk_index)
+            
+            total += len(chunk)
+            print(f"  ... {total} records written")
+    
+    # Streaming rebuilds every layer, so per-file state from earlier runs no longer applies
+    save_manifest({})
+    
+    if total == 0:
+        print("❌ No data to process.")
+    else:
+        print(f"✅ Silver data saved to {silver_path} and Gold data saved to {gold_path} ({total} records)")
+    return total
+
 if __name__ == "__main__":
-    df_silver = process_bronze_to_silver()
-    process_silver_to_gold(df_silver)
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Run the Bronze -> Silver -> Gold ETL.")
+    parser.add_argument('--stream', action='store_true', help="Process bronze files in chunks instead of loading them whole")
+    parser.add_argument('--chunksize', type=int, default=100_000, help="Rows per chunk in streaming mode")
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='csv', help="Storage format for the Silver and Gold layers")
+    parser.add_argument('--incremental', action='store_true', help="Only process bronze files that changed since the last run")
+    parser.add_argument('--workers', type=int, default=None, help="Processes used to normalize bronze files (default: one per CPU core)")
+    args = parser.parse_args()
+    
+    if args.stream:
+        stream_bronze_to_gold(chunksize=args.chunksize, output_format=args.format)
+    else:
+        df_silver = process_bronze_to_silver(output_format=args.format, incremental=args.incremental, max_workers=args.workers)
+        process_silver_to_gold(df_silver, output_format=args.format, incremental=args.incremental)
@@ -0,0 +1,188 @@
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+TOKEN_PATTERN = r"[a-z0-9]+"
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'claim', 'claims', 'did', 'do', 'does', 'for', 'from',
+    'get', 'had', 'has', 'have', 'how', 'i', 'in', 'is', 'it', 'me', 'of', 'on', 'or', 'show', 'that', 'the',
+    'their', 'there', 'this', 'to', 'was', 'were', 'what', 'when', 'which', 'who', 'why', 'with',
+}
+
+# Question words that imply a claim_status value
+STATUS_SYNONYMS = {
+    'denied': 'denied', 'rejected': 'denied', 'declined': 'denied', 'denial': 'denied', 'denials': 'denied',
+    'approved': 'approved', 'accepted': 'approved', 'paid': 'approved',
+    'pending': 'pending',
+}
+
+MONTHS = {name: i for i, name in enumerate(
+    ['january', 'february', 'march', 'april', 'may', 'june', 'july', 'august', 'september', 'october', 'november', 'december'], 1)}
+MONTHS.update({name[:3]: i for name, i in list(MONTHS.items())})
+
+_NUMBER = r"\$?\s?(\d[\d,]*(?:\.\d+)?)\s?(k)?"
+_AMOUNT_ABOVE = re.compile(rf"(?:over|above|more than|greater than|exceeding|at least|>=?)\s*{_NUMBER}")
+_AMOUNT_BELOW = re.compile(rf"(?:under|below|less than|at most|<=?)\s*{_NUMBER}")
+_AMOUNT_BETWEEN = re.compile(rf"between\s*{_NUMBER}\s*(?:and|-)\s*{_NUMBER}")
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in re.findall(TOKEN_PATTERN, text.lower()) if token not in STOPWORDS]
+
+def _is_amount(match) -> bool:
+    # "over 5 claims" is a count, "over $500" / "over 500 dollars" / "amount over 500" is an amount
+    text = match.string
+    window = text[max(0, match.start() - 12):match.end() + 8]
+    return '$' in match.group(0) or bool(re.search(r"amount|dollar|usd|cost|billed|worth", window))
+
+def _amount_spans(text: str) -> List[tuple]:
+    return [m.span() for pattern in (_AMOUNT_BETWEEN, _AMOUNT_ABOVE, _AMOUNT_BELOW)
+            for m in pattern.finditer(text) if _is_amount(m)]
+
+def _number(digits: str, thousands: Optional[str]) -> float:
+    return float(digits.replace(',', '')) * (1000 if thousands else 1)
+
+def _day(year: int, month: int = 1, day: int = 1) -> int:
+    return year * 10000 + month * 100 + day
+
+def _date_range(text: str):
+    """
+    (first day, last day) as YYYYMMDD ints for the period the question mentions, or None.
+    """
+    match = re.search(r"\b(20\d\d|19\d\d)-(\d\d)-(\d\d)\b", text)
+    if match:
+        day = _day(*map(int, match.groups()))
+        return day, day
+    match = re.search(r"\b(20\d\d|19\d\d)-(\d\d)\b", text)
+    if match:
+        year, month = map(int, match.groups())
+        return _day(year, month), _day(year, month, 31)
+    month_names = '|'.join(sorted(MONTHS, key=len, reverse=True))
+    match = re.search(rf"\b({month_names})\.?\s+(?:of\s+)?(20\d\d|19\d\d)\b", text)
+    if match:
+        month, year = MONTHS[match.group(1)], int(match.group(2))
+        return _day(year, month), _day(year, month, 31)
+    match = re.search(r"\b(20\d\d|19\d\d)\b", text)
+    if match:
+        year = int(match.group(1))
+        return _day(year), _day(year, 12, 31)
+    return None
+
+def plan_filters(query_text: str, vocabulary: Dict[str, List[str]]) -> Optional[Dict]:
+    """
+    Chroma `where` clause for the structured constraints in a question: claim status,
+    service date range, specialty, source and claim amount range.
+
+    Args:
+        vocabulary: Known values per metadata field ({'specialty': [...], ...}), so only
+                    values that exist in the data are filtered on.
+
+    Returns:
+        The where clause, or None if the question has no recognizable filter.
+    """
+    text = query_text.lower()
+    words = set(re.findall(TOKEN_PATTERN, text))
+    conditions = []
+
+    statuses = {STATUS_SYNONYMS[word] for word in words if word in STATUS_SYNONYMS}
+    if len(statuses) == 1:
+        status = statuses.pop()
+        known = {value.lower(): value for value in vocabulary.get('claim_status', [])}
+        if not known or status in known:
+            conditions.append({'claim_status': {'$eq': known.get(status, status.title())}})
+
+    for field in ('specialty', 'source'):
+        matches = [value for value in vocabulary.get(field, [])
+                   if re.search(rf"\b{re.escape(value.lower().replace('_', ' '))}\b", text.replace('_', ' '))]
+        if len(matches) == 1:
+            conditions.append({field: {'$eq': matches[0]}})
+        elif matches:
+            conditions.append({field: {'$in': matches}})
+
+    # Amounts aren't years: "over 2000 dollars" must not become a filter on the year 2000
+    dateless = text
+    for start, end in _amount_spans(text):
+        dateless = dateless[:start] + ' ' * (end - start) + dateless[end:]
+    period = _date_range(re.sub(r"\$\s?\d[\d,.]*", " ", dateless))
+    if period:
+        conditions += [{'service_day': {'$gte': period[0]}}, {'service_day': {'$lte': period[1]}}]
+
+    between = next((m for m in _AMOUNT_BETWEEN.finditer(text) if _is_amount(m)), None)
+    if between:
+        low, high = sorted([_number(*between.group(1, 2)), _number(*between.group(3, 4))])
+        conditions += [{'claim_amount': {'$gte': low}}, {'claim_amount': {'$lte': high}}]
+    else:
+        above = next((m for m in _AMOUNT_ABOVE.finditer(text) if _is_amount(m)), None)
+        below = next((m for m in _AMOUNT_BELOW.finditer(text) if _is_amount(m)), None)
+        if above:
+            conditions.append({'claim_amount': {'$gt': _number(*above.group(1, 2))}})
+        if below:
+            conditions.append({'claim_amount': {'$lt': _number(*below.group(1, 2))}})
+
+    if not conditions:
+        return None
+    return conditions[0] if len(conditions) == 1 else {'$and': conditions}
+
+class KeywordIndex:
+    """
+    BM25 term statistics for the collection, estimated from a sample of documents.
+    Scores are computed over the candidates of a query, not the whole collection.
+    """
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.n_docs = 0
+        self.avg_length = 1.0
+        self.doc_freq = {}
+
+    def fit(self, texts: pd.Series, sample_size: int = 50_000, seed: int = 0):
+        if len(texts) > sample_size:
+            texts = texts.sample(n=sample_size, random_state=seed)
+        tokens = texts.str.lower().str.findall(TOKEN_PATTERN)
+        self.n_docs = len(tokens)
+        self.avg_length = float(tokens.str.len().mean()) if len(tokens) else 1.0
+        self.doc_freq = tokens.map(set).explode().value_counts().to_dict()
+        return self
+
+    def idf(self, term: str) -> float:
+        df = self.doc_freq.get(term, 0)
+        return math.log(1 + (self.n_docs - df + 0.5) / (df + 0.5))
+
+    def rare_terms(self, query_text: str, limit: int = 2) -> List[str]:
+        """
+        The query's most selective terms, in their original casing for substring search.
+        """
+        seen = {}
+        for word in re.findall(r"[A-Za-z0-9]+", query_text):
+            lowered = word.lower()
+            if len(word) >= 3 and not word.isdigit() and lowered not in STOPWORDS and lowered not in STATUS_SYNONYMS and lowered not in MONTHS:
+                seen.setdefault(lowered, word)
+        ranked = sorted(seen, key=self.idf, reverse=True)
+        return [seen[term] for term in ranked[:limit]]
+
+    def score(self, query_text: str, documents: List[str]) -> np.ndarray:
+        terms = set(tokenize(query_text))
+        scores = np.zeros(len(documents))
+        if not terms:
+            return scores
+        for i, document in enumerate(documents):
+            tokens = re.findall(TOKEN_PATTERN, document.lower())
+            counts = Counter(token for token in tokens if token in terms)
+            norm = self.k1 * (1 - self.b + self.b * len(tokens) / self.avg_length)
+            scores[i] = sum(self.idf(term) * tf * (self.k1 + 1) / (tf + norm) for term, tf in counts.items())
+        return scores
+
+def reciprocal_rank_fusion(score_lists: List[np.ndarray], k: int = 60) -> np.ndarray:
+    """
+    Combines rankings (higher score = better) into one score per item; robust to the
+    lists being on different scales.
+    """
+    fused = np.zeros(len(score_lists[0]))
+    for scores in score_lists:
+        ranks = np.empty(len(scores))
+        ranks[np.argsort(-scores, kind='stable')] = np.arange(1, len(scores) + 1)
+        fused += 1.0 / (k + ranks)
+    return fused
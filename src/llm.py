@@ -0,0 +1,109 @@
+import asyncio
+import os
+import weakref
+from functools import lru_cache
+
+from dotenv import load_dotenv
+
+from src.tracing import start_span
+
+load_dotenv()
+
+MODEL_NAME = "llama-3.3-70b-versatile"
+
+# Event loop -> its AsyncGroq client, dropped along with the loop
+_async_clients = weakref.WeakKeyDictionary()
+
+def get_api_key():
+    api_key = os.getenv("GROQ_API_KEY")
+    if not api_key:
+        try:
+            import streamlit as st
+            api_key = st.secrets["GROQ_API_KEY"]
+        except:
+            pass
+    return api_key
+
+@lru_cache(maxsize=None)
+def get_client():
+    """
+    Shared Groq client, created on first use so importing the pipelines stays cheap.
+    """
+    from groq import Groq
+
+    api_key = get_api_key()
+    if not api_key:
+        # Fallback or error
+        print("⚠️ GROQ_API_KEY not found!")
+    return Groq(api_key=api_key)
+
+def get_async_client():
+    """
+    AsyncGroq client for the running event loop. Its connection pool is bound to the
+    loop it was first used on, so each loop gets one client, reused by every call on it.
+    Like the sync client it honours GROQ_BASE_URL, which lets tests point both at a
+    local stub server (see benchmarks/stub_llm_server.py).
+    """
+    from groq import AsyncGroq
+
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = AsyncGroq(api_key=get_api_key())
+    return client
+
+def usage_attributes(usage) -> dict:
+    """
+    Token counts from a completion's usage, as span attributes.
+    """
+    if usage is None:
+        return {}
+    return {'prompt_tokens': usage.prompt_tokens, 'completion_tokens': usage.completion_tokens}
+
+def _record_chunk(span, chunk, chunks: int):
+    if chunks == 1:
+        span.set(first_token_ms=round(span.elapsed_ms, 1))
+    # Groq reports usage on the last chunk of a stream
+    usage = getattr(getattr(chunk, 'x_groq', None), 'usage', None)
+    if usage is not None:
+        span.set(**usage_attributes(usage))
+
+def stream_completion(messages, **params):
+    """
+    Yields the completion's text as it arrives, token by token.
+    """
+    span = start_span("llm", model=MODEL_NAME, stream=True)
+    chunks = 0
+    stream = None
+    try:
+        stream = get_client().chat.completions.create(model=MODEL_NAME, messages=messages, stream=True, **params)
+        for chunk in stream:
+            _record_chunk(span, chunk, chunks := chunks + 1)
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    finally:
+        # Hands the connection back to the shared client's pool even if the caller stopped early
+        if stream is not None:
+            stream.close()
+        span.set(chunks=chunks)
+        span.end()
+
+async def astream_completion(messages, **params):
+    """
+    Async variant of stream_completion.
+    """
+    span = start_span("llm", model=MODEL_NAME, stream=True)
+    chunks = 0
+    stream = None
+    try:
+        stream = await get_async_client().chat.completions.create(model=MODEL_NAME, messages=messages, stream=True, **params)
+        async for chunk in stream:
+            _record_chunk(span, chunk, chunks := chunks + 1)
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    finally:
+        # Hands the connection back to the client's pool even if the caller stopped early
+        if stream is not None:
+            await stream.close()
+        span.set(chunks=chunks)
+        span.end()
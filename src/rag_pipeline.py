@@ -1,71 +1,423 @@
+import numpy as np
 import pandas as pd
-import chromadb
-from sentence_transformers import SentenceTransformer
 import os
-from typing import List, Dict
+import time
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Iterator, AsyncIterator, Tuple
+from src.etl import load_layer, latest_layer_path
+from src.embeddings import EmbeddingEngine, get_default_engine, hash_texts
+from src.caching import LRUCache, normalize_query
+from src.hybrid_search import KeywordIndex, plan_filters, reciprocal_rank_fusion
+from src.vector_index import INDEX_BACKENDS, QUANTIZED_INDEXES, hnsw_configuration, make_local_index, load_local_index, exact_rerank
+from src.llm import get_client, stream_completion, astream_completion, usage_attributes, MODEL_NAME
+from src.tracing import span
+
+ANSWER_TEMPERATURE = 0.1
+ANSWER_MAX_TOKENS = 500
+
+# Stays below Chroma's maximum batch size for a single add/upsert/delete call.
+# Also the number of documents embedded before each write, which bounds peak memory.
+UPSERT_BATCH_SIZE = 5000
+
+# Nearest-neighbour index used for vector search (see src/vector_index.py)
+INDEX_BACKEND = os.getenv("RAG_INDEX_BACKEND", "chroma")
+
+# The quantized backends keep full-precision vectors in their own on-disk file, so their
+# collection (a separate one, "<name>_docs") only holds documents and metadata. Chroma
+# needs an embedding per document; a 1-dimension placeholder with the smallest graph
+# keeps its vector segment at a few dozen bytes per document.
+PLACEHOLDER_EMBEDDING = [0.0]
+PLACEHOLDER_HNSW = {'M': 2, 'ef_construction': 2, 'ef_search': 2}
+
+# Bumped when the metadata stored with each document changes, so existing documents are re-upserted
+METADATA_VERSION = 2
+
+# Metadata fields whose distinct values the query planner can filter on
+FILTER_FIELDS = ['claim_status', 'specialty', 'source']
+
+def text_hashes(texts: pd.Series) -> pd.Series:
+    """
+    Content hash of each document text, used to detect changed claims between ingests.
+    """
+    return pd.Series(hash_texts(texts), index=texts.index).map('{:016x}'.format)
+
+def claim_metadata(batch: pd.DataFrame) -> List[Dict]:
+    """
+    Typed Chroma metadata for a batch of claims: claim_amount as a float and the
+    service date also as a YYYYMMDD int (service_day), so both support range filters.
+    Text fields stay strings, and missing values are left out.
+    """
+    meta = batch.drop(columns=['text_representation']).astype(object)
+    meta = meta.where(meta.notna(), None).apply(lambda col: col.map(lambda v: None if v is None else str(v)))
+    
+    amount = pd.to_numeric(batch['claim_amount'], errors='coerce')
+    dates = pd.to_datetime(batch['service_date'], errors='coerce')
+    meta['claim_amount'] = amount.astype(object).where(amount.notna(), None)
+    meta['service_date'] = dates.dt.strftime('%Y-%m-%d').where(dates.notna(), None)
+    day = dates.dt.year * 10000 + dates.dt.month * 100 + dates.dt.day
+    meta['service_day'] = day.astype('Int64').astype(object).where(dates.notna(), None)
+    meta['metadata_version'] = METADATA_VERSION
+    
+    return [
+        {k: (int(v) if k == 'service_day' else float(v) if k == 'claim_amount' else v) for k, v in record.items() if v is not None}
+        for record in meta.to_dict('records')
+    ]
 
 class RAGPipeline:
-    def __init__(self, collection_name="insurance_claims", persist_directory="chroma_db"):
-        self.client = chromadb.PersistentClient(path=persist_directory)
+    def __init__(self, collection_name="insurance_claims", persist_directory="chroma_db", embedder: EmbeddingEngine = None,
+                 query_cache_size: int = 1024, query_cache_ttl: float = 600, hybrid: bool = True, candidate_factor: int = 4,
+                 index_backend: str = INDEX_BACKEND, index_params: Dict = None):
+        """
+        Args:
+            index_backend: 'chroma' searches Chroma's HNSW index; 'numpy' (exact),
+                           'ivfpq' (FAISS, compressed), 'int8' and 'binary' (quantized)
+                           keep a local index next to the collection. For 'numpy' and
+                           'ivfpq' the collection still stores full-precision embeddings;
+                           'int8' and 'binary' keep them in a file read only to re-rank.
+            index_params: Backend knobs: M, ef_construction, ef_search for 'chroma';
+                          nlist, m, nbits, nprobe for 'ivfpq'; rerank_factor for 'int8'
+                          and 'binary' (candidates per result re-ranked at full precision).
+            hybrid: Filter on the status, dates, specialty, source and amounts a question
+                    mentions, and fuse BM25 keyword scores with vector similarity.
+            candidate_factor: Hybrid search re-ranks n_results * candidate_factor
+                              candidates from each of the vector and keyword searches.
+        """
+        # Chroma and the embedding model are loaded on first use, not at construction
+        self.persist_directory = persist_directory
         self.collection_name = collection_name
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
-        self.collection = self.client.get_or_create_collection(name=self.collection_name)
-        
-    def ingest(self, csv_path: str):
-        print(f"📥 Loading data from {csv_path}...")
-        df = pd.read_csv(csv_path)
-        
-        # Check if already indexed
-        if self.collection.count() > 0:
-            print(f"⚠️ Collection {self.collection_name} already has {self.collection.count()} documents. Skipping ingestion.")
-            return
-
-        documents = df['text_representation'].tolist()
-        ids = [str(i) for i in range(len(df))]
-        metadatas = df.drop(columns=['text_representation']).to_dict('records')
-        
-        # Convert all metadata values to strings to avoid ChromaDB issues with None/Int mix
-        for meta in metadatas:
-            for k, v in meta.items():
-                meta[k] = str(v)
-
-        print("🧠 Generating embeddings...")
-        embeddings = self.model.encode(documents).tolist()
-        
-        print("💾 Storing in Vector DB...")
-        self.collection.add(
-            documents=documents,
-            embeddings=embeddings,
-            metadatas=metadatas,
-            ids=ids
-        )
-        print(f"✅ Indexed {len(documents)} documents.")
+        self._embedder = embedder
+        self._collection = None
+        if index_backend not in INDEX_BACKENDS:
+            raise ValueError(f"Unknown index backend '{index_backend}', expected one of {INDEX_BACKENDS}")
+        self.index_backend = index_backend
+        self.index_params = index_params or {}
+        self._index = None
+        
+        # Repeated questions skip the model forward pass and the vector search.
+        # Query embeddings don't depend on the collection; results are cleared on every change.
+        self.query_embeddings = LRUCache(maxsize=query_cache_size, ttl=query_cache_ttl)
+        self.query_results = LRUCache(maxsize=query_cache_size, ttl=query_cache_ttl)
+        
+        self.hybrid = hybrid
+        self.candidate_factor = candidate_factor
+        # Filled from the data on every ingest
+        self.vocabulary = {}
+        self.keywords = KeywordIndex()
+        
+    @property
+    def embedder(self) -> EmbeddingEngine:
+        if self._embedder is None:
+            self._embedder = get_default_engine()
+        return self._embedder
+
+    @property
+    def collection(self):
+        if self._collection is None:
+            import chromadb
+            client = chromadb.PersistentClient(path=self.persist_directory)
+            if self.vectors_on_disk:
+                name, hnsw_params = f"{self.collection_name}_docs", PLACEHOLDER_HNSW
+            else:
+                name, hnsw_params = self.collection_name, self.index_params if self.index_backend == 'chroma' else {}
+            self._collection = client.get_or_create_collection(name=name, configuration=hnsw_configuration(**hnsw_params))
+            
+            # M and ef_construction are fixed when the collection is created, ef_search is not
+            ef_search = hnsw_params.get('ef_search')
+            if ef_search and self._collection.configuration['hnsw']['ef_search'] != ef_search:
+                self._collection.modify(configuration={'hnsw': {'ef_search': ef_search}})
+        return self._collection
+
+    @property
+    def vectors_on_disk(self) -> bool:
+        """
+        Whether full-precision embeddings live in the local index's vectors file
+        instead of the collection.
+        """
+        return self.index_backend in QUANTIZED_INDEXES
+
+    @property
+    def index(self):
+        """
+        Local nearest-neighbour index for the non-Chroma backends, loaded from disk or
+        rebuilt when it is missing or out of sync: from the collection's embeddings, or
+        by re-embedding its documents (mostly embedding cache hits) when they aren't there.
+        """
+        if self._index is None and self.index_backend != 'chroma':
+            params = dict(self.index_params, vectors_path=self._index_path()) if self.vectors_on_disk else self.index_params
+            index = load_local_index(self.index_backend, self._index_path(), **params)
+            if index is None or len(index) != self.collection.count():
+                print(f"🏗️ Building {self.index_backend} index from {self.collection.count()} stored documents...")
+                index = make_local_index(self.index_backend, **params)
+                include = ['documents'] if self.vectors_on_disk else ['embeddings']
+                offset = 0
+                while True:
+                    page = self.collection.get(include=include, limit=UPSERT_BATCH_SIZE, offset=offset)
+                    if page['ids']:
+                        embeddings = self.embedder.encode(page['documents']) if self.vectors_on_disk else page['embeddings']
+                        index.add(page['ids'], embeddings)
+                    if len(page['ids']) < UPSERT_BATCH_SIZE:
+                        break
+                    offset += UPSERT_BATCH_SIZE
+                index.save(self._index_path())
+            self._index = index
+        return self._index
+
+    def _index_path(self) -> str:
+        return os.path.join(self.persist_directory, f"{self.collection_name}.{self.index_backend}")
+
+    def ingest(self, data_path: str):
+        """
+        Incrementally syncs the collection with the Gold layer. Documents are keyed on
+        claim_id and carry a hash of their text, so only new or changed claims are
+        embedded and upserted, and claims no longer in the Gold layer are deleted.
+        
+        Returns:
+            Dict with the number of documents embedded and deleted, and embedding throughput.
+        """
+        print(f"📥 Loading data from {data_path}...")
+        df = load_layer(data_path)
+        
+        df['claim_id'] = df['claim_id'].astype(str)
+        if df['claim_id'].duplicated().any():
+            print(f"⚠️ {df['claim_id'].duplicated().sum()} duplicate claim_ids found, keeping the last occurrence.")
+            df = df.drop_duplicates(subset='claim_id', keep='last')
+        
+        df['text_hash'] = text_hashes(df['text_representation'])
+        self.vocabulary = {
+            field: sorted(df[field].dropna().astype(str).unique()) for field in FILTER_FIELDS if field in df.columns
+        }
+        self.keywords = KeywordIndex().fit(df['text_representation'].astype(str))
+        
+        indexed = self._indexed_hashes()
+        # Loaded (and checked against the collection) before the collection is changed,
+        # so an index that was in sync is updated in place instead of rebuilt
+        index = self.index
+        
+        stale_ids = list(indexed.keys() - set(df['claim_id']))
+        changed = df[df['claim_id'].map(indexed) != df['text_hash']]
+        
+        if stale_ids:
+            print(f"🗑️ Removing {len(stale_ids)} claims no longer in the data...")
+            for start in range(0, len(stale_ids), UPSERT_BATCH_SIZE):
+                self.collection.delete(ids=stale_ids[start:start + UPSERT_BATCH_SIZE])
+            if index is not None:
+                index.remove(stale_ids)
+            self.query_results.clear()
+        
+        if changed.empty:
+            if stale_ids and index is not None:
+                index.save(self._index_path())
+            print(f"✅ Collection {self.collection_name} is up to date ({self.collection.count()} documents).")
+            return {'embedded': 0, 'deleted': len(stale_ids), 'cache_hits': 0, 'seconds': 0.0, 'docs_per_sec': 0.0}
+
+        print(f"🧠 Embedding and storing {len(changed)} new or changed documents in batches of {UPSERT_BATCH_SIZE}...")
+        self.query_results.clear()
+        start_time = time.perf_counter()
+        hits_before = self.embedder.cache_hits
+        with self.embedder.workers():
+            # Each batch is written as soon as it is embedded, so only one batch of
+            # embeddings and metadata is held in memory at a time
+            for start in range(0, len(changed), UPSERT_BATCH_SIZE):
+                batch = changed.iloc[start:start + UPSERT_BATCH_SIZE]
+                documents = batch['text_representation'].tolist()
+                metadatas = claim_metadata(batch)
+                embeddings = self.embedder.encode(documents)
+                ids = batch['claim_id'].tolist()
+                
+                self.collection.upsert(
+                    documents=documents,
+                    embeddings=[PLACEHOLDER_EMBEDDING] * len(ids) if self.vectors_on_disk else embeddings,
+                    metadatas=metadatas,
+                    ids=ids
+                )
+                if index is not None:
+                    index.add(ids, embeddings)
+                print(f"  ... {min(start + UPSERT_BATCH_SIZE, len(changed))}/{len(changed)} documents indexed")
+        
+        if index is not None:
+            index.save(self._index_path())
+        
+        elapsed = time.perf_counter() - start_time
+        rate = len(changed) / elapsed if elapsed else 0.0
+        cache_hits = self.embedder.cache_hits - hits_before
+        print(f"✅ Indexed {len(changed)} documents in {elapsed:.1f}s ({rate:.0f} docs/s, {cache_hits} from embedding cache, {self.collection.count()} total).")
+        return {'embedded': len(changed), 'deleted': len(stale_ids), 'cache_hits': cache_hits, 'seconds': elapsed, 'docs_per_sec': rate}
+
+    def _indexed_hashes(self) -> Dict[str, str]:
+        """
+        Returns {id: text_hash} for everything in the collection, paging through it.
+        Documents indexed before content hashing or with older metadata map to None,
+        so they get replaced.
+        """
+        hashes = {}
+        offset = 0
+        while True:
+            page = self.collection.get(include=['metadatas'], limit=UPSERT_BATCH_SIZE, offset=offset)
+            for doc_id, meta in zip(page['ids'], page['metadatas']):
+                meta = meta or {}
+                hashes[doc_id] = meta.get('text_hash') if meta.get('metadata_version') == METADATA_VERSION else None
+            if len(page['ids']) < UPSERT_BATCH_SIZE:
+                return hashes
+            offset += UPSERT_BATCH_SIZE
 
     def query(self, query_text: str, n_results: int = 5) -> Dict:
+        """
+        Vector search for the query. Results are cached per normalized query text and
+        n_results; the returned dict is shared with the cache and must not be mutated.
+        """
         print(f"🔍 Querying RAG for: '{query_text}'")
-        query_embedding = self.model.encode([query_text]).tolist()
+        key = normalize_query(query_text)
         
-        results = self.collection.query(
-            query_embeddings=query_embedding,
-            n_results=n_results
-        )
+        with span("rag.query", n_results=n_results, hybrid=self.hybrid, backend=self.index_backend) as query_span:
+            results = self.query_results.get((key, n_results))
+            query_span.set(cache_hit=results is not None)
+            if results is not None:
+                return results
+            
+            with span("embed_query") as embed_span:
+                query_embedding = self.query_embeddings.get(key)
+                embed_span.set(cache_hit=query_embedding is not None)
+                if query_embedding is None:
+                    query_embedding = self.embedder.encode([query_text], use_cache=False)
+                    self.query_embeddings.set(key, query_embedding)
+            
+            if self.hybrid:
+                results = self._hybrid_query(query_text, query_embedding, n_results)
+            else:
+                results = self._vector_search(query_embedding, n_results)
+            query_span.set(rows=len(results['ids'][0]))
+            
+            self.query_results.set((key, n_results), results)
+            return results
+
+    def _vector_search(self, query_embedding, n_results: int, where: Dict = None,
+                       include: List[str] = ('documents', 'metadatas', 'distances')) -> Dict:
+        """
+        Nearest neighbours of one query embedding on the configured backend, in the
+        layout of collection.query. Local indexes apply `where` by restricting the
+        search to the ids Chroma matches. Quantized indexes return extra candidates,
+        re-ranked here by their full-precision embeddings (from the index's vectors file).
+        """
+        with span("vector_search", n_results=n_results, filtered=where is not None) as search_span:
+            results = self._search_backend(query_embedding, n_results, where, include)
+            search_span.set(rows=len(results['ids'][0]))
+            return results
+
+    def _search_backend(self, query_embedding, n_results: int, where: Dict, include: List[str]) -> Dict:
+        if self.index_backend == 'chroma':
+            return self.collection.query(query_embeddings=query_embedding, n_results=n_results, where=where, include=list(include))
+        
+        query_vector = np.asarray(query_embedding, dtype=np.float32)[0]
+        allowed_ids = self.collection.get(where=where, include=[])['ids'] if where else None
+        ids, distances = self.index.search(query_vector, n_results, allowed_ids)
+        fields = [field for field in include if field != 'distances']
+        rerank = getattr(self.index, 'rerank_factor', 1) > 1
+        fetch = fields + ['embeddings'] if rerank and 'embeddings' not in fields else fields
+        found = self._collection_get(ids=ids, include=fetch) if ids else {'ids': []}
+        if rerank and found['ids']:
+            ids, distances = exact_rerank(query_vector, found['ids'], found['embeddings'], n_results)
+        # collection.get doesn't keep the order of the ids it is given
+        position = {doc_id: i for i, doc_id in enumerate(found['ids'])}
+        hits = [(position[doc_id], float(distance)) for doc_id, distance in zip(ids, distances) if doc_id in position]
         
+        results = {'ids': [[found['ids'][i] for i, _ in hits]]}
+        for field in fields:
+            results[field] = [[found[field][i] for i, _ in hits]]
+        if 'distances' in include:
+            results['distances'] = [[distance for _, distance in hits]]
         return results
 
-    def generate_answer(self, query_text: str, context_results: Dict) -> str:
-        from groq import Groq
-        import os
-        
-        api_key = os.getenv("GROQ_API_KEY")
-        if not api_key:
-            try:
-                import streamlit as st
-                api_key = st.secrets["GROQ_API_KEY"]
-            except:
-                pass
-                
-        client = Groq(api_key=api_key)
+    def _collection_get(self, include: List[str], **kwargs) -> Dict:
+        """
+        collection.get, with embeddings read from the local index's vectors file when
+        the collection only holds placeholders.
+        """
+        if not (self.vectors_on_disk and 'embeddings' in include):
+            return self.collection.get(include=include, **kwargs)
+        found = self.collection.get(include=[field for field in include if field != 'embeddings'], **kwargs)
+        found['embeddings'] = self.index.full_vectors(found['ids'])
+        return found
+
+    def _hybrid_query(self, query_text: str, query_embedding, n_results: int) -> Dict:
+        """
+        Vector search restricted to the claims matching the question's filters, plus
+        claims containing its rarest terms, re-ranked by fusing cosine similarity with
+        BM25. Returns the same layout as collection.query, plus the 'where' used.
+        """
+        with span("plan_filters") as plan_span:
+            where = plan_filters(query_text, self.vocabulary)
+            plan_span.set(where=where)
+        n_candidates = n_results * self.candidate_factor
+        include = ['documents', 'metadatas', 'embeddings']
+        
+        candidates = self._vector_search(query_embedding, n_candidates, where, include)
+        if where and not candidates['ids'][0]:
+            # Filters nothing matches are more likely misread than meant
+            print(f"⚠️ No claims match {where}, searching without filters.")
+            where = None
+            candidates = self._vector_search(query_embedding, n_candidates, None, include)
         
+        ids = list(candidates['ids'][0])
+        documents = list(candidates['documents'][0])
+        metadatas = list(candidates['metadatas'][0])
+        embeddings = list(candidates['embeddings'][0])
+        seen = set(ids)
+        # Claims containing all of the rarest terms first (e.g. both parts of a name), then each alone
+        terms = self.keywords.rare_terms(query_text)
+        keyword_filters = [{'$contains': term} for term in terms]
+        if len(keyword_filters) > 1:
+            keyword_filters.insert(0, {'$and': list(keyword_filters)})
+        with span("keyword_search", terms=terms) as keyword_span:
+            for where_document in keyword_filters:
+                matches = self._collection_get(where=where, where_document=where_document, limit=n_candidates, include=include)
+                for doc_id, document, meta, embedding in zip(matches['ids'], matches['documents'], matches['metadatas'], matches['embeddings']):
+                    if doc_id not in seen:
+                        seen.add(doc_id)
+                        ids.append(doc_id)
+                        documents.append(document)
+                        metadatas.append(meta)
+                        embeddings.append(embedding)
+            keyword_span.set(rows=len(ids) - len(candidates['ids'][0]))
+        
+        if not ids:
+            return {'ids': [[]], 'documents': [[]], 'metadatas': [[]], 'distances': [[]], 'where': where}
+        
+        with span("rerank", candidates=len(ids)):
+            vectors = np.asarray(embeddings, dtype=np.float32)
+            query_vector = np.asarray(query_embedding, dtype=np.float32)[0]
+            similarity = vectors @ query_vector / (np.linalg.norm(vectors, axis=1) * np.linalg.norm(query_vector) + 1e-12)
+            fused = reciprocal_rank_fusion([similarity, self.keywords.score(query_text, documents)])
+            top = np.argsort(-fused, kind='stable')[:n_results]
+        
+        return {
+            'ids': [[ids[i] for i in top]],
+            'documents': [[documents[i] for i in top]],
+            'metadatas': [[metadatas[i] for i in top]],
+            'distances': [[float(1 - similarity[i]) for i in top]],
+            'where': where,
+        }
+
+    def cache_stats(self) -> Dict:
+        """
+        Hit/miss counters for the query embedding and retrieval result caches.
+        """
+        return {'query_embeddings': self.query_embeddings.stats(), 'query_results': self.query_results.stats()}
+
+    async def aquery(self, query_text: str, n_results: int = 5) -> Dict:
+        """
+        Runs query in a worker thread, so retrieval can overlap other async work.
+        """
+        return await asyncio.to_thread(self.query, query_text, n_results)
+
+    def _answer_messages(self, query_text: str, context_results: Dict) -> List[Dict]:
+        with span("build_prompt", documents=len(context_results['documents'][0])) as prompt_span:
+            messages = self._build_answer_messages(query_text, context_results)
+            prompt_span.set(chars=sum(len(message['content']) for message in messages))
+            return messages
+
+    def _build_answer_messages(self, query_text: str, context_results: Dict) -> List[Dict]:
         context_str = "\n\n".join(context_results['documents'][0])
         
         prompt = f"""
@@ -78,23 +430,65 @@ class RAGPipeline:
         Answer:
         """
         
-        completion = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant answering questions based on provided insurance claims data."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.1,
-            max_tokens=500
-        )
+        return [
+            {"role": "system", "content": "You are a helpful assistant answering questions based on provided insurance claims data."},
+            {"role": "user", "content": prompt}
+        ]
+
+    def generate_answer(self, query_text: str, context_results: Dict) -> str:
+        client = get_client()
+        messages = self._answer_messages(query_text, context_results)
+        
+        with span("llm", model=MODEL_NAME) as llm_span:
+            completion = client.chat.completions.create(
+                model=MODEL_NAME,
+                messages=messages,
+                temperature=ANSWER_TEMPERATURE,
+                max_tokens=ANSWER_MAX_TOKENS
+            )
+            llm_span.set(**usage_attributes(completion.usage))
         
         return completion.choices[0].message.content
 
+    async def agenerate_answer(self, query_text: str, context_results: Dict) -> AsyncIterator[str]:
+        """
+        Streams the answer token by token.
+        """
+        async for token in astream_completion(
+            self._answer_messages(query_text, context_results),
+            temperature=ANSWER_TEMPERATURE,
+            max_tokens=ANSWER_MAX_TOKENS
+        ):
+            yield token
+
+    def stream_answer(self, query_text: str, n_results: int = 5) -> Tuple[Dict, Iterator[str]]:
+        """
+        Retrieves context and starts streaming the answer.
+        Retrieval runs in a worker thread while the LLM client is prepared, so the first
+        token arrives as soon as possible.
+        
+        Returns:
+            (retrieval results, iterator over answer tokens)
+        """
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            # With a copy of this context, retrieval's spans join the caller's trace
+            retrieval = executor.submit(contextvars.copy_context().run, self.query, query_text, n_results)
+            get_client()
+            context_results = retrieval.result()
+        
+        tokens = stream_completion(
+            self._answer_messages(query_text, context_results),
+            temperature=ANSWER_TEMPERATURE,
+            max_tokens=ANSWER_MAX_TOKENS
+        )
+        return context_results, tokens
+
 if __name__ == "__main__":
     # Test
     rag = RAGPipeline()
-    if os.path.exists('data/gold/claims_master.csv'):
-        rag.ingest('data/gold/claims_master.csv')
+    gold_path = latest_layer_path()
+    if gold_path:
+        rag.ingest(gold_path)
         results = rag.query("denied claims for diabetes")
         print("Retrieval Results:", results)
         
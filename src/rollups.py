@@ -0,0 +1,89 @@
+import re
+from typing import Dict, List, Optional
+
+# Pre-aggregated tables built next to the claims table, one per common grouping.
+# Every rollup also keeps claim_status and service_month, so "denied claims for X
+# per month" style questions can be answered from a few thousand rows.
+ROLLUP_DIMENSIONS = ['claim_status', 'diagnosis', 'specialty', 'source', 'denial_reason']
+ROLLUP_MEASURES = {
+    'claim_count': 'COUNT(*)',
+    'total_amount': 'SUM(claim_amount)',
+}
+
+# Same format as the service_month partition column of the Parquet layer
+SERVICE_MONTH_SQL = "COALESCE(strftime(service_date, '%Y-%m'), 'unknown')"
+
+def rollup_keys(dimension: str) -> List[str]:
+    return list(dict.fromkeys([dimension, 'claim_status', 'service_month']))
+
+def rollup_name(table_name: str, dimension: str) -> str:
+    return f"{table_name}_by_{dimension}"
+
+def rollup_sql(table_name: str, dimension: str) -> str:
+    """
+    SELECT that builds the rollup of table_name by dimension.
+    """
+    keys = [SERVICE_MONTH_SQL + " AS service_month" if key == 'service_month' else key for key in rollup_keys(dimension)]
+    measures = [f"{expr} AS {name}" for name, expr in ROLLUP_MEASURES.items()]
+    return f"SELECT {', '.join(keys + measures)} FROM {table_name} GROUP BY ALL"
+
+def _strip_literals(sql: str) -> str:
+    return re.sub(r"'(?:[^']|'')*'", "''", sql)
+
+def rewrite_for_rollups(sql_query: str, table_name: str, table_columns: List[str], rollups: Dict[str, Dict]) -> Optional[str]:
+    """
+    Redirects a simple aggregate over table_name to the smallest rollup that can answer it.
+
+    Only single-table queries whose aggregates are COUNT(*) and SUM(claim_amount), and
+    whose other column references are all rollup keys that table_name also has, are
+    rewritten. Anything else (joins, subqueries, window functions, DISTINCT, other
+    aggregates) returns None and runs against the full table.
+
+    Args:
+        table_columns: Columns of table_name, used to find which ones the query references.
+        rollups: {rollup name: {'keys': [...], 'row_count': int}}
+
+    Returns:
+        The rewritten SQL, or None if the query is not eligible.
+    """
+    body = _strip_literals(sql_query)
+    lowered = body.lower()
+    if lowered.count('select') != 1 or re.search(r'\b(join|over|distinct|union|intersect|except|with)\b', lowered):
+        return None
+    if not re.search(rf'\bfrom\s+{table_name}\b', lowered) or re.search(r'\bfrom\s+\w+\s*,', lowered):
+        return None
+    # Measure names would be ambiguous with aliases the LLM chose
+    if any(re.search(rf'\b{name}\b', lowered) for name in ROLLUP_MEASURES):
+        return None
+
+    count_star = re.compile(r'\bcount\s*\(\s*\*\s*\)', re.IGNORECASE)
+    sum_amount = re.compile(r'\bsum\s*\(\s*(?:\w+\.)?claim_amount\s*\)', re.IGNORECASE)
+    if not (count_star.search(body) or sum_amount.search(body)):
+        return None
+
+    # Every remaining column reference must be a key of the rollup
+    remaining = sum_amount.sub('', count_star.sub('', lowered))
+    if re.search(r'\b(count|sum|avg|min|max|median|stddev\w*|var\w*|quantile\w*|list|string_agg|arg_\w+)\s*\(', remaining):
+        return None
+    # Keys derived for the rollups (service_month when the table is loaded from CSV) would
+    # let a query that fails on the table succeed on a rollup
+    derived_keys = {key for info in rollups.values() for key in info['keys']} - {col.lower() for col in table_columns}
+    if any(re.search(rf'\b{key}\b', remaining) for key in derived_keys):
+        return None
+    referenced = {col for col in table_columns if re.search(rf'\b{col.lower()}\b', remaining)}
+    candidates = [name for name, info in rollups.items() if referenced <= set(info['keys'])]
+    if not candidates:
+        return None
+    target = min(candidates, key=lambda name: rollups[name]['row_count'])
+
+    rewritten = count_star.sub('CAST(COALESCE(SUM(claim_count), 0) AS BIGINT)', sql_query)
+    rewritten = sum_amount.sub('SUM(total_amount)', rewritten)
+
+    # Keep the original name as the alias, so qualified references like claims.diagnosis still resolve
+    clause_words = r'where|group|order|limit|having|qualify|window|offset'
+    def retarget(match):
+        alias = match.group(2)
+        if alias and not re.fullmatch(clause_words, alias.strip().split()[-1], re.IGNORECASE):
+            return f"{match.group(1)}{target}{alias}"
+        return f"{match.group(1)}{target} AS {table_name}{alias or ''}"
+    return re.sub(rf'(\bfrom\s+){table_name}\b(\s+(?:as\s+)?\w+)?', retarget, rewritten, count=1, flags=re.IGNORECASE)
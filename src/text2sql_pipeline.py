@@ -1,41 +1,318 @@
-import duckdb
+import io
 import os
-from groq import Groq
-from dotenv import load_dotenv
+import re
+import threading
+import uuid
 import pandas as pd
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Iterator, AsyncIterator
+from src.etl import latest_layer_path, arrow_to_pandas, AMOUNT_PRECISION, AMOUNT_SCALE
+from src.llm import get_client, stream_completion, astream_completion, usage_attributes, MODEL_NAME
+from src.caching import SemanticCache
+from src.embeddings import get_default_engine
+from src.db_pool import CursorPool, QueryCancelled
+from src.tracing import span, current_span
+from src.rollups import ROLLUP_DIMENSIONS, ROLLUP_MEASURES, rollup_keys, rollup_name, rollup_sql, rewrite_for_rollups
 
-load_dotenv()
+SQL_MAX_TOKENS = 200
+
+# Database file used by the app, so restarts reuse the loaded table instead of re-parsing the CSV
+DEFAULT_DB_PATH = os.getenv("DUCKDB_PATH", "claims.duckdb")
+
+# Concurrent queries and per-query time limit in seconds, shared by all sessions of the app
+POOL_SIZE = int(os.getenv("DUCKDB_POOL_SIZE", "4"))
+QUERY_TIMEOUT = float(os.getenv("DUCKDB_QUERY_TIMEOUT", "30"))
+
+# Rows materialized per page of a Text2SQL result; the rest stays in DuckDB
+PAGE_SIZE = 1000
+
+# A query's first page is read from DuckDB's streaming reader. The result is copied into
+# a table in an in-memory database (RESULTS_DB) only when a later page or an export is
+# asked for, and those then all read the same rows. Result tables are dropped oldest
+# first once they hold more than MAX_RESULT_ROWS rows in total, and all of them when
+# the data is reloaded
+MAX_RESULT_ROWS = int(os.getenv("DUCKDB_RESULT_ROWS", "2000000"))
+RESULTS_DB = "query_results"
+
+# Set TEXT2SQL_DEBUG=1 to run table diagnostics before every query
+DEBUG = os.getenv("TEXT2SQL_DEBUG", "").lower() in ("1", "true", "yes")
+
+# Set SQL_CACHE_THRESHOLD (e.g. 0.9) to let paraphrased questions reuse cached SQL.
+# Unset, the SQL cache matches normalized questions exactly and never loads the embedding model
+SQL_CACHE_THRESHOLD = float(os.environ["SQL_CACHE_THRESHOLD"]) if os.getenv("SQL_CACHE_THRESHOLD") else None
+
+# Column types for the Gold CSV, matching the typed Parquet layer (see etl.to_arrow_table).
+# Columns not listed here are loaded as VARCHAR.
+GOLD_COLUMN_TYPES = {
+    'claim_amount': f'DECIMAL({AMOUNT_PRECISION}, {AMOUNT_SCALE})',
+    'service_date': 'DATE',
+}
+
+def _first_rows(executed, n: int) -> pd.DataFrame:
+    # Reads Arrow batches only until n rows have arrived; DuckDB stops producing the
+    # rest once the reader is closed
+    import pyarrow as pa
+    
+    reader = executed.to_arrow_reader(n)
+    batches, rows = [], 0
+    for batch in reader:
+        batches.append(batch)
+        rows += batch.num_rows
+        if rows >= n:
+            break
+    reader.close()
+    return arrow_to_pandas(pa.Table.from_batches(batches, schema=reader.schema).slice(0, n))
+
+def _preview_and_count(executed, n: int):
+    # The first n rows plus the total row count, from a single pass over the record
+    # batch reader; batches after the preview are counted and discarded
+    import pyarrow as pa
+    
+    reader = executed.fetch_record_batch(n)
+    batches, rows = [], 0
+    for batch in reader:
+        if rows < n:
+            batches.append(batch)
+        rows += batch.num_rows
+    return arrow_to_pandas(pa.Table.from_batches(batches, schema=reader.schema).slice(0, n)), rows
+
+class QueryResult:
+    """
+    Handle on an executed query: the SQL that produced it, its row count and the first
+    page of rows, plus the DuckDB table its rows were copied into once a later page or
+    an export needed them. Holds no more than one page, so it can be kept in chat history.
+    """
+    def __init__(self, sql: str, preview: pd.DataFrame = None, row_count: int = 0, page_size: int = PAGE_SIZE, error: str = None,
+                 table: str = None):
+        self.sql = sql
+        self.preview = preview if preview is not None else pd.DataFrame()
+        self.row_count = row_count
+        self.page_size = page_size
+        self.error = error
+        self.table = table
+
+    @property
+    def n_pages(self) -> int:
+        return max(1, -(-self.row_count // self.page_size))
 
 class Text2SQLPipeline:
-    def __init__(self, db_path=':memory:'):
-        api_key = os.getenv("GROQ_API_KEY")
-        if not api_key:
-            try:
-                import streamlit as st
-                api_key = st.secrets["GROQ_API_KEY"]
-            except:
-                pass
-        
-        if not api_key:
-            # Fallback or error
-            print("⚠️ GROQ_API_KEY not found!")
-            
-        self.client = Groq(api_key=api_key)
-        self.con = duckdb.connect(database=db_path)
+    def __init__(self, db_path=':memory:', sql_cache_threshold: float = SQL_CACHE_THRESHOLD, sql_cache_size: int = 1000, debug: bool = None,
+                 rollups: bool = True, rewrite_to_rollups: bool = True,
+                 pool_size: int = POOL_SIZE, query_timeout: float = QUERY_TIMEOUT):
+        """
+        Args:
+            pool_size: Number of queries that can run at once (see src/db_pool.py).
+            query_timeout: Seconds before a running query is interrupted; None disables.
+            rollups: Build pre-aggregated tables (see src/rollups.py) when data is loaded,
+                     and describe them to the LLM.
+            rewrite_to_rollups: Run simple aggregates over claims against the smallest
+                                rollup that can answer them.
+            debug: Run table diagnostics and print them before every query. Defaults to
+                   the TEXT2SQL_DEBUG environment variable.
+            sql_cache_threshold: Cosine similarity at which a paraphrased question reuses
+                                 cached SQL. None (the default unless SQL_CACHE_THRESHOLD
+                                 is set) keeps only exact (normalized) matches, and never
+                                 loads the embedding model.
+        """
+        # The Groq client and the DuckDB connection are created on first use
+        self.db_path = db_path
+        self._con = None
+        self._pool = None
+        self.pool_size = pool_size
+        self.query_timeout = query_timeout
+        self.debug = DEBUG if debug is None else debug
+        
+        # Table name -> columns, row count and the column list sent to the LLM.
+        # Filled when a table is loaded, so questions don't need to re-describe it
+        self.catalog = {}
+        self.build_rollups = rollups
+        self.rewrite_to_rollups = rewrite_to_rollups
+        # Rollup table name -> {'keys', 'row_count'} for the loaded claims table
+        self.rollups = {}
+        # Result table in RESULTS_DB -> its row count, least recently created first
+        self._result_tables = OrderedDict()
+        self._result_lock = threading.Lock()
         
-    def load_data(self, csv_path: str, table_name: str = "claims"):
-        print(f"📥 Loading data from {csv_path} into DuckDB table '{table_name}'...")
-        # DuckDB can query CSV directly, but creating a table is cleaner for repeated queries
-        self.con.execute(f"CREATE OR REPLACE TABLE {table_name} AS SELECT * FROM read_csv_auto('{csv_path}')")
-        print(f"✅ Data loaded. Schema:")
-        print(self.con.execute(f"DESCRIBE {table_name}").fetchdf())
+        # Question -> SQL, cleared whenever the claims schema changes
+        self.sql_cache = SemanticCache(
+            lambda texts: get_default_engine().encode(texts, use_cache=False),
+            threshold=sql_cache_threshold,
+            maxsize=sql_cache_size
+        )
+        self._schema_signature = None
 
-    def generate_sql(self, query_text: str) -> str:
-        print(f"🧠 Generating SQL for: '{query_text}'")
+    @property
+    def client(self):
+        return get_client()
+
+    @property
+    def con(self):
+        if self._con is None:
+            import duckdb
+            self._con = duckdb.connect(database=self.db_path)
+            # Records what each table was loaded from, so a database file can be reused across restarts
+            self._con.execute("CREATE TABLE IF NOT EXISTS _load_state (table_name VARCHAR PRIMARY KEY, source VARCHAR, fingerprint VARCHAR, loaded_at TIMESTAMP)")
+            # Shared by every cursor of the pool and never written to the database file
+            self._con.execute(f"ATTACH IF NOT EXISTS ':memory:' AS {RESULTS_DB}")
+        return self._con
+
+    @property
+    def pool(self) -> CursorPool:
+        """
+        Cursors that execute_sql runs user queries on. Loading and the catalog use con.
+        """
+        if self._pool is None:
+            self._pool = CursorPool(self.con, size=self.pool_size, timeout=self.query_timeout)
+        return self._pool
+
+    def cancel(self, session_id) -> bool:
+        """
+        Interrupts the query a session is running, e.g. when its user navigates away.
+        """
+        return self._pool is not None and self._pool.cancel(session_id)
+        
+    def load_data(self, data_path: str, table_name: str = "claims"):
+        """
+        Loads the Gold layer from a CSV file or a partitioned Parquet dataset directory.
+        Parquet layers are exposed as a view, so DuckDB prunes partitions and reads only
+        the columns each query needs instead of copying the data into memory.
+        
+        CSV layers are copied into a table with explicit column types. With a database
+        file, the table and its rollups are only rebuilt when the layer's size or
+        modification time has changed since it was loaded, so restarts skip re-parsing it.
+        """
+        fingerprint = self._fingerprint(data_path)
+        if self._load_state(table_name) == (data_path, fingerprint) and self._has_rollups(table_name):
+            print(f"⚡ DuckDB table '{table_name}' is up to date with {data_path}, skipping reload.")
+        else:
+            print(f"📥 Loading data from {data_path} into DuckDB table '{table_name}'...")
+            # Rebuilt in a transaction, so a failed load keeps the previous table and rollups
+            with self._transaction():
+                self._drop_relation(table_name)
+                if os.path.isdir(data_path):
+                    self.con.execute(f"CREATE VIEW {table_name} AS SELECT * FROM read_parquet('{data_path}/**/*.parquet', hive_partitioning = true)")
+                else:
+                    self.con.execute(f"CREATE TABLE {table_name} AS {self._typed_csv_select(data_path)}")
+                if self.build_rollups:
+                    for dimension in self._rollup_dimensions(table_name):
+                        self.con.execute(f"CREATE OR REPLACE TABLE {rollup_name(table_name, dimension)} AS {rollup_sql(table_name, dimension)}")
+                self._set_load_state(table_name, data_path, fingerprint)
+            # Results of queries over the old data would mix with pages run on the new data
+            self.clear_results()
+        entry = self.refresh_catalog(table_name)
+        print(f"✅ Data loaded ({entry['row_count']} rows). Schema:")
+        for name, col_type in entry['columns']:
+            print(f"  {name}: {col_type}")
         
-        # Get schema to inform the LLM
-        schema_df = self.con.execute("DESCRIBE claims").fetchdf()
-        columns = ", ".join([f"{row['column_name']} ({row['column_type']})" for _, row in schema_df.iterrows()])
+        self.rollups = {}
+        if self.build_rollups:
+            for dimension in self._rollup_dimensions(table_name):
+                name = rollup_name(table_name, dimension)
+                self.rollups[name] = {'keys': rollup_keys(dimension), 'row_count': self.refresh_catalog(name)['row_count']}
+            print("📊 Rollups: " + ", ".join(f"{name} ({info['row_count']} rows)" for name, info in self.rollups.items()))
+        
+        signature = tuple(self.catalog[name]['prompt_columns'] for name in [table_name, *self.rollups])
+        if self._schema_signature is not None and signature != self._schema_signature:
+            print("♻️ Schema changed, clearing cached SQL.")
+            self.sql_cache.clear()
+        self._schema_signature = signature
+
+    def refresh_catalog(self, table_name: str = "claims") -> dict:
+        """
+        Describes table_name and stores its columns and row count in the catalog.
+        """
+        columns = self.con.execute(f"DESCRIBE {table_name}").fetchall()
+        columns = [(name, col_type) for name, col_type, *_ in columns]
+        self.catalog[table_name] = {
+            'columns': columns,
+            'row_count': self.con.execute(f"SELECT count(*) FROM {table_name}").fetchone()[0],
+            'prompt_columns': ", ".join(f"{name} ({col_type})" for name, col_type in columns),
+        }
+        return self.catalog[table_name]
+
+    def _rollup_dimensions(self, table_name: str) -> list:
+        # Rollups need the grouping column plus the status, date and amount they aggregate
+        columns = {row[0] for row in self.con.execute(f"DESCRIBE {table_name}").fetchall()}
+        if not {'claim_status', 'service_date', 'claim_amount'} <= columns:
+            return []
+        return [dimension for dimension in ROLLUP_DIMENSIONS if dimension in columns]
+
+    def _has_rollups(self, table_name: str) -> bool:
+        if not self.build_rollups:
+            return True
+        existing = {row[0] for row in self.con.execute("SELECT table_name FROM information_schema.tables").fetchall()}
+        return all(rollup_name(table_name, dimension) in existing for dimension in self._rollup_dimensions(table_name))
+
+    def _drop_relation(self, name: str):
+        # A name can switch between table (CSV) and view (Parquet) across reloads
+        existing = self.con.execute(
+            "SELECT table_type FROM information_schema.tables WHERE table_name = ?", [name]
+        ).fetchone()
+        if existing:
+            kind = 'VIEW' if existing[0] == 'VIEW' else 'TABLE'
+            self.con.execute(f"DROP {kind} {name}")
+
+    @contextmanager
+    def _transaction(self):
+        self.con.execute("BEGIN TRANSACTION")
+        try:
+            yield
+        except BaseException:
+            self.con.execute("ROLLBACK")
+            raise
+        self.con.execute("COMMIT")
+
+    @staticmethod
+    def _fingerprint(path: str) -> str:
+        if not os.path.isdir(path):
+            stat = os.stat(path)
+            return f"{stat.st_size}:{stat.st_mtime_ns}"
+        # Parquet dataset: file count, total size and newest modification time
+        stats = [os.stat(os.path.join(root, name)) for root, _, files in os.walk(path) for name in files if name.endswith('.parquet')]
+        return f"{len(stats)}:{sum(st.st_size for st in stats)}:{max((st.st_mtime_ns for st in stats), default=0)}"
+
+    @staticmethod
+    def _typed_csv_select(path: str) -> str:
+        # Every column is read as text and cast explicitly instead of relying on type
+        # sniffing; values that don't parse become NULL rather than failing the load
+        header = pd.read_csv(path, nrows=0).columns
+        casts = [f"TRY_CAST({col} AS {sql_type}) AS {col}" for col, sql_type in GOLD_COLUMN_TYPES.items() if col in header]
+        replace = f" REPLACE ({', '.join(casts)})" if casts else ""
+        return f"SELECT *{replace} FROM read_csv('{path}', header = true, all_varchar = true)"
+
+    def _load_state(self, table_name: str):
+        """
+        Returns (source path, fingerprint) recorded when table_name was last loaded, or None.
+        """
+        exists = self.con.execute(
+            "SELECT count(*) FROM information_schema.tables WHERE table_name = ?", [table_name]
+        ).fetchone()[0]
+        if not exists:
+            return None
+        return self.con.execute(
+            "SELECT source, fingerprint FROM _load_state WHERE table_name = ?", [table_name]
+        ).fetchone()
+
+    def _set_load_state(self, table_name: str, source: str, fingerprint):
+        self.con.execute(
+            "INSERT OR REPLACE INTO _load_state VALUES (?, ?, ?, current_timestamp)",
+            [table_name, source, fingerprint]
+        )
+
+    def _sql_messages(self, query_text: str) -> list:
+        with span("build_prompt") as prompt_span:
+            messages = self._build_sql_messages(query_text)
+            prompt_span.set(chars=sum(len(message['content']) for message in messages))
+            return messages
+
+    def _build_sql_messages(self, query_text: str) -> list:
+        # Schema to inform the LLM, described once when the table was loaded
+        entry = self.catalog.get("claims") or self.refresh_catalog("claims")
+        columns = entry['prompt_columns']
+        rollup_tables = "\n".join(
+            f"        - {name}: {self.catalog[name]['prompt_columns']}" for name in self.rollups
+        )
         
         prompt = f"""
         You are an expert SQL data analyst.
@@ -48,64 +325,293 @@ class Text2SQLPipeline:
         1. Write a valid DuckDB SQL query to answer the question.
         2. Return ONLY the SQL query. No markdown, no explanations.
         3. Do not use LIMIT unless specified.
-        4. ALWAYS use ILIKE for string matching to handle case sensitivity (e.g. claim_status ILIKE 'Approved').
+        4. claim_status is one of 'Approved', 'Denied', 'Pending' or 'Other' (unrecognized payer statuses): compare it with = (e.g. claim_status = 'Approved').
+           Use ILIKE for matching free text such as diagnosis, procedure or patient_name.
         5. Map synonyms to schema values:
            - "accepted" -> 'Approved'
            - "rejected" -> 'Denied'
         6. Be aware that column names are lowercase (e.g., claim_status, diagnosis).
         7. Alias aggregations for readability (e.g. SELECT COUNT(*) AS total_claims ...).
         """
+        if rollup_tables:
+            prompt += f"""
+        Pre-aggregated tables (one row per group; {', '.join(ROLLUP_MEASURES)} summarize the claims in it):
+{rollup_tables}
+        8. When a question only groups or filters by columns of a pre-aggregated table, query it
+           instead of claims, using SUM(claim_count) for counts and SUM(total_amount) for totals.
+        """
         
-        import re
-        
-        completion = self.client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[
-                {"role": "system", "content": "You are a SQL generator. Output only SQL."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0,
-            max_tokens=200
-        )
-        
-        content = completion.choices[0].message.content.strip()
+        return [
+            {"role": "system", "content": "You are a SQL generator. Output only SQL."},
+            {"role": "user", "content": prompt}
+        ]
+
+    @staticmethod
+    def extract_sql(content: str) -> str:
+        """
+        Pulls the SQL statement out of the raw LLM output.
+        """
+        content = content.strip()
         
         # Try to find SQL in code blocks first
         match = re.search(r'```sql\n(.*?)\n```', content, re.DOTALL)
         if match:
-            sql_query = match.group(1).strip()
-        else:
-            # Fallback: assume the whole text is SQL if no code blocks, 
-            # but remove any markdown formatting just in case
-            sql_query = content.replace('```sql', '').replace('```', '').strip()
-            
+            return match.group(1).strip()
+        
+        # Fallback: assume the whole text is SQL if no code blocks, 
+        # but remove any markdown formatting just in case
+        return content.replace('```sql', '').replace('```', '').strip()
+
+    def _cached_sql(self, query_text: str):
+        with span("sql_cache") as cache_span:
+            cached_sql = self.sql_cache.get(query_text)
+            cache_span.set(hit=cached_sql is not None)
+            return cached_sql
+
+    def generate_sql(self, query_text: str) -> str:
+        cached_sql = self._cached_sql(query_text)
+        if cached_sql is not None:
+            print(f"⚡ Using cached SQL for: '{query_text}'")
+            return cached_sql
+        
+        print(f"🧠 Generating SQL for: '{query_text}'")
+        messages = self._sql_messages(query_text)
+        
+        with span("llm", model=MODEL_NAME) as llm_span:
+            completion = self.client.chat.completions.create(
+                model=MODEL_NAME,
+                messages=messages,
+                temperature=0,
+                max_tokens=SQL_MAX_TOKENS
+            )
+            llm_span.set(**usage_attributes(completion.usage))
+        
+        sql_query = self.extract_sql(completion.choices[0].message.content)
+        self.sql_cache.set(query_text, sql_query)
         return sql_query
 
-    def execute_sql(self, sql_query: str) -> pd.DataFrame:
-        print(f"🚀 Executing SQL: {sql_query}")
+    def stream_sql(self, query_text: str) -> Iterator[str]:
+        """
+        Yields the raw LLM output token by token, so the UI can show the query as it is
+        written. Pass the joined tokens to extract_sql for the final statement.
+        """
+        cached_sql = self._cached_sql(query_text)
+        if cached_sql is not None:
+            print(f"⚡ Using cached SQL for: '{query_text}'")
+            yield cached_sql
+            return
+        
+        print(f"🧠 Streaming SQL for: '{query_text}'")
+        content = ""
+        for token in stream_completion(self._sql_messages(query_text), temperature=0, max_tokens=SQL_MAX_TOKENS):
+            content += token
+            yield token
+        self.sql_cache.set(query_text, self.extract_sql(content))
+
+    async def agenerate_sql(self, query_text: str) -> AsyncIterator[str]:
+        """
+        Async variant of stream_sql.
+        """
+        cached_sql = self._cached_sql(query_text)
+        if cached_sql is not None:
+            yield cached_sql
+            return
+        
+        content = ""
+        async for token in astream_completion(self._sql_messages(query_text), temperature=0, max_tokens=SQL_MAX_TOKENS):
+            content += token
+            yield token
+        self.sql_cache.set(query_text, self.extract_sql(content))
+
+    def execute_sql(self, sql_query: str, session_id=None, timeout: float = None) -> pd.DataFrame:
+        """
+        Runs a query on a pooled cursor, so sessions don't wait on each other, and
+        returns the whole result. Use run_query for results that may be large.
+        
+        Args:
+            session_id: Identifies the caller; a newer query from the same session
+                        cancels one still running.
+            timeout: Overrides the pipeline's query_timeout for this query.
+        """
         try:
-            # Debug: Check if table exists and has data
-            tables = self.con.execute("SHOW TABLES").fetchdf()
-            print(f"Tables in DB: {tables}")
-            
-            if 'claims' in tables['name'].values:
-                count = self.con.execute("SELECT count(*) FROM claims").fetchone()[0]
-                print(f"Rows in 'claims' table: {count}")
-            else:
-                print("❌ Table 'claims' does not exist!")
-                
-            result = self.con.execute(sql_query).fetchdf()
+            with span("sql.execute", mode="full", rollup=False) as execute_span:
+                _, result = self._execute(sql_query, lambda cursor, sql: self.pool.fetchdf(cursor, sql, timeout), session_id)
+                execute_span.set(rows=len(result))
             print(f"Result shape: {result.shape}")
             return result
         except Exception as e:
             print(f"❌ SQL Execution Failed: {e}")
             return pd.DataFrame({'error': [str(e)]})
 
+    def run_query(self, sql_query: str, session_id=None, timeout: float = None, page_size: int = PAGE_SIZE) -> "QueryResult":
+        """
+        Runs a query once, streaming its Arrow record batches: the first page is kept
+        and the rest only counted. The QueryResult is small enough to keep in session
+        state; other pages and exports are served from a result table, created on first
+        use (fetch_page, iter_csv, export_csv).
+        """
+        def preview(cursor, sql):
+            return self.pool.run(cursor, sql, lambda executed: _preview_and_count(executed, page_size), timeout)
+        
+        try:
+            with span("sql.execute", mode="paged", rollup=False) as execute_span:
+                sql, (first_page, row_count) = self._execute(sql_query, preview, session_id)
+                execute_span.set(rows=row_count, preview_rows=len(first_page))
+            print(f"Result: {row_count} rows, previewing {len(first_page)}")
+            return QueryResult(sql, first_page, row_count, page_size)
+        except Exception as e:
+            print(f"❌ SQL Execution Failed: {e}")
+            return QueryResult(sql_query, error=str(e))
+
+    def _materialize(self, cursor, sql: str, timeout: float = None):
+        """
+        Runs sql into a new result table, dropping the oldest result tables while they
+        hold more than MAX_RESULT_ROWS rows in total.
+        
+        Returns:
+            (table name, row count)
+        """
+        table = f"{RESULTS_DB}.result_{uuid.uuid4().hex}"
+        # Binding first reports errors against the query as written, not the CREATE TABLE
+        cursor.sql(sql)
+        self.pool.run(cursor, f"CREATE TABLE {table} AS {sql}", lambda executed: None, timeout)
+        row_count = cursor.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
+        with self._result_lock:
+            self._result_tables[table] = row_count
+            evicted = []
+            while len(self._result_tables) > 1 and sum(self._result_tables.values()) > MAX_RESULT_ROWS:
+                evicted.append(self._result_tables.popitem(last=False)[0])
+        for name in evicted:
+            cursor.execute(f"DROP TABLE IF EXISTS {name}")
+        return table, row_count
+
+    def _result_table(self, cursor, result: "QueryResult", timeout: float = None) -> str:
+        with self._result_lock:
+            if result.table in self._result_tables:
+                return result.table
+        # First later page or export of this result, or its table was dropped since: run
+        # the query into a table, and take the first page and row count from it too, so
+        # every page shown from now on comes from the same run
+        result.table, result.row_count = self._materialize(cursor, result.sql, timeout)
+        result.preview = self._read_page(cursor, result.table, 0, result.page_size, timeout)
+        return result.table
+
+    def clear_results(self):
+        """
+        Drops every result table; results still on screen are run again when paged.
+        """
+        with self._result_lock:
+            tables = list(self._result_tables)
+            self._result_tables.clear()
+        for table in tables:
+            self.con.execute(f"DROP TABLE IF EXISTS {table}")
+
+    def _read_page(self, cursor, table: str, page: int, page_size: int, timeout: float = None) -> pd.DataFrame:
+        # rowid follows insertion order, which is the order the query returned the rows in
+        sql = f"SELECT * FROM {table} ORDER BY rowid LIMIT {page_size} OFFSET {page * page_size}"
+        return self.pool.run(cursor, sql, lambda executed: _first_rows(executed, page_size), timeout)
+
+    def fetch_page(self, result: "QueryResult", page: int, session_id=None, timeout: float = None) -> pd.DataFrame:
+        """
+        Rows of a result's page (0-based), paginated in DuckDB rather than in pandas.
+        """
+        if page == 0 or result.error:
+            return result.preview
+        with span("sql.fetch_page", page=page) as page_span, self.pool.checkout(session_id) as cursor:
+            rows = self._read_page(cursor, self._result_table(cursor, result, timeout), page, result.page_size, timeout)
+            page_span.set(rows=len(rows))
+            return rows
+
+    def iter_csv(self, result: "QueryResult", batch_size: int = 100_000) -> Iterator[bytes]:
+        """
+        Streams the full result as CSV, one Arrow record batch at a time, so exports
+        never hold more than batch_size rows in memory. Not subject to the query timeout.
+        """
+        import pyarrow.csv as pa_csv
+        
+        with self.pool.checkout() as cursor:
+            reader = cursor.execute(f"SELECT * FROM {self._result_table(cursor, result, timeout=0)} ORDER BY rowid").to_arrow_reader(batch_size)
+            include_header = True
+            for batch in reader:
+                buffer = io.BytesIO()
+                pa_csv.write_csv(batch, buffer, pa_csv.WriteOptions(include_header=include_header))
+                include_header = False
+                yield buffer.getvalue()
+            if include_header:
+                # Header only, for empty results
+                buffer = io.BytesIO()
+                pa_csv.write_csv(reader.schema.empty_table(), buffer)
+                yield buffer.getvalue()
+
+    def export_csv(self, result: "QueryResult", path: str) -> str:
+        """
+        Writes the full result to a CSV file with DuckDB's COPY, which streams it to disk.
+        """
+        with self.pool.checkout() as cursor:
+            cursor.execute(f"COPY (SELECT * FROM {self._result_table(cursor, result, timeout=0)} ORDER BY rowid) TO '{path}' (HEADER, DELIMITER ',')")
+        return path
+
+    def _execute(self, sql_query: str, fetch, session_id=None):
+        """
+        Runs fetch(cursor, sql) on a pooled cursor, against a rollup when the query can
+        be rewritten (falling back to the query as written if that fails).
+        
+        Returns:
+            (SQL that produced the result, fetch's return value)
+        """
+        print(f"🚀 Executing SQL: {sql_query}")
+        # A trailing semicolon would break wrapping the query in a subquery
+        sql_query = sql_query.strip().rstrip(';').strip()
+        rewritten = self.rewrite_sql(sql_query)
+        # Recorded on the caller's sql.execute span, if there is one
+        execute_span = current_span()
+        with self.pool.checkout(session_id) as cursor:
+            if self.debug:
+                self._print_diagnostics(cursor)
+            
+            if rewritten:
+                try:
+                    # Headers as the query was written; binding the original doesn't run it
+                    headers = ", ".join('"' + name.replace('"', '""') + '"' for name in cursor.sql(sql_query).columns)
+                    rewritten = f"SELECT * FROM ({rewritten}) AS result({headers})"
+                    print(f"📊 Answering from rollup: {rewritten}")
+                    result = fetch(cursor, rewritten)
+                    if execute_span is not None:
+                        execute_span.set(rollup=True)
+                    return rewritten, result
+                except QueryCancelled:
+                    raise
+                except Exception as e:
+                    print(f"⚠️ Rollup query failed ({e}), running against claims.")
+            
+            return sql_query, fetch(cursor, sql_query)
+
+    def rewrite_sql(self, sql_query: str, table_name: str = "claims"):
+        """
+        Returns sql_query redirected to a rollup table, or None if it should run as is.
+        """
+        if not (self.rewrite_to_rollups and self.rollups and table_name in self.catalog):
+            return None
+        table_columns = [name for name, _ in self.catalog[table_name]['columns']]
+        return rewrite_for_rollups(sql_query, table_name, table_columns, self.rollups)
+
+    def _print_diagnostics(self, cursor):
+        # Live checks against the database, unlike the catalog captured at load time
+        tables = cursor.execute("SHOW TABLES").fetchdf()
+        print(f"Tables in DB: {tables}")
+        
+        if 'claims' in tables['name'].values:
+            count = cursor.execute("SELECT count(*) FROM claims").fetchone()[0]
+            print(f"Rows in 'claims' table: {count} (catalog: {self.catalog.get('claims', {}).get('row_count')})")
+        else:
+            print("❌ Table 'claims' does not exist!")
+
 if __name__ == "__main__":
     # Test
     t2s = Text2SQLPipeline()
-    if os.path.exists('data/gold/claims_master.csv'):
-        t2s.load_data('data/gold/claims_master.csv')
+    gold_path = latest_layer_path()
+    if gold_path:
+        t2s.load_data(gold_path)
         sql = t2s.generate_sql("Show me 5 denied claims for diabetes")
         print(f"Generated SQL: {sql}")
         res = t2s.execute_sql(sql)
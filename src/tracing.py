@@ -0,0 +1,147 @@
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+# Every finished trace is appended to this JSONL file; empty disables
+TRACE_FILE = os.getenv("TRACE_FILE", "")
+# Optional collector that receives every finished trace as a JSON POST
+TRACE_ENDPOINT = os.getenv("TRACE_ENDPOINT", "")
+# Finished traces kept in memory for the UI
+RECENT_TRACES = int(os.getenv("TRACE_RECENT", 100))
+
+class Span:
+    """
+    One timed stage of a request, with attributes (row counts, token counts, cache
+    hits...) and the stages it contains.
+    """
+    def __init__(self, name: str, **attributes):
+        self.name = name
+        self.attributes = attributes
+        self.children = []
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.duration_ms = None
+
+    def set(self, **attributes) -> "Span":
+        self.attributes.update(attributes)
+        return self
+
+    def end(self):
+        if self.duration_ms is None:
+            self.duration_ms = (time.perf_counter() - self._start) * 1000
+
+    @property
+    def elapsed_ms(self) -> float:
+        return self.duration_ms if self.duration_ms is not None else (time.perf_counter() - self._start) * 1000
+
+    def to_dict(self, origin: float = None) -> Dict:
+        origin = self._start if origin is None else origin
+        return {
+            'name': self.name,
+            'offset_ms': round((self._start - origin) * 1000, 3),
+            'duration_ms': round(self.elapsed_ms, 3),
+            'attributes': self.attributes,
+            'children': [child.to_dict(origin) for child in self.children],
+        }
+
+    def breakdown(self) -> List[Dict]:
+        """
+        One row per span, depth first, with the name indented by depth: for tables.
+        """
+        rows = []
+        def visit(span, depth):
+            details = ', '.join(f"{key}={value}" for key, value in span.attributes.items() if key != 'trace_id')
+            rows.append({'stage': '  ' * depth + span.name, 'ms': round(span.elapsed_ms, 1), 'details': details})
+            for child in span.children:
+                visit(child, depth + 1)
+        visit(self, 0)
+        return rows
+
+_current = contextvars.ContextVar('current_span', default=None)
+_recent = deque(maxlen=RECENT_TRACES)
+_file_lock = threading.Lock()
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+def start_span(name: str, **attributes) -> Span:
+    """
+    Starts a child of the current span without making it current; call end() on it.
+    For stages that span generator yields, where a context manager would leak into
+    the caller.
+    """
+    span = Span(name, **attributes)
+    parent = _current.get()
+    if parent is not None:
+        parent.children.append(span)
+    return span
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Span]:
+    """
+    Times the block as a child of the current span. Outside a trace the span is
+    still timed but not recorded anywhere.
+    """
+    current = start_span(name, **attributes)
+    token = _current.set(current)
+    try:
+        yield current
+    except Exception as e:
+        current.set(error=str(e))
+        raise
+    finally:
+        current.end()
+        _current.reset(token)
+
+@contextmanager
+def trace(name: str, **attributes) -> Iterator[Span]:
+    """
+    Root span for one request. Spans opened inside the block (in this thread, or in
+    threads started with a copy of its context) become its children, and the whole
+    tree is exported when the block exits.
+    """
+    root = Span(name, trace_id=uuid.uuid4().hex, **attributes)
+    token = _current.set(root)
+    try:
+        yield root
+    except Exception as e:
+        root.set(error=str(e))
+        raise
+    finally:
+        root.end()
+        _current.reset(token)
+        export(root)
+
+def export(root: Span):
+    record = {'timestamp': root.started_at, **root.to_dict()}
+    _recent.append(root)
+    if TRACE_FILE:
+        line = json.dumps(record, default=str)
+        with _file_lock, open(TRACE_FILE, 'a') as f:
+            f.write(line + '\n')
+    if TRACE_ENDPOINT:
+        # Fire and forget, so a slow or missing collector never delays a request
+        threading.Thread(target=_post, args=(record,), daemon=True).start()
+
+def _post(record: Dict):
+    import urllib.request
+
+    request = urllib.request.Request(
+        TRACE_ENDPOINT, data=json.dumps(record, default=str).encode(), headers={'Content-Type': 'application/json'}
+    )
+    try:
+        urllib.request.urlopen(request, timeout=5).close()
+    except Exception as e:
+        print(f"⚠️ Could not send trace to {TRACE_ENDPOINT}: {e}")
+
+def recent_traces(name: str = None) -> List[Span]:
+    """
+    Finished traces, oldest first, optionally only those with the given root name.
+    """
+    return [root for root in list(_recent) if name is None or root.name == name]
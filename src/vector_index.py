@@ -0,0 +1,550 @@
+import math
+import os
+import uuid
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# 'chroma': Chroma's built-in HNSW index (tunable through hnsw_configuration).
+# 'numpy':  exact brute-force search, for small corpora or as a recall baseline.
+# 'ivfpq':  FAISS IVF-PQ, compressed vectors for very large corpora (needs faiss-cpu).
+# 'int8':   scalar-quantized vectors (4x smaller) in memory, candidates re-ranked at full
+#           precision from an on-disk copy of the vectors.
+# 'binary': one bit per dimension (32x smaller), re-ranked the same way.
+INDEX_BACKENDS = ['chroma', 'numpy', 'ivfpq', 'int8', 'binary']
+
+# Rows scored per step by the quantized indexes, bounding the float32 working set
+SCAN_BLOCK_SIZE = 32_768
+
+# Set bits in every byte value, for Hamming distances between packed binary codes
+POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+def hnsw_configuration(M: int = 16, ef_construction: int = 100, ef_search: int = 100) -> dict:
+    """
+    Chroma collection configuration for its HNSW index.
+
+    Args:
+        M: Graph neighbors per node. Higher raises recall and memory.
+        ef_construction: Candidate list size while building. Higher builds a better
+                         graph, more slowly. Fixed once the collection exists.
+        ef_search: Candidate list size while querying. Higher raises recall and latency,
+                   and can be changed on an existing collection.
+    """
+    return {'hnsw': {'space': 'l2', 'max_neighbors': M, 'ef_construction': ef_construction, 'ef_search': ef_search}}
+
+class _LocalIndex:
+    """
+    Id bookkeeping shared by the in-process indexes. Vectors are addressed by their
+    insertion position; removed positions are tombstoned until the index is rebuilt.
+    """
+    def __init__(self):
+        self._ids = []
+        self._positions = {}
+        self._alive = np.empty(0, dtype=bool)
+
+    def __len__(self):
+        return len(self._positions)
+
+    def _append_ids(self, ids: List[str]) -> np.ndarray:
+        start = len(self._ids)
+        self._ids.extend(ids)
+        self._positions.update({doc_id: start + i for i, doc_id in enumerate(ids)})
+        self._alive = np.concatenate([self._alive, np.ones(len(ids), dtype=bool)])
+        return np.arange(start, start + len(ids), dtype=np.int64)
+
+    def _remove_ids(self, ids: Iterable[str]) -> np.ndarray:
+        positions = np.array([self._positions.pop(doc_id) for doc_id in ids if doc_id in self._positions], dtype=np.int64)
+        self._alive[positions] = False
+        return positions
+
+    def _allowed_positions(self, allowed_ids) -> Optional[np.ndarray]:
+        if allowed_ids is None:
+            return None
+        return np.array([self._positions[doc_id] for doc_id in allowed_ids if doc_id in self._positions], dtype=np.int64)
+
+class BruteForceIndex(_LocalIndex):
+    """
+    Exact squared-L2 search over one float32 matrix. Perfect recall; memory is 4 bytes
+    per dimension per vector and query time grows linearly with the corpus.
+    """
+    backend = 'numpy'
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._vectors = np.empty((0, 0), dtype=np.float32)
+        self._sq_norms = np.empty(0, dtype=np.float32)
+
+    def add(self, ids: List[str], vectors):
+        self.remove(ids)
+        self._append_ids(list(ids))
+        # Stacked lazily, so adding many batches doesn't copy the matrix each time
+        self._chunks.append(np.asarray(vectors, dtype=np.float32))
+
+    def remove(self, ids: Iterable[str]):
+        self._remove_ids(ids)
+
+    def _matrix(self) -> np.ndarray:
+        if self._chunks:
+            self._vectors = np.vstack([self._vectors.reshape(-1, self._chunks[0].shape[1]), *self._chunks])
+            self._sq_norms = np.einsum('ij,ij->i', self._vectors, self._vectors)
+            self._chunks = []
+        return self._vectors
+
+    @property
+    def bytes_per_vector(self) -> int:
+        vectors = self._matrix()
+        return vectors.shape[1] * 4 if vectors.size else 0
+
+    def search(self, query, k: int, allowed_ids=None) -> Tuple[List[str], np.ndarray]:
+        """
+        The k nearest ids and their squared L2 distances, optionally restricted to allowed_ids.
+        """
+        vectors = self._matrix()
+        query = np.asarray(query, dtype=np.float32)
+        candidates = np.flatnonzero(self._alive)
+        allowed = self._allowed_positions(allowed_ids)
+        if allowed is not None:
+            candidates = np.intersect1d(candidates, allowed)
+        if not len(candidates):
+            return [], np.empty(0, dtype=np.float32)
+
+        distances = self._sq_norms[candidates] - 2 * vectors[candidates] @ query + query @ query
+        k = min(k, len(candidates))
+        top = np.argpartition(distances, k - 1)[:k]
+        top = top[np.argsort(distances[top], kind='stable')]
+        return [self._ids[i] for i in candidates[top]], distances[top]
+
+    def save(self, path: str):
+        vectors = self._matrix()
+        alive = np.flatnonzero(self._alive)
+        np.savez(path, ids=np.array([self._ids[i] for i in alive], dtype=object), vectors=vectors[alive] if len(vectors) else vectors)
+
+    @classmethod
+    def load(cls, path: str) -> "BruteForceIndex":
+        index = cls()
+        with np.load(path, allow_pickle=True) as data:
+            if len(data['ids']):
+                index.add(list(data['ids']), data['vectors'])
+        return index
+
+class IVFPQIndex(_LocalIndex):
+    """
+    FAISS inverted-file index with product quantization. Vectors are clustered into
+    nlist lists and stored as m one-byte codes, so a 384-dimension float32 vector
+    (1,536 bytes) takes m bytes. Queries scan only the nprobe nearest lists; raise
+    nprobe for recall at the cost of latency.
+
+    Vectors are buffered at full precision (and searched exactly) until train_size of
+    them have been added; the quantizers are then trained on all of them, with the
+    configured nlist and nbits. Rebuild the index if the data distribution changes a lot.
+    """
+    backend = 'ivfpq'
+
+    # FAISS warns below this many training vectors per list
+    MIN_POINTS_PER_LIST = 39
+
+    def __init__(self, nlist: int = 1024, m: int = 16, nbits: int = 8, nprobe: int = 16, train_size: int = 200_000):
+        super().__init__()
+        if train_size < self.MIN_POINTS_PER_LIST * max(nlist, 2 ** nbits):
+            raise ValueError(f"train_size={train_size} is too small to train nlist={nlist}, nbits={nbits}: "
+                             f"need at least {self.MIN_POINTS_PER_LIST} vectors per list and per code")
+        self.nlist = nlist
+        self.m = m
+        self.nbits = nbits
+        self.nprobe = nprobe
+        self.train_size = train_size
+        self._index = None
+        # (positions, vectors) added before the quantizers are trained
+        self._pending = []
+
+    @staticmethod
+    def _faiss():
+        try:
+            import faiss
+        except ImportError:
+            raise ImportError("The 'ivfpq' index backend needs FAISS: pip install faiss-cpu")
+        return faiss
+
+    @property
+    def trained_nlist(self) -> Optional[int]:
+        """
+        Lists of the trained index, or None while vectors are still being buffered.
+        """
+        return None if self._index is None else self._index.nlist
+
+    def _pending_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        # Only positions still alive; removed and replaced vectors are dropped
+        if not self._pending:
+            return np.empty(0, dtype=np.int64), np.empty((0, 0), dtype=np.float32)
+        positions = np.concatenate([positions for positions, _ in self._pending])
+        vectors = np.vstack([vectors for _, vectors in self._pending])
+        alive = self._alive[positions]
+        return positions[alive], vectors[alive]
+
+    def _train(self):
+        faiss = self._faiss()
+        positions, vectors = self._pending_arrays()
+        n, dim = vectors.shape
+        m = max(d for d in range(1, min(self.m, dim) + 1) if dim % d == 0)
+        print(f"🏋️ Training IVF-PQ on {min(n, self.train_size):,} vectors (nlist={self.nlist}, m={m}, nbits={self.nbits})...")
+        quantizer = faiss.IndexFlatL2(dim)
+        index = faiss.IndexIVFPQ(quantizer, dim, self.nlist, m, self.nbits)
+        index.train(vectors[np.random.default_rng(0).permutation(n)[:self.train_size]])
+        if index.nlist != self.nlist or index.pq.nbits != self.nbits:
+            raise RuntimeError(f"IVF-PQ trained with nlist={index.nlist}, nbits={index.pq.nbits}; configured {self.nlist}, {self.nbits}")
+        index.add_with_ids(vectors, positions)
+        self._index = index
+        self._pending = []
+
+    def add(self, ids: List[str], vectors):
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if not len(vectors):
+            return
+        self.remove(ids)
+        positions = self._append_ids(list(ids))
+        if self._index is not None:
+            self._index.add_with_ids(vectors, positions)
+            return
+        self._pending.append((positions, vectors))
+        if len(self._pending_arrays()[0]) >= self.train_size:
+            self._train()
+
+    def remove(self, ids: Iterable[str]):
+        positions = self._remove_ids(ids)
+        if len(positions) and self._index is not None:
+            self._index.remove_ids(self._faiss().IDSelectorBatch(positions))
+
+    def search(self, query, k: int, allowed_ids=None) -> Tuple[List[str], np.ndarray]:
+        """
+        The k approximate nearest ids and their estimated squared L2 distances
+        (exact ones while the index is still untrained).
+        """
+        if not len(self):
+            return [], np.empty(0, dtype=np.float32)
+        allowed = self._allowed_positions(allowed_ids)
+        if self._index is None:
+            return self._search_pending(np.asarray(query, dtype=np.float32), k, allowed)
+        faiss = self._faiss()
+        params = faiss.SearchParametersIVF(nprobe=self.nprobe)
+        if allowed is not None:
+            if not len(allowed):
+                return [], np.empty(0, dtype=np.float32)
+            # With a selective filter few allowed vectors fall in the nprobe nearest lists,
+            # so probe enough lists to expect a few times k of them
+            nlist = self._index.nlist
+            nprobe = min(nlist, max(self.nprobe, math.ceil(4 * k * nlist / len(allowed))))
+            params = faiss.SearchParametersIVF(nprobe=nprobe, sel=faiss.IDSelectorBatch(allowed))
+        distances, labels = self._index.search(np.asarray(query, dtype=np.float32).reshape(1, -1), k, params=params)
+        found = labels[0] >= 0
+        return [self._ids[i] for i in labels[0][found]], distances[0][found]
+
+    def _search_pending(self, query, k, allowed):
+        positions, vectors = self._pending_arrays()
+        if allowed is not None:
+            keep = np.isin(positions, allowed)
+            positions, vectors = positions[keep], vectors[keep]
+        if not len(positions):
+            return [], np.empty(0, dtype=np.float32)
+        distances = np.einsum('ij,ij->i', vectors - query, vectors - query)
+        top = np.argsort(distances, kind='stable')[:k]
+        return [self._ids[i] for i in positions[top]], distances[top]
+
+    def save(self, path: str):
+        faiss = self._faiss()
+        np.save(path + '.ids.npy', np.array(self._ids, dtype=object))
+        np.save(path + '.alive.npy', self._alive)
+        if self._index is not None:
+            faiss.write_index(self._index, path + '.faiss')
+            if os.path.exists(path + '.pending.npz'):
+                os.remove(path + '.pending.npz')
+        else:
+            positions, vectors = self._pending_arrays()
+            np.savez(path + '.pending.npz', positions=positions, vectors=vectors)
+
+    @classmethod
+    def load(cls, path: str, **params) -> "IVFPQIndex":
+        index = cls(**params)
+        index._ids = list(np.load(path + '.ids.npy', allow_pickle=True))
+        index._alive = np.load(path + '.alive.npy')
+        index._positions = {doc_id: i for i, doc_id in enumerate(index._ids) if index._alive[i]}
+        if os.path.exists(path + '.pending.npz'):
+            with np.load(path + '.pending.npz') as data:
+                if len(data['positions']):
+                    index._pending = [(data['positions'], data['vectors'])]
+        elif os.path.exists(path + '.faiss'):
+            index._index = cls._faiss().read_index(path + '.faiss')
+        return index
+
+class _QuantizedIndex(_LocalIndex):
+    """
+    Keeps only compact codes in memory and ranks every vector by an approximate distance.
+    The search returns k * rerank_factor candidates, to be re-ranked at full precision
+    with exact_rerank.
+
+    With vectors_path, the full-precision vectors are appended to a file next to the
+    index (row = insertion position) and read back through a memmap by full_vectors,
+    so only the rows being re-ranked are paged in. Without it, callers supply the full
+    vectors themselves.
+
+    The quantizer is fitted on the first vectors added (up to train_size).
+    """
+    # Whether the squared norm of each original vector is kept next to its code
+    keeps_norms = False
+
+    def __init__(self, rerank_factor: int = 4, train_size: int = 100_000, vectors_path: str = None):
+        super().__init__()
+        self.rerank_factor = rerank_factor
+        self.train_size = train_size
+        self.vectors_path = vectors_path
+        self._state = None
+        self._chunks = []
+        self._codes = None
+        self._norms = np.empty(0, dtype=np.float32)
+        self._dim = None
+        self._vectors_file = None
+        self._memmap = None
+
+    def _fit(self, vectors: np.ndarray) -> Dict[str, np.ndarray]:
+        raise NotImplementedError
+
+    def _encode(self, vectors: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def _approximate(self, codes: np.ndarray, norms: np.ndarray, query: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def add(self, ids: List[str], vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if not len(vectors):
+            return
+        self.remove(ids)
+        if self._state is None:
+            self._state = self._fit(vectors[:self.train_size])
+            self._dim = vectors.shape[1]
+        if self.vectors_path is not None:
+            self._append_vectors(vectors)
+        self._append_ids(list(ids))
+        self._chunks.append((self._encode(vectors), np.einsum('ij,ij->i', vectors, vectors) if self.keeps_norms else None))
+
+    def _append_vectors(self, vectors: np.ndarray):
+        # A new file per index generation, so a crash never leaves the saved index
+        # pointing at rows it didn't write
+        if self._vectors_file is None:
+            self._vectors_file = f"{self.vectors_path}.{uuid.uuid4().hex[:8]}.f32"
+        with open(self._vectors_file, 'ab') as f:
+            f.write(np.ascontiguousarray(vectors).tobytes())
+        self._memmap = None
+
+    def full_vectors(self, ids: List[str]) -> np.ndarray:
+        """
+        Full-precision vectors of ids (which must be in the index), read from vectors_path.
+        """
+        if self._vectors_file is None:
+            return np.empty((0, self._dim or 0), dtype=np.float32)
+        if self._memmap is None or len(self._memmap) != len(self._ids):
+            self._memmap = np.memmap(self._vectors_file, dtype=np.float32, mode='r', shape=(len(self._ids), self._dim))
+        return np.asarray(self._memmap[[self._positions[doc_id] for doc_id in ids]])
+
+    def remove(self, ids: Iterable[str]):
+        self._remove_ids(ids)
+
+    def _matrix(self) -> np.ndarray:
+        if self._chunks:
+            codes = [chunk for chunk, _ in self._chunks]
+            self._codes = np.vstack(codes if self._codes is None else [self._codes, *codes])
+            if self.keeps_norms:
+                self._norms = np.concatenate([self._norms, *(norms for _, norms in self._chunks)])
+            self._chunks = []
+        return self._codes
+
+    def _compact(self):
+        """
+        Drops removed vectors from the codes, the norms and the vectors file.
+        """
+        codes = self._matrix()
+        if codes is None or self._alive.all():
+            return
+        keep = np.flatnonzero(self._alive)
+        if self._vectors_file is not None:
+            old_file = self._vectors_file
+            self._vectors_file = f"{self.vectors_path}.{uuid.uuid4().hex[:8]}.f32"
+            source = np.memmap(old_file, dtype=np.float32, mode='r', shape=(len(self._ids), self._dim))
+            with open(self._vectors_file, 'wb') as f:
+                for start in range(0, len(keep), SCAN_BLOCK_SIZE):
+                    f.write(np.ascontiguousarray(source[keep[start:start + SCAN_BLOCK_SIZE]]).tobytes())
+            del source
+            self._memmap = None
+        self._codes = codes[keep]
+        if self.keeps_norms:
+            self._norms = self._norms[keep]
+        self._ids = [self._ids[i] for i in keep]
+        self._positions = {doc_id: i for i, doc_id in enumerate(self._ids)}
+        self._alive = np.ones(len(self._ids), dtype=bool)
+
+    @property
+    def bytes_per_vector(self) -> int:
+        """
+        Bytes held in memory per vector: the code, plus the norm for int8.
+        """
+        codes = self._matrix()
+        return 0 if codes is None else codes.shape[1] * codes.itemsize + (4 if self.keeps_norms else 0)
+
+    @property
+    def disk_bytes_per_vector(self) -> int:
+        """
+        Bytes per vector in the vectors file, only read for re-ranking.
+        """
+        return (self._dim or 0) * 4 if self.vectors_path is not None else 0
+
+    def search(self, query, k: int, allowed_ids=None) -> Tuple[List[str], np.ndarray]:
+        """
+        The k * rerank_factor nearest ids by approximate distance, and those distances.
+        """
+        codes = self._matrix()
+        if codes is None:
+            return [], np.empty(0, dtype=np.float32)
+        query = np.asarray(query, dtype=np.float32)
+        candidates = np.flatnonzero(self._alive)
+        allowed = self._allowed_positions(allowed_ids)
+        if allowed is not None:
+            candidates = np.intersect1d(candidates, allowed)
+        if not len(candidates):
+            return [], np.empty(0, dtype=np.float32)
+
+        distances = np.empty(len(candidates), dtype=np.float32)
+        for start in range(0, len(candidates), SCAN_BLOCK_SIZE):
+            block = candidates[start:start + SCAN_BLOCK_SIZE]
+            norms = self._norms[block] if self.keeps_norms else None
+            distances[start:start + len(block)] = self._approximate(codes[block], norms, query)
+        k = min(k * self.rerank_factor, len(candidates))
+        top = np.argpartition(distances, k - 1)[:k]
+        top = top[np.argsort(distances[top], kind='stable')]
+        return [self._ids[i] for i in candidates[top]], distances[top]
+
+    def save(self, path: str):
+        self._compact()
+        codes = self._matrix()
+        arrays = {'ids': np.array(self._ids, dtype=object)}
+        if codes is not None:
+            arrays.update(self._state, codes=codes, dim=np.array(self._dim))
+            if self.keeps_norms:
+                arrays['norms'] = self._norms
+            if self._vectors_file is not None:
+                arrays['vectors_file'] = np.array(os.path.basename(self._vectors_file))
+        # Written next to the target and swapped in, so a crash keeps the previous save
+        path = path if path.endswith('.npz') else path + '.npz'
+        tmp_path = path[:-len('.npz')] + '.tmp.npz'
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+        # Vector files of earlier generations are no longer referenced
+        if self.vectors_path is not None:
+            directory, prefix = os.path.split(self.vectors_path)
+            for name in os.listdir(directory or '.'):
+                stale = os.path.join(directory, name)
+                if name.startswith(prefix + '.') and name.endswith('.f32') and stale != self._vectors_file:
+                    os.remove(stale)
+
+    @classmethod
+    def load(cls, path: str, **params) -> Optional["_QuantizedIndex"]:
+        """
+        Loads an index saved with save(path). Returns None when it uses a vectors file
+        that is missing or shorter than the saved index, so the caller rebuilds it.
+        """
+        index = cls(**params)
+        with np.load(path, allow_pickle=True) as data:
+            if not len(data['ids']):
+                return index
+            reserved = ('ids', 'codes', 'norms', 'dim', 'vectors_file')
+            index._state = {name: data[name] for name in data.files if name not in reserved}
+            index._dim = int(data['dim']) if 'dim' in data.files else None
+            index._append_ids(list(data['ids']))
+            index._chunks.append((data['codes'], data['norms'] if index.keeps_norms else None))
+            vectors_file = str(data['vectors_file']) if 'vectors_file' in data.files else None
+        if index.vectors_path is not None:
+            if vectors_file is None or index._dim is None:
+                return None
+            index._vectors_file = os.path.join(os.path.dirname(index.vectors_path), vectors_file)
+            expected = len(index._ids) * index._dim * 4
+            if not os.path.exists(index._vectors_file) or os.path.getsize(index._vectors_file) < expected:
+                return None
+            # Rows appended after the last save (e.g. before a crash) don't belong to this index
+            if os.path.getsize(index._vectors_file) > expected:
+                os.truncate(index._vectors_file, expected)
+        return index
+
+class ScalarQuantizedIndex(_QuantizedIndex):
+    """
+    int8 codes: each dimension is scaled by its largest absolute value in the training
+    sample. One byte per dimension plus the vector's norm, about 4x smaller than float32.
+    """
+    backend = 'int8'
+    keeps_norms = True
+
+    def _fit(self, vectors):
+        return {'scale': np.maximum(np.abs(vectors).max(axis=0), 1e-12).astype(np.float32) / 127}
+
+    def _encode(self, vectors):
+        return np.clip(np.rint(vectors / self._state['scale']), -127, 127).astype(np.int8)
+
+    def _approximate(self, codes, norms, query):
+        # ||x||^2 - 2 x.q, with x.q computed on the dequantized codes; ||q||^2 doesn't change the order
+        return norms - 2 * (codes.astype(np.float32) @ (query * self._state['scale']))
+
+class BinaryIndex(_QuantizedIndex):
+    """
+    One bit per dimension (above or below the training mean), packed 8 to a byte:
+    32x smaller than float32. Candidates are ranked by Hamming distance, which is
+    coarse, so this backend re-ranks more candidates by default.
+    """
+    backend = 'binary'
+
+    def __init__(self, rerank_factor: int = 10, train_size: int = 100_000, vectors_path: str = None):
+        super().__init__(rerank_factor=rerank_factor, train_size=train_size, vectors_path=vectors_path)
+
+    def _fit(self, vectors):
+        return {'threshold': vectors.mean(axis=0).astype(np.float32)}
+
+    def _encode(self, vectors):
+        return np.packbits(vectors > self._state['threshold'], axis=1)
+
+    def _approximate(self, codes, norms, query):
+        return POPCOUNT[np.bitwise_xor(codes, self._encode(query.reshape(1, -1)))].sum(axis=1, dtype=np.float32)
+
+QUANTIZED_INDEXES = {'int8': ScalarQuantizedIndex, 'binary': BinaryIndex}
+
+def exact_rerank(query, ids: List[str], vectors, k: int) -> Tuple[List[str], np.ndarray]:
+    """
+    The k of ids nearest to query by exact squared L2 distance, given their full-precision vectors.
+    """
+    if not len(ids):
+        return [], np.empty(0, dtype=np.float32)
+    query = np.asarray(query, dtype=np.float32)
+    vectors = np.asarray(vectors, dtype=np.float32)
+    distances = np.einsum('ij,ij->i', vectors - query, vectors - query)
+    top = np.argsort(distances, kind='stable')[:k]
+    return [ids[i] for i in top], distances[top]
+
+def make_local_index(backend: str, **params):
+    """
+    Creates an empty in-process index for one of the local backends.
+    """
+    if backend == 'numpy':
+        return BruteForceIndex()
+    if backend == 'ivfpq':
+        return IVFPQIndex(**params)
+    if backend in QUANTIZED_INDEXES:
+        return QUANTIZED_INDEXES[backend](**params)
+    raise ValueError(f"Unknown local index backend '{backend}', expected one of {INDEX_BACKENDS[1:]}")
+
+def load_local_index(backend: str, path: str, **params):
+    """
+    Loads an index saved with save(path), or returns None if there is none.
+    """
+    if backend == 'numpy':
+        return BruteForceIndex.load(path + '.npz') if os.path.exists(path + '.npz') else None
+    if backend == 'ivfpq':
+        return IVFPQIndex.load(path, **params) if os.path.exists(path + '.ids.npy') else None
+    if backend in QUANTIZED_INDEXES:
+        return QUANTIZED_INDEXES[backend].load(path + '.npz', **params) if os.path.exists(path + '.npz') else None
+    raise ValueError(f"Unknown local index backend '{backend}', expected one of {INDEX_BACKENDS[1:]}")
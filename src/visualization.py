@@ -1,5 +1,4 @@
 import pandas as pd
-import plotly.express as px
 import streamlit as st
 
 def suggest_visualization(df):
@@ -34,6 +33,9 @@ def visualize_query_results(df):
         st.warning("No data to visualize.")
         return
 
+    # Imported here so plotly only loads once a chart is actually drawn
+    import plotly.express as px
+    
     viz_type = suggest_visualization(df)
     
     # Heuristics for column selection
@@ -50,7 +52,7 @@ def visualize_query_results(df):
             y_col = numeric_cols[0]
             # Group by date if there are duplicates
             if df[x_col].duplicated().any():
-                df_grouped = df.groupby(x_col)[y_col].sum().reset_index()
+                df_grouped = df.groupby(x_col, observed=True)[y_col].sum().reset_index()
                 chart = px.line(df_grouped, x=x_col, y=y_col, title=f"Sum of {y_col} over Time")
             else:
                 chart = px.line(df, x=x_col, y=y_col, title=f"{y_col} over Time")